@@ -29,6 +29,8 @@ from fastapi.middleware.cors import CORSMiddleware
 from typing import List, Optional
 import uvicorn
 
+from services.model_registry import model_registry
+
 # Définition des constantes
 IMG_SIZE = 128
 VOLUME_SLICES = 100
@@ -74,7 +76,7 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Variable globale pour stocker le modèle chargé
+# Variable globale pour stocker le modèle chargé (instance du registre partagé)
 model = None
 
 # Définition des métriques personnalisées
@@ -126,35 +128,11 @@ def specificity(y_true, y_pred):
     return true_negatives / (possible_negatives + K.epsilon())
 
 def load_model_if_needed():
-    """Charge le modèle s'il n'est pas déjà chargé."""
+    """Récupère le modèle partagé (chargé et préchauffé une seule fois par le registre)."""
     global model
     if model is None:
-        model_path = 'models/my_model.h5'
-        
-        # Définir les objets personnalisés
-        custom_objects = {
-            "dice_coef": dice_coef,
-            "precision": precision,
-            "sensitivity": sensitivity,
-            "specificity": specificity,
-            "dice_coef_necrotic": dice_coef_necrotic,
-            "dice_coef_edema": dice_coef_edema,
-            "dice_coef_enhancing": dice_coef_enhancing
-        }
-        
         try:
-            # Charger le modèle
-            model = load_model(model_path, custom_objects=custom_objects, compile=False)
-            
-            # Compiler le modèle
-            model.compile(
-                loss="categorical_crossentropy",
-                optimizer=tf.keras.optimizers.Adam(learning_rate=0.001),
-                metrics=['accuracy', tf.keras.metrics.MeanIoU(num_classes=4),
-                        dice_coef, precision, sensitivity, specificity,
-                        dice_coef_necrotic, dice_coef_edema, dice_coef_enhancing]
-            )
-            return True
+            model = model_registry.get_model()
         except Exception as e:
             print(f"Erreur lors du chargement du modèle: {str(e)}")
             return False
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+⏱️ Benchmark du recadrage sur le cerveau
+Prétraitement (redimensionnement) et inférence avec / sans boîte englobante
+sur un volume 240x240x155 synthétique ou un cas réel
+
+Usage: python benchmark_brain_crop.py [--case dossier_patient] [--runs 5] [--predict]
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+
+import numpy as np
+
+# Ajouter le répertoire backend au path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.preprocessing import (
+    build_model_input, compute_brain_bbox, select_informative_slices, uncrop_predictions
+)
+
+
+def synthetic_case(shape=(240, 240, 155), seed=0):
+    """FLAIR / T1CE synthétiques : ellipsoïde de tissu bruité sur fond nul"""
+    rng = np.random.default_rng(seed)
+    x, y, z = np.ogrid[:shape[0], :shape[1], :shape[2]]
+    brain = ((x - 120) / 65) ** 2 + ((y - 115) / 80) ** 2 + ((z - 70) / 55) ** 2 <= 1
+    return {
+        modality: np.where(brain, rng.random(shape), 0.0)
+        for modality in ("flair", "t1ce")
+    }
+
+
+def load_case(case_dir):
+    """Volumes FLAIR / T1CE normalisés d'un dossier patient"""
+    from test_brain_tumor_segmentationFinal import load_and_preprocess_case
+    _, _, normalized = load_and_preprocess_case(case_dir)
+    return {modality: normalized[modality] for modality in ("flair", "t1ce")}
+
+
+def median_time(fn, runs):
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du recadrage cerveau")
+    parser.add_argument("--case", help="Dossier patient (.nii) ; volume synthétique sinon")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--predict", action="store_true", help="Inclure model.predict (my_model.h5)")
+    args = parser.parse_args()
+
+    print("⏱️ === BENCHMARK RECADRAGE CERVEAU ===")
+    volumes = load_case(args.case) if args.case else synthetic_case()
+
+    bbox_time, bbox = median_time(lambda: compute_brain_bbox(volumes.values()), args.runs)
+    full_time, full_input = median_time(lambda: build_model_input(volumes), args.runs)
+    crop_time, crop_input = median_time(lambda: build_model_input(volumes, bbox), args.runs)
+
+    full_pixels = bbox.original_shape[0] * bbox.original_shape[1]
+    crop_pixels = (bbox.x1 - bbox.x0) * (bbox.y1 - bbox.y0)
+    print(f"📦 Boîte: x[{bbox.x0}:{bbox.x1}] y[{bbox.y0}:{bbox.y1}] z[{bbox.z0}:{bbox.z1}] "
+          f"({crop_pixels / full_pixels:.0%} des pixels par coupe)")
+    print(f"   Prétraitement complet : {full_time * 1000:.1f}ms")
+    print(f"   Prétraitement recadré : {(bbox_time + crop_time) * 1000:.1f}ms "
+          f"(boîte {bbox_time * 1000:.1f}ms) -> x{full_time / (bbox_time + crop_time):.2f}")
+
+    full_slices = select_informative_slices(full_input).informative
+    crop_slices = select_informative_slices(crop_input).informative
+    print(f"   Coupes envoyées au modèle : {full_slices} -> {crop_slices}")
+
+    if args.predict:
+        from services.model_registry import model_registry
+
+        model_registry.get_model()
+        full_predict, _ = median_time(
+            lambda: model_registry.predict(full_input[select_informative_slices(full_input).mask]), args.runs
+        )
+
+        def cropped_pipeline():
+            selection = select_informative_slices(crop_input)
+            predictions = np.zeros(crop_input.shape[:3] + (4,), dtype=np.float32)
+            predictions[..., 0] = 1.0
+            predictions[selection.mask] = model_registry.predict(crop_input[selection.mask])
+            return uncrop_predictions(predictions, bbox)
+
+        crop_predict, _ = median_time(cropped_pipeline, args.runs)
+        print(f"   Inférence complète : {full_predict:.2f}s")
+        print(f"   Inférence recadrée (+ replacement) : {crop_predict:.2f}s -> x{full_predict / crop_predict:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+⏱️ Benchmark des images individuelles par coupe
+Durée et taille sur disque pour N coupes × 6 images (4 modalités, segmentation,
+superposition) : une figure matplotlib 300 dpi par image (avant) / composition
+uint8 et cv2.imencode (après), sur un cas synthétique.
+
+Usage: python benchmark_individual_images.py [--slices 3] [--runs 3] [--size 1024]
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+import tempfile
+
+# Ajouter le répertoire backend au path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import test_brain_tumor_segmentationFinal as final_pipeline
+from config.settings import settings
+from testing_fixtures import make_case
+
+
+def run(renderer, case, slice_indices, runs):
+    """Médiane des durées et taille totale des PNG écrits"""
+    predictions, original_data, normalized_data = case
+    settings.AI_INDIVIDUAL_IMAGE_RENDERER = renderer
+    durations, total_bytes = [], 0
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as output_dir:
+            start = time.perf_counter()
+            final_pipeline.save_individual_images(
+                predictions, slice_indices, original_data, normalized_data, "bench", output_dir
+            )
+            durations.append(time.perf_counter() - start)
+            individual_dir = os.path.join(output_dir, "bench_individual_images")
+            total_bytes = sum(os.path.getsize(os.path.join(individual_dir, f))
+                              for f in os.listdir(individual_dir) if f.endswith(".png"))
+    return statistics.median(durations), total_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des images individuelles")
+    parser.add_argument("--slices", type=int, default=3)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--size", type=int, default=settings.AI_INDIVIDUAL_IMAGE_SIZE,
+                        help="Côté des PNG du rendu opencv (pixels)")
+    args = parser.parse_args()
+
+    settings.AI_INDIVIDUAL_IMAGE_SIZE = args.size
+    case = make_case()
+    slice_indices = list(range(50 - args.slices // 2, 50 - args.slices // 2 + args.slices))
+    num_images = len(slice_indices) * len(final_pipeline.INDIVIDUAL_IMAGE_KINDS)
+
+    print("⏱️ === BENCHMARK IMAGES INDIVIDUELLES ===")
+    results = {renderer: run(renderer, case, slice_indices, args.runs) for renderer in ("matplotlib", "opencv")}
+    for renderer, (duration, total_bytes) in results.items():
+        print(f"   {renderer:<10} {num_images} images: {duration * 1000:8.0f}ms "
+              f"({duration * 1000 / num_images:6.1f}ms/image) | {total_bytes / 1e6:6.1f} Mo")
+    print(f"   Accélération: x{results['matplotlib'][0] / results['opencv'][0]:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+⏱️ Benchmark des backends d'inférence (Keras vs ONNX Runtime)
+Temps de prédiction d'un volume complet (100 coupes 128x128x2) avec my_model.h5
+
+Usage: python benchmark_inference_backends.py [--runs 5] [--threads 0]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+
+import numpy as np
+
+# Ajouter le répertoire backend au path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.settings import settings
+from services.model_compiler import make_reference_batch
+from services.model_registry import ModelRegistry, VOLUME_SLICES, IMG_SIZE
+from services.onnx_backend import OnnxPredictor, export_to_onnx
+
+
+def time_predict(predict, volume: np.ndarray, runs: int) -> list:
+    """Durées successives après une prédiction de préchauffage"""
+    predict(volume)
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        predict(volume)
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Keras vs ONNX Runtime")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=settings.AI_ONNX_INTRA_OP_THREADS,
+                        help="intra_op_num_threads onnxruntime (0 = défaut)")
+    args = parser.parse_args()
+
+    print("⏱️ === BENCHMARK BACKENDS D'INFÉRENCE ===")
+    print(f"📁 Modèle: {settings.AI_MODEL_PATH}")
+
+    keras_model = ModelRegistry()._load_keras_model()
+    volume = make_reference_batch((IMG_SIZE, IMG_SIZE, 2), slices=VOLUME_SLICES)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        onnx_path = export_to_onnx(keras_model, os.path.join(tmp, "my_model.onnx"))
+        onnx_predictor = OnnxPredictor(onnx_path, intra_op_threads=args.threads)
+
+        results = {
+            "keras": time_predict(lambda v: keras_model.predict(v, verbose=0), volume, args.runs),
+            "onnx": time_predict(onnx_predictor.predict, volume, args.runs)
+        }
+
+        agreement = np.mean(
+            np.argmax(keras_model.predict(volume, verbose=0), axis=-1) == np.argmax(onnx_predictor.predict(volume), axis=-1)
+        )
+
+    for backend, durations in results.items():
+        median = statistics.median(durations)
+        print(f"   {backend:>6}: médiane {median:.3f}s / volume ({VOLUME_SLICES / median:.0f} coupes/s)")
+
+    speedup = statistics.median(results["keras"]) / statistics.median(results["onnx"])
+    print(f"🚀 Accélération ONNX: x{speedup:.2f} (accord argmax {agreement:.4f})")
+
+
+if __name__ == "__main__":
+    main()
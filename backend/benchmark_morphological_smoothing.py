@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+⏱️ Benchmark du lissage morphologique des étiquettes
+Durée par volume : trois opérations scipy.ndimage par classe et par coupe (avant)
+/ pile de coupes traitée en un passage cv2 par opération (après), à la résolution
+du modèle (128×128) et à celle du rendu haute qualité (256×256).
+
+Usage: python benchmark_morphological_smoothing.py [--slices 100] [--runs 5]
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+
+import numpy as np
+from scipy import ndimage
+
+# Ajouter le répertoire backend au path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.postprocessing import smooth_labels
+
+
+def smooth_labels_scipy(segmentation):
+    """Ancienne implémentation (une coupe)"""
+    smoothed = np.zeros_like(segmentation)
+    for class_idx in range(1, 4):
+        mask = (segmentation == class_idx)
+        if np.any(mask):
+            closed = ndimage.binary_closing(mask, structure=np.ones((3, 3)))
+            opened = ndimage.binary_opening(closed, structure=np.ones((2, 2)))
+            dilated = ndimage.binary_dilation(opened, structure=np.ones((2, 2)))
+            smoothed[dilated] = class_idx
+    return smoothed
+
+
+def make_labels(num_slices, size, seed=0):
+    """Tumeur ellipsoïdale à trois classes, bruitée, sur num_slices coupes"""
+    rng = np.random.default_rng(seed)
+    z, y, x = np.ogrid[:num_slices, :size, :size]
+    radius = ((z - num_slices / 2) / (num_slices / 4)) ** 2 + ((y - size / 2) / (size / 5)) ** 2 \
+        + ((x - size / 2) / (size / 6)) ** 2
+    labels = np.zeros((num_slices, size, size), dtype=np.uint8)
+    labels[radius <= 1.0] = 2
+    labels[radius <= 0.5] = 3
+    labels[radius <= 0.2] = 1
+    noise = rng.random(labels.shape) < 0.02
+    labels[noise] = rng.integers(0, 4, int(noise.sum()))
+    return labels
+
+
+def median_time(fn, labels, runs):
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn(labels)
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du lissage morphologique")
+    parser.add_argument("--slices", type=int, default=100)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print("⏱️ === BENCHMARK LISSAGE MORPHOLOGIQUE ===")
+    for size in (128, 256):
+        labels = make_labels(args.slices, size)
+        expected = np.stack([smooth_labels_scipy(s) for s in labels])
+        if not np.array_equal(smooth_labels(labels), expected):
+            sys.exit(f"❌ Résultats différents à {size}×{size}")
+
+        before = median_time(lambda v: [smooth_labels_scipy(s) for s in v], labels, args.runs)
+        per_slice = median_time(lambda v: [smooth_labels(s) for s in v], labels, args.runs)
+        stacked = median_time(smooth_labels, labels, args.runs)
+        print(f"   {args.slices} coupes {size}×{size}: scipy par coupe {before * 1000:7.1f}ms | "
+              f"cv2 par coupe {per_slice * 1000:7.1f}ms | cv2 pile {stacked * 1000:7.1f}ms "
+              f"(x{before / stacked:.1f})")
+
+
+if __name__ == "__main__":
+    main()
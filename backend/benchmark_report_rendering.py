@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+⏱️ Benchmark du rendu du rapport médical
+Durée du rendu d'un cas (rapport + images individuelles des coupes représentatives) :
+figure matplotlib unique rendue séquentiellement (avant) / bandes du rapport et
+images rendues en parallèle dans le pool de processus (après).
+
+Usage: python benchmark_report_rendering.py [--workers 4] [--runs 3]
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+import tempfile
+
+# Ajouter le répertoire backend au path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import test_brain_tumor_segmentationFinal as final_pipeline
+import services.render_pool as render_pool_module
+from services.render_pool import RenderPool
+from test_report_rendering import METRICS
+from testing_fixtures import make_case
+
+SLICES = [40, 50, 60]
+
+
+async def run(case, runs):
+    """Médianes des durées séquentielle et parallèle"""
+    predictions, original_data, normalized_data = case
+    sequential, parallel = [], []
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as output_dir:
+            start = time.perf_counter()
+            final_pipeline.render_case(predictions, SLICES, original_data, normalized_data, "bench", METRICS,
+                                       output_dir)
+            sequential.append(time.perf_counter() - start)
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            start = time.perf_counter()
+            await final_pipeline.render_case_parallel(predictions, SLICES, original_data, normalized_data, "bench",
+                                                      METRICS, output_dir)
+            parallel.append(time.perf_counter() - start)
+    return statistics.median(sequential), statistics.median(parallel)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark du rendu du rapport")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    render_pool_module.render_pool = RenderPool(max_workers=args.workers)
+    try:
+        # Démarrage des workers exclu de la mesure (pool partagé par toute l'application)
+        await render_pool_module.render_pool.map([(abs, (-1,))] * args.workers)
+
+        print("⏱️ === BENCHMARK RENDU DU RAPPORT ===")
+        sequential, parallel = await run(make_case(), args.runs)
+        print(f"   {len(SLICES)} coupes - séquentiel: {sequential:6.2f}s | "
+              f"parallèle ({args.workers} processus): {parallel:6.2f}s (x{sequential / parallel:.1f})")
+    finally:
+        render_pool_module.render_pool.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
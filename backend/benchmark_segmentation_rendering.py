@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+⏱️ Benchmark du rendu haute qualité des segmentations
+Durée pour N coupes : étiquettes bicubiques re-seuillées, lissage scipy et boucle
+de coloration (avant) / cartes de classes agrandies et table de couleurs, coupe
+par coupe puis sur toute la pile (après).
+
+Usage: python benchmark_segmentation_rendering.py [--slices 100] [--runs 3]
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+
+# Ajouter le répertoire backend au path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import test_brain_tumor_segmentationFinal as final_pipeline
+from services.segmentation_rendering import render_segmentation
+from test_segmentation_rendering import create_high_quality_segmentation_reference
+from testing_fixtures import make_tumor_labels
+
+
+def median_time(fn, runs):
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du rendu des segmentations")
+    parser.add_argument("--slices", type=int, default=100)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    labels = make_tumor_labels(num_slices=args.slices)
+    lut = final_pipeline.TUMOR_CLASS_LUT
+
+    print("⏱️ === BENCHMARK RENDU DES SEGMENTATIONS ===")
+    previous = median_time(lambda: [create_high_quality_segmentation_reference(s) for s in labels], args.runs)
+    per_slice = median_time(lambda: [final_pipeline.create_high_quality_segmentation(s) for s in labels], args.runs)
+    stacked = median_time(lambda: render_segmentation(labels, lut), args.runs)
+    print(f"   {args.slices} coupes - ancien rendu: {previous * 1000:7.1f}ms | LUT par coupe: {per_slice * 1000:7.1f}ms "
+          f"| LUT pile: {stacked * 1000:7.1f}ms (x{previous / stacked:.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+⏱️ Benchmark de la simulation de segmentation (sans TensorFlow)
+Durée sur un volume complet : version vectorisée face à l'ancienne double boucle
+par pixel, mesurée sur quelques coupes puis extrapolée au volume.
+
+Usage: python benchmark_segmentation_simulation.py [--slices 100] [--loop-slices 2] [--runs 3]
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+
+# Ajouter le répertoire backend au path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.segmentation_simulation import simulate_segmentation_predictions
+from test_segmentation_simulation import make_input, simulate_segmentation_predictions_loop
+
+
+def median_time(fn, data, runs):
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn(data)
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la simulation de segmentation")
+    parser.add_argument("--slices", type=int, default=100)
+    parser.add_argument("--loop-slices", type=int, default=2,
+                        help="Coupes mesurées avec l'ancienne boucle (extrapolées au volume)")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    data = make_input(num_slices=args.slices)
+
+    print("⏱️ === BENCHMARK SIMULATION DE SEGMENTATION ===")
+    vectorized = median_time(simulate_segmentation_predictions, data, args.runs)
+    loop_estimate = median_time(simulate_segmentation_predictions_loop, data[:args.loop_slices], 1) \
+        * args.slices / args.loop_slices
+    print(f"   {args.slices} coupes: vectorisée {vectorized * 1000:8.1f}ms | "
+          f"double boucle ~{loop_estimate * 1000:8.0f}ms (estimée, x{loop_estimate / vectorized:.0f})")
+
+
+if __name__ == "__main__":
+    main()
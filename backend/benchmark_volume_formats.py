@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+⏱️ Benchmark des formats de stockage des volumes
+Lecture de coupes isolées (rendu) et du slab du modèle, à froid et à chaud,
+depuis un .nii.gz d'upload et depuis sa copie de travail .nii non compressée.
+À froid : pages du fichier évincées du cache (posix_fadvise), Linux uniquement.
+
+Usage: python benchmark_volume_formats.py [--file volume.nii.gz] [--runs 5]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+
+import numpy as np
+import nibabel as nib
+
+# Ajouter le répertoire backend au path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.preprocessing import VOLUME_SLICES, VOLUME_START_AT
+from services.volume_reader import create_working_copy, open_volume
+
+RENDERED_SLICES = (25, 50, 75)
+
+
+def write_synthetic_volume(path, shape=(240, 240, 155), seed=0):
+    rng = np.random.default_rng(seed)
+    x, y, z = np.ogrid[:shape[0], :shape[1], :shape[2]]
+    brain = ((x - 120) / 65) ** 2 + ((y - 115) / 80) ** 2 + ((z - 70) / 55) ** 2 <= 1
+    data = np.where(brain, rng.integers(100, 2000, shape), 0).astype(np.int16)
+    nib.save(nib.Nifti1Image(data, np.eye(4)), path)
+
+
+def drop_page_cache(path):
+    """Évince les pages du fichier ; sans effet hors Linux (mesure alors à chaud)"""
+    if not hasattr(os, "posix_fadvise"):
+        return False
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+    return True
+
+
+def read_slices(path):
+    volume = open_volume(path)
+    for slice_idx in RENDERED_SLICES:
+        volume[:, :, slice_idx + VOLUME_START_AT]
+
+
+def read_slab(path):
+    open_volume(path).slab(VOLUME_START_AT, VOLUME_START_AT + VOLUME_SLICES)
+
+
+def median_time(fn, path, runs, cold):
+    durations = []
+    for _ in range(runs):
+        if cold:
+            drop_page_cache(path)
+        start = time.perf_counter()
+        fn(path)
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark .nii.gz / copie de travail .nii")
+    parser.add_argument("--file", help="Volume .nii.gz ; volume synthétique sinon")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print("⏱️ === BENCHMARK FORMATS DE VOLUMES ===")
+    if not hasattr(os, "posix_fadvise"):
+        print("⚠️ posix_fadvise indisponible : les mesures « à froid » sont faites à chaud")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        gz_path = args.file
+        if gz_path is None:
+            gz_path = os.path.join(tmp_dir, "synthetic_flair.nii.gz")
+            write_synthetic_volume(gz_path)
+
+        start = time.perf_counter()
+        working_copy = create_working_copy(gz_path)
+        if working_copy is None:
+            sys.exit("❌ Le fichier doit être un .nii.gz")
+        print(f"   Transcodage : {(time.perf_counter() - start) * 1000:.0f}ms "
+              f"({os.path.getsize(gz_path) / 1e6:.1f} Mo -> {os.path.getsize(working_copy) / 1e6:.1f} Mo)")
+
+        try:
+            for label, fn in (("3 coupes (rendu)", read_slices), (f"slab {VOLUME_SLICES} coupes", read_slab)):
+                for fmt, path in ((".nii.gz", gz_path), (".nii copie", working_copy)):
+                    cold = median_time(fn, path, args.runs, cold=True)
+                    warm = median_time(fn, path, args.runs, cold=False)
+                    print(f"   {label:<18} {fmt:<11}: froid {cold * 1000:7.1f}ms | chaud {warm * 1000:7.1f}ms")
+        finally:
+            if args.file:
+                os.remove(working_copy)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+⏱️ Benchmark de la lecture des volumes NIfTI
+Pic de mémoire (RSS) et durée du prétraitement d'un cas : chargement complet
+get_fdata() float64 des 4 modalités (avant) / lecture paresseuse float32 (après).
+Chaque mode tourne dans un processus séparé, le pic RSS étant propre au processus.
+
+Usage: python benchmark_volume_reader.py [--case dossier_patient]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+
+import numpy as np
+import nibabel as nib
+
+# Ajouter le répertoire backend au path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.preprocessing import VOLUME_START_AT, build_model_input
+from services.volume_reader import normalize_volume, open_volume, peak_rss_mb
+
+MODALITIES = ("flair", "t1", "t1ce", "t2")
+RENDERED_SLICES = (25, 50, 75)  # Coupes lues par le rapport
+
+
+def write_synthetic_case(case_dir, shape=(240, 240, 155), seed=0):
+    """4 modalités synthétiques (int16, comme les volumes BraTS) dans case_dir"""
+    rng = np.random.default_rng(seed)
+    x, y, z = np.ogrid[:shape[0], :shape[1], :shape[2]]
+    brain = ((x - 120) / 65) ** 2 + ((y - 115) / 80) ** 2 + ((z - 70) / 55) ** 2 <= 1
+    for modality in MODALITIES:
+        data = np.where(brain, rng.integers(100, 2000, shape), 0).astype(np.int16)
+        nib.save(nib.Nifti1Image(data, np.eye(4)), os.path.join(case_dir, f"case_{modality}.nii"))
+
+
+def case_paths(case_dir):
+    paths = {}
+    for filename in os.listdir(case_dir):
+        name = filename.lower()
+        for modality in MODALITIES:
+            if name.endswith((f"_{modality}.nii", f"_{modality}.nii.gz")):
+                paths[modality] = os.path.join(case_dir, filename)
+    return paths
+
+
+def run_eager(paths):
+    """Pipeline d'origine : volumes complets float64, normalisation sur tout le volume"""
+    volumes = {modality: nib.load(path).get_fdata() for modality, path in paths.items()}
+    normalized = {}
+    for modality, data in volumes.items():
+        p1, p99 = np.percentile(data[data > 0], [1, 99])
+        normalized[modality] = np.clip((data - p1) / (p99 - p1), 0, 1)
+    X = build_model_input(normalized)
+    for slice_idx in RENDERED_SLICES:
+        for data in volumes.values():
+            data[:, :, slice_idx + VOLUME_START_AT].copy()
+    return X
+
+
+def run_lazy(paths):
+    """Lecture paresseuse : slab FLAIR/T1CE pour le modèle, coupes du rapport pour le reste"""
+    volumes = {modality: open_volume(path) for modality, path in paths.items()}
+    normalized = {modality: normalize_volume(volume) for modality, volume in volumes.items()}
+    X = build_model_input(normalized)
+    for slice_idx in RENDERED_SLICES:
+        for volume in volumes.values():
+            volume[:, :, slice_idx + VOLUME_START_AT]
+    return X
+
+
+def measure(mode, case_dir):
+    paths = case_paths(case_dir)
+    start = time.perf_counter()
+    X = (run_eager if mode == "eager" else run_lazy)(paths)
+    duration = time.perf_counter() - start
+    print(f"{mode} {duration:.3f} {peak_rss_mb() or float('nan'):.1f} {X.dtype}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la lecture des volumes NIfTI")
+    parser.add_argument("--case", help="Dossier patient (.nii) ; cas synthétique sinon")
+    parser.add_argument("--mode", choices=("eager", "lazy"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        measure(args.mode, args.case)
+        return
+
+    print("⏱️ === BENCHMARK LECTURE DES VOLUMES ===")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        case_dir = args.case
+        if case_dir is None:
+            write_synthetic_case(tmp_dir)
+            case_dir = tmp_dir
+
+        for mode, label in (("eager", "get_fdata() float64"), ("lazy", "lecture paresseuse float32")):
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--mode", mode, "--case", case_dir],
+                capture_output=True, text=True, check=True
+            ).stdout.split()
+            _, duration, peak, dtype = output[-4:]
+            print(f"   {label:<28}: {float(duration) * 1000:.0f}ms, pic RSS {float(peak):.0f} Mo (entrée {dtype})")
+
+
+if __name__ == "__main__":
+    main()
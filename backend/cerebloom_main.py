@@ -35,6 +35,14 @@ from routers import (
 )
 from services.auth_service import AuthService
 from services.mlops_service import mlops_service
+from services.model_registry import model_registry
+from services.inference_executor import inference_executor
+from services.render_pool import render_pool
+from services.inference_scheduler import inference_scheduler
+from services.prediction_cache import prediction_cache
+from services.progress_store import progress_store
+from services.input_precompute import input_precomputer
+from services.individual_images import individual_image_store
 from utils.logger import setup_logger
 
 # Configuration
@@ -66,9 +74,22 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.warning(f"⚠️ Impossible de démarrer MLflow UI: {e}")
 
+    # 🧠 IA - Chargement unique du modèle U-Net + warm-up
+    try:
+        await model_registry.initialize()
+        logger.info(
+            f"✅ Modèle U-Net chargé ({model_registry.load_time_seconds:.2f}s) "
+            f"et préchauffé ({model_registry.warmup_time_seconds or 0:.2f}s)"
+        )
+    except Exception as e:
+        logger.warning(f"⚠️ Modèle U-Net non chargé au démarrage: {e}")
+
     yield
 
     logger.info("Arret de CereBloom Backend...")
+    inference_executor.shutdown(wait=False)
+    inference_scheduler.shutdown(wait=False)
+    render_pool.shutdown(wait=False)
 
 # Application FastAPI
 app = FastAPI(
@@ -173,7 +194,15 @@ async def health_check():
                 "auth": "operational",
                 "ai_segmentation": "operational",
                 "file_upload": "operational"
-            }
+            },
+            "ai_model": model_registry.get_status(),
+            "inference_executor": inference_executor.get_status(),
+            "render_pool": render_pool.get_status(),
+            "inference_scheduler": inference_scheduler.get_stats(),
+            "prediction_cache": prediction_cache.get_stats(),
+            "input_precompute": input_precomputer.get_stats(),
+            "individual_images": individual_image_store.get_stats(),
+            "segmentations_in_progress": progress_store.get_stats()
         }
     except Exception as e:
         logger.error(f"Health check failed: {e}")
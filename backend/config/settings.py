@@ -61,6 +61,50 @@ class Settings(BaseSettings):
     AI_MODEL_VERSION: str = "v2.1"
     AI_CONFIDENCE_THRESHOLD: float = 0.7
     AI_PROCESSING_TIMEOUT: int = 300  # 5 minutes
+    AI_MODEL_WARMUP: bool = True  # Prédiction factice au démarrage pour préchauffer le modèle
+    AI_INFERENCE_EXECUTOR: str = "thread"  # "thread" ou "process" pour les étapes lourdes
+    AI_INFERENCE_WORKERS: int = 1  # Nombre de segmentations traitées en parallèle
+    AI_BATCH_MAX_SLICES: int = 200  # Taille max d'un batch predict fusionné (coupes, toutes requêtes confondues)
+    AI_BATCH_MAX_WAIT_MS: float = 50.0  # Attente max d'autres jobs avant de lancer un batch
+    AI_COMPILED_MODEL: bool = False  # Artefact SavedModel (tf.function) mis en cache à la place du .h5 (export + parité au démarrage)
+    AI_COMPILED_MODEL_DIR: str = "models/compiled"
+    AI_XLA_JIT: bool = False  # Compilation XLA de la signature de service
+    AI_PARITY_TOLERANCE: float = 1e-3  # Écart max toléré avec les prédictions Keras d'origine
+    AI_INFERENCE_BACKEND: str = "keras"  # "keras" (TensorFlow) ou "onnx" (onnxruntime CPU)
+    AI_ONNX_OPSET: int = 13
+    AI_ONNX_INTRA_OP_THREADS: int = 0  # 0 = valeur par défaut d'onnxruntime
+    AI_ONNX_INTER_OP_THREADS: int = 1
+    AI_QUANTIZATION_MODE: str = "none"  # "none", "float16" ou "int8" (TFLite)
+    AI_QUANTIZATION_MIN_DICE: float = 0.97  # Dice minimal par classe face au modèle pleine précision
+    AI_QUANTIZATION_REFERENCE_DIR: str = "models/reference_set"  # Volumes prétraités .npy du contrôle
+    AI_TFLITE_THREADS: Optional[int] = None
+    AI_SLICE_FILTER: bool = True  # N'envoyer au modèle que les coupes contenant du tissu
+    AI_SLICE_MIN_INTENSITY: float = 0.01  # Seuil d'intensité normalisée FLAIR/T1CE
+    AI_SLICE_MIN_FOREGROUND: float = 0.001  # Fraction minimale de pixels au-dessus du seuil
+    AI_BRAIN_CROP: bool = False  # Recadrage sur la boîte englobante du cerveau avant redimensionnement
+    AI_BRAIN_CROP_PADDING: int = 8  # Marge autour du cerveau (voxels)
+    AI_PREDICTION_CACHE: bool = True  # Réutiliser les prédictions si modalités, modèle et prétraitement sont inchangés
+    AI_PREDICTION_CACHE_MAX_MB: int = 2048  # Taille max du cache (éviction LRU)
+    AI_PREDICTION_CACHE_PROBABILITIES: bool = False  # Stocker aussi les probabilités (float16) en plus des masques
+    AI_PROGRESS_CHUNK_SLICES: int = 25  # Granularité du compteur de coupes pendant l'inférence
+    SEGMENTATION_PROGRESS_RETENTION_SECONDS: int = 3600  # Durée de conservation en mémoire après la fin
+
+    # Artefact de prédiction (étiquettes uint8 + sidecar JSON)
+    AI_PREDICTION_ARTIFACT_PROBABILITIES: bool = False  # Conserver aussi le softmax en float16
+    AI_PREDICTION_ARTIFACT_COMPRESSED: bool = False  # .npz compressé au lieu de .npy mappables en mémoire
+    AI_LABEL_SMOOTHING: bool = False  # Lissage morphologique des étiquettes du volume avant l'artefact
+    AI_INDIVIDUAL_IMAGE_RENDERER: str = "opencv"  # "opencv" (PNG composés en uint8) ou "matplotlib" (figures)
+    AI_INDIVIDUAL_IMAGE_SIZE: int = 1024  # Côté des PNG individuels (pixels)
+    AI_INDIVIDUAL_IMAGES_ON_DEMAND: bool = True  # PNG individuels rendus au premier accès, hors du job
+    AI_PARALLEL_RENDERING: bool = True  # Panneaux du rapport rendus en parallèle dans le pool de rendu
+    AI_RENDER_WORKERS: int = 4  # Processus du pool de rendu (backend Agg)
+
+    # Pré-calcul de l'entrée du modèle à l'upload (ignoré si AI_BRAIN_CROP)
+    AI_INPUT_PRECOMPUTE: bool = True
+
+    # Simulation sans modèle (CI, tests de charge) : prédictions factices vectorisées
+    AI_SIMULATION_MODE: bool = False  # Le pipeline professionnel simule au lieu d'exiger TensorFlow
+    AI_SIMULATION_SEED: Optional[int] = 0  # None = tirages non reproductibles
 
     # 📧 Configuration Email (pour les rappels)
     SMTP_HOST: Optional[str] = None
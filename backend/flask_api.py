@@ -26,6 +26,10 @@ from flask import Flask, request, jsonify, send_file, render_template_string
 from flask_cors import CORS
 import werkzeug.utils
 
+from services.model_registry import model_registry
+from services.postprocessing import summarize_predictions
+from services.preprocessing import build_model_input
+
 # Définition des constantes
 IMG_SIZE = 128
 VOLUME_SLICES = 100
@@ -60,7 +64,7 @@ app = Flask(__name__)
 # Activer CORS pour toutes les routes
 CORS(app)
 
-# Variable globale pour stocker le modèle chargé
+# Variable globale pour stocker le modèle chargé (instance du registre partagé)
 model = None
 
 # Définition des métriques personnalisées
@@ -112,35 +116,11 @@ def specificity(y_true, y_pred):
     return true_negatives / (possible_negatives + K.epsilon())
 
 def load_model_if_needed():
-    """Charge le modèle s'il n'est pas déjà chargé."""
+    """Récupère le modèle partagé (chargé et préchauffé une seule fois par le registre)."""
     global model
     if model is None:
-        model_path = 'models/my_model.h5'
-
-        # Définir les objets personnalisés
-        custom_objects = {
-            "dice_coef": dice_coef,
-            "precision": precision,
-            "sensitivity": sensitivity,
-            "specificity": specificity,
-            "dice_coef_necrotic": dice_coef_necrotic,
-            "dice_coef_edema": dice_coef_edema,
-            "dice_coef_enhancing": dice_coef_enhancing
-        }
-
         try:
-            # Charger le modèle
-            model = load_model(model_path, custom_objects=custom_objects, compile=False)
-
-            # Compiler le modèle
-            model.compile(
-                loss="categorical_crossentropy",
-                optimizer=tf.keras.optimizers.Adam(learning_rate=0.001),
-                metrics=['accuracy', tf.keras.metrics.MeanIoU(num_classes=4),
-                        dice_coef, precision, sensitivity, specificity,
-                        dice_coef_necrotic, dice_coef_edema, dice_coef_enhancing]
-            )
-            return True
+            model = model_registry.get_model()
         except Exception as e:
             print(f"Erreur lors du chargement du modèle: {str(e)}")
             return False
@@ -149,10 +129,10 @@ def load_model_if_needed():
 def preprocess_nifti_files(flair_path, t1_path, t1ce_path, t2_path):
     """Prétraite les fichiers NIfTI pour la segmentation."""
     # Charger les données NIfTI
-    flair = nib.load(flair_path).get_fdata()
-    t1 = nib.load(t1_path).get_fdata()
-    t1ce = nib.load(t1ce_path).get_fdata()
-    t2 = nib.load(t2_path).get_fdata()
+    flair = nib.load(flair_path).get_fdata(dtype=np.float32)
+    t1 = nib.load(t1_path).get_fdata(dtype=np.float32)
+    t1ce = nib.load(t1ce_path).get_fdata(dtype=np.float32)
+    t2 = nib.load(t2_path).get_fdata(dtype=np.float32)
 
     # Normaliser les données
     scaler = MinMaxScaler()
@@ -161,13 +141,8 @@ def preprocess_nifti_files(flair_path, t1_path, t1ce_path, t2_path):
     t1ce_norm = scaler.fit_transform(t1ce.reshape(-1, t1ce.shape[-1])).reshape(t1ce.shape)
     t2_norm = scaler.fit_transform(t2.reshape(-1, t2.shape[-1])).reshape(t2.shape)
 
-    # Préparer les données pour le modèle
-    X = np.empty((VOLUME_SLICES, IMG_SIZE, IMG_SIZE, 2))
-
-    # Utiliser flair et t1ce comme entrées du modèle
-    for j in range(VOLUME_SLICES):
-        X[j,:,:,0] = cv2.resize(flair_norm[:,:,j+VOLUME_START_AT], (IMG_SIZE, IMG_SIZE))
-        X[j,:,:,1] = cv2.resize(t1ce_norm[:,:,j+VOLUME_START_AT], (IMG_SIZE, IMG_SIZE))
+    # Préparer les données pour le modèle : flair et t1ce comme entrées du modèle
+    X = build_model_input({'flair': flair_norm, 't1ce': t1ce_norm})
 
     return X, flair, t1, t1ce, t2, flair_norm, t1_norm, t1ce_norm, t2_norm
 
@@ -384,14 +359,14 @@ def segment_tumor():
         output_path = generate_segmentation_image(predictions, optimal_slice, original_data, case_id)
 
         # Calculer les statistiques de la tumeur
-        segmentation = np.argmax(predictions, axis=-1)
+        class_voxels = summarize_predictions(predictions).class_voxels
         tumor_stats = {
             "case_id": case_id,
             "optimal_slice": int(optimal_slice),
-            "tumor_volume_pixels": int(np.sum(segmentation > 0)),
-            "necrotic_core_pixels": int(np.sum(segmentation == 1)),
-            "edema_pixels": int(np.sum(segmentation == 2)),
-            "enhancing_pixels": int(np.sum(segmentation == 3)),
+            "tumor_volume_pixels": int(class_voxels[1:].sum()),
+            "necrotic_core_pixels": int(class_voxels[1]),
+            "edema_pixels": int(class_voxels[2]),
+            "enhancing_pixels": int(class_voxels[3]),
         }
 
         # Nettoyer les fichiers temporaires
@@ -8,7 +8,7 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, func, case, delete, cast, String
-from typing import List, Optional, Dict, Any, Tuple
+from typing import List, Optional, Dict, Any, Tuple, Union
 from datetime import datetime
 import logging
 import os
@@ -34,11 +34,6 @@ except ImportError:
     TENSORFLOW_AVAILABLE = False
     print("⚠️ TensorFlow non disponible - Mode simulation activé")
 
-# Constantes du modèle (copiées de loadmodel.py)
-IMG_SIZE = 128
-VOLUME_SLICES = 100
-VOLUME_START_AT = 22
-
 TUMOR_CLASSES = {
     0: {'name': 'Tissu sain', 'abbr': 'Normal', 'color': '#000000', 'alpha': 0.0},
     1: {'name': 'Noyau nécrotique/kystique', 'abbr': 'Necrotic Core', 'color': '#FF0000', 'alpha': 0.8},
@@ -47,8 +42,26 @@ TUMOR_CLASSES = {
 }
 
 from config.database import get_database
+from config.settings import settings
 from services.auth_service import AuthService
 from services.ai_segmentation_service import AISegmentationService
+from services.model_registry import IMG_SIZE, model_registry
+from services.inference_executor import inference_executor
+from services.inference_scheduler import inference_scheduler
+from services.individual_images import individual_image_store
+from services.prediction_cache import prediction_cache
+from services.input_precompute import input_precomputer
+from services.progress_store import TERMINAL_STATUSES, progress_store
+from services.postprocessing import SegmentationSummary, smooth_prediction_labels, summarize_predictions
+from services.segmentation_rendering import class_color_lut
+from services.segmentation_simulation import generate_realistic_segmentation_simulation
+from services.volume_reader import LazyVolume, normalize_volume, open_volume, peak_rss_mb
+from services.prediction_artifacts import (
+    has_prediction_artifact, load_prediction_artifact, save_prediction_artifact, slice_labels
+)
+from services.preprocessing import (
+    VOLUME_START_AT, BrainBoundingBox, build_model_input, compute_brain_bbox, uncrop_predictions
+)
 from models.api_models import (
     AISegmentationCreate, AISegmentationResponse,
     TumorSegmentResponse, BaseResponse, PaginatedResponse, PaginationParams
@@ -62,6 +75,9 @@ router = APIRouter()
 security = HTTPBearer()
 logger = logging.getLogger(__name__)
 
+# Couleurs RGB uint8 des classes, indexées par étiquette
+TUMOR_CLASS_LUT = class_color_lut(TUMOR_CLASSES)
+
 # Dépendance pour récupérer l'utilisateur actuel
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     auth_service = AuthService()
@@ -165,7 +181,7 @@ async def create_segmentation(
             detail="Erreur lors de la création de la segmentation"
         )
 
-@router.get("/status/{segmentation_id}", response_model=AISegmentationResponse)
+@router.get("/status/{segmentation_id}")
 async def get_segmentation_status(
     segmentation_id: str,
     user: User = Depends(get_current_user),
@@ -174,16 +190,15 @@ async def get_segmentation_status(
     """
     📊 Récupère le statut et les résultats d'une segmentation
 
+    Pendant le traitement, la réponse vient du store de progression (étape,
+    pourcentage, coupes traitées) sans relire la ligne AISegmentation complète.
+
     - **segmentation_id**: ID de la segmentation
     """
     try:
-        # Récupération de la segmentation
-        result = await db.execute(
-            select(AISegmentation).where(AISegmentation.id == segmentation_id)
-        )
-        segmentation = result.scalar_one_or_none()
+        progress = await progress_store.get_or_load(segmentation_id, db)
 
-        if not segmentation:
+        if not progress:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Segmentation non trouvée"
@@ -194,11 +209,11 @@ async def get_segmentation_status(
             if user.role == "DOCTOR":
                 # Récupérer le profil médecin depuis la base de données
                 doctor_result = await db.execute(
-                    select(Doctor).where(Doctor.user_id == user.id)
+                    select(Doctor.id).where(Doctor.user_id == user.id)
                 )
-                doctor_profile = doctor_result.scalar_one_or_none()
+                doctor_profile_id = doctor_result.scalar_one_or_none()
 
-                if doctor_profile and segmentation.doctor_id != doctor_profile.id:
+                if doctor_profile_id and progress.doctor_id != doctor_profile_id:
                     raise HTTPException(
                         status_code=status.HTTP_403_FORBIDDEN,
                         detail="Accès refusé à cette segmentation"
@@ -212,7 +227,31 @@ async def get_segmentation_status(
                         detail="Permission insuffisante"
                     )
 
-        return AISegmentationResponse.model_validate(segmentation)
+        if progress.status == "PROCESSING":
+            # Polling pendant le traitement : réponse légère
+            return {
+                "id": segmentation_id,
+                "patient_id": progress.patient_id,
+                "doctor_id": progress.doctor_id,
+                "status": progress.status,
+                "started_at": progress.started_at.isoformat(),
+                "progress": progress.to_dict()
+            }
+
+        # Segmentation terminée : résultats complets (une seule fois, le polling s'arrête)
+        result = await db.execute(
+            select(AISegmentation).where(AISegmentation.id == segmentation_id)
+        )
+        segmentation = result.scalar_one_or_none()
+        if not segmentation:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Segmentation non trouvée"
+            )
+
+        response = AISegmentationResponse.model_validate(segmentation).model_dump(mode="json")
+        response["progress"] = progress.to_dict()
+        return response
 
     except HTTPException:
         raise
@@ -1008,6 +1047,7 @@ async def process_patient_segmentation(
 
         # Lancer le traitement en arrière-plan avec votre modèle professionnel
         logger.info(f"🚀 Lancement tâche de segmentation en arrière-plan pour {segmentation_id}")
+        progress_store.start(segmentation_id, patient_id=patient_id, doctor_id=doctor_id)
         task = asyncio.create_task(
             process_segmentation_with_professional_model(
                 segmentation_id=segmentation_id,
@@ -1033,8 +1073,9 @@ async def process_patient_segmentation(
                 "tensorflow_available": TENSORFLOW_AVAILABLE,
                 "processing_mode": "real" if TENSORFLOW_AVAILABLE else "simulation"
             },
-            "estimated_time": "2-5 minutes",
+            "estimated_time": "Voir la progression via /status",
             "next_steps": {
+                "check_progress": f"/api/v1/segmentation/status/{segmentation_id}",
                 "check_results": f"/api/v1/segmentation/results/{segmentation_id}",
                 "view_visualization": f"/api/v1/segmentation/visualization/{segmentation_id}",
                 "download_files": f"/api/v1/segmentation/download/{segmentation_id}"
@@ -1364,12 +1405,13 @@ async def get_individual_image(
         if not re.match(r'^slice_\d+_(t1|t1ce|t2|flair|segmentation|overlay)\.png$', filename):
             raise HTTPException(status_code=400, detail="Nom de fichier invalide")
 
-        # Chemin vers l'image (généré par test_brain_tumor_segmentationFinal.py)
-        individual_images_dir = os.path.join("uploads/segmentation_results", segmentation_id, f"patient_{segmentation.patient_id}_individual_images")
-        image_path = os.path.join(individual_images_dir, filename)
-
-        # Vérifier que le fichier existe
-        if not os.path.exists(image_path):
+        # Image rendue au premier accès (coupes conservées par le job), puis servie depuis le disque
+        try:
+            image_path = await individual_image_store.get(
+                os.path.join("uploads/segmentation_results", segmentation_id),
+                f"patient_{segmentation.patient_id}", filename
+            )
+        except (FileNotFoundError, ValueError):
             raise HTTPException(status_code=404, detail="Image non trouvée")
 
         # Retourner l'image
@@ -1762,13 +1804,14 @@ async def get_individual_image_temp(segmentation_id: str, filename: str):
         if not re.match(r'^slice_\d+_(t1|t1ce|t2|flair|segmentation|overlay)\.png$', filename):
             raise HTTPException(status_code=400, detail="Nom de fichier invalide")
 
-        # Chemin vers l'image (généré par test_brain_tumor_segmentationFinal.py)
-        individual_images_dir = os.path.join("uploads/segmentation_results", segmentation_id, f"patient_04813c40-0621-4aae-ae7c-e8e7cb0539c3_individual_images")
-        image_path = os.path.join(individual_images_dir, filename)
-
-        # Vérifier que le fichier existe
-        if not os.path.exists(image_path):
-            print(f"❌ TEMP: Image non trouvée - {image_path}")
+        # Image rendue au premier accès (coupes conservées par le job), puis servie depuis le disque
+        try:
+            image_path = await individual_image_store.get(
+                os.path.join("uploads/segmentation_results", segmentation_id),
+                "patient_04813c40-0621-4aae-ae7c-e8e7cb0539c3", filename
+            )
+        except (FileNotFoundError, ValueError):
+            print(f"❌ TEMP: Image non trouvée - {segmentation_id}/{filename}")
             raise HTTPException(status_code=404, detail="Image non trouvée")
 
         print(f"✅ TEMP: Image trouvée - {image_path}")
@@ -2095,8 +2138,10 @@ async def process_segmentation_with_professional_model(
             result = await process_patient_with_professional_model(
                 patient_id=patient_id,
                 output_dir=output_dir,
-                images_by_modality=images_by_modality  # Passer les vraies images
+                images_by_modality=images_by_modality,  # Passer les vraies images
+                progress_id=segmentation_id  # Avancement publié dans progress_store
             )
+            progress_store.set_stage(segmentation_id, "save")
 
             # Récupérer l'enregistrement de segmentation
             result_db = await db.execute(
@@ -2106,6 +2151,7 @@ async def process_segmentation_with_professional_model(
 
             if not segmentation:
                 print(f"❌ Segmentation {segmentation_id} non trouvée")
+                progress_store.finish(segmentation_id, "FAILED", message="Segmentation introuvable")
                 return
 
             if result["success"]:
@@ -2124,7 +2170,7 @@ async def process_segmentation_with_professional_model(
                 }
 
                 segmentation.completed_at = datetime.now()
-                segmentation.processing_time = "2-5 minutes"
+                segmentation.processing_time = format_processing_time(segmentation_id)
                 segmentation.confidence_score = result["metrics"].get("dice_coefficient", 0.87)
 
                 print(f"✅ Résultats sauvegardés - Volume total: {result['metrics'].get('total_tumor_volume_cm3', result['metrics'].get('total_volume', 0))} cm³")
@@ -2192,6 +2238,10 @@ async def process_segmentation_with_professional_model(
                         print(f"⚠️ MLOPS - Erreur enregistrement échec: {mlops_error}")
 
             await db.commit()
+            progress_store.finish(
+                segmentation_id, segmentation.status.value,
+                message=None if result["success"] else result.get("error")
+            )
 
         except Exception as e:
             error_msg = str(e)
@@ -2211,7 +2261,7 @@ async def process_segmentation_with_professional_model(
                         # Utiliser les vrais résultats du modèle qui ont été calculés
                         segmentation.status = SegmentationStatus.COMPLETED
                         segmentation.completed_at = datetime.now()
-                        segmentation.processing_time = "3.2 minutes"
+                        segmentation.processing_time = format_processing_time(segmentation_id)
 
                         # Si on a les résultats du modèle, les utiliser avec structure compatible
                         if result and result.get("success"):
@@ -2242,6 +2292,7 @@ async def process_segmentation_with_professional_model(
                         print(f"✅ Segmentation marquée comme terminée: {segmentation_id}")
                 except Exception as db_error:
                     print(f"❌ Erreur sauvegarde résultats: {db_error}")
+                progress_store.finish(segmentation_id, "COMPLETED")
 
                 return
 
@@ -2258,9 +2309,23 @@ async def process_segmentation_with_professional_model(
                     print(f"❌ Segmentation marquée comme échouée: {segmentation_id}")
             except Exception as db_error:
                 print(f"❌ Erreur mise à jour statut: {db_error}")
+            progress_store.finish(segmentation_id, "FAILED", message=error_msg)
+
+        finally:
+            # Toute sortie (annulation comprise) termine l'avancement : /status ne reste pas en PROCESSING
+            progress = progress_store.get(segmentation_id)
+            if progress is not None and progress.status not in TERMINAL_STATUSES:
+                progress_store.finish(segmentation_id, "FAILED", message="Traitement interrompu")
 
         break  # Sortir de la boucle
 
+def format_processing_time(segmentation_id: str) -> str:
+    """Durée réelle du traitement (format de la colonne processing_time, ex. '2.5 minutes')"""
+    progress = progress_store.get(segmentation_id)
+    if progress is None:
+        return "N/A"
+    return f"{progress.elapsed_seconds / 60:.1f} minutes"
+
 # ================================================================================
 # FONCTION DE TRAITEMENT AVEC LOADMODEL.PY
 # ================================================================================
@@ -2293,25 +2358,75 @@ async def process_segmentation_with_loadmodel(
                 await update_segmentation_status(db_session, segmentation_id, "FAILED", "Erreur chargement images")
                 return
 
-            # Étape 2: Préparation des données selon loadmodel.py
+            modality_paths = {
+                modality: image_obj.file_path for modality, image_obj in images_by_modality.items()
+                if hasattr(image_obj, 'file_path') and Path(image_obj.file_path).exists()
+            }
+            skipped_slices = 0
+            cache_key = None
+            cached = None
+            # Sans fichier du modèle, run_real_segmentation bascule en simulation : ni cache ni hash du modèle
+            model_available = TENSORFLOW_AVAILABLE and Path(model_registry.model_path).exists()
+            if model_available and settings.AI_PREDICTION_CACHE:
+                # Modalités, modèle et prétraitement inchangés : pas de nouvelle inférence.
+                # Clé vérifiée avant le prétraitement : un hit ne refait que le post-traitement
+                cache_key = await prediction_cache.abuild_key(modality_paths)
+                if cache_key is not None:
+                    cached = await prediction_cache.aget(cache_key)
+
+            # Étape 2: Préparation des données selon loadmodel.py (entrée pré-calculée à l'upload si disponible)
             logger.info("Preparation des donnees selon loadmodel.py...")
-            preprocessed_data, original_data, normalized_data = prepare_data_loadmodel_style(images_data)
-
-            # Étape 3: Segmentation avec le modèle
-            logger.info("Execution de la segmentation...")
-            if TENSORFLOW_AVAILABLE:
-                # Vraie segmentation avec TensorFlow
-                predictions = await run_real_segmentation(preprocessed_data)
+            if cached is not None:
+                predictions, skipped_slices = cached
+                # Volumes préparés pour le rendu seulement : ni recadrage, ni entrée du modèle
+                _, original_data, normalized_data, _ = await inference_executor.run(
+                    prepare_data_loadmodel_style, images_data, False
+                )
             else:
-                # Simulation réaliste
-                predictions = generate_realistic_segmentation_simulation(preprocessed_data)
+                precomputed_input = await input_precomputer.aload(modality_paths)
+                preprocessed_data, original_data, normalized_data, brain_bbox = await inference_executor.run(
+                    prepare_data_loadmodel_style, images_data, precomputed_input is None
+                )
+                if precomputed_input is not None:
+                    preprocessed_data = precomputed_input
+
+                # Étape 3: Segmentation avec le modèle
+                logger.info("Execution de la segmentation...")
+                if TENSORFLOW_AVAILABLE:
+                    # Vraie segmentation avec TensorFlow
+                    predictions, skipped_slices = await run_real_segmentation(preprocessed_data)
+                else:
+                    # Simulation réaliste
+                    predictions = await inference_executor.run(
+                        generate_realistic_segmentation_simulation, preprocessed_data
+                    )
+
+                if brain_bbox is not None:
+                    # Retour dans la grille du volume complet pour les volumes et le rendu
+                    predictions = await inference_executor.run(uncrop_predictions, predictions, brain_bbox)
+
+                if cache_key is not None and skipped_slices is not None:
+                    await prediction_cache.aput(cache_key, predictions, skipped_slices)
+
+            if settings.AI_LABEL_SMOOTHING:
+                # Lissage morphologique de toute la pile d'étiquettes (le cache garde les prédictions brutes)
+                predictions = await inference_executor.run(smooth_prediction_labels, predictions)
+
+            # Artefact compact relu en mémoire mappée : la suite travaille sur les étiquettes uint8
+            await inference_executor.run(
+                save_prediction_artifact, output_dir, predictions, VOLUME_START_AT,
+                prediction_cache.file_hash(model_registry.model_path)
+                if model_available and skipped_slices is not None else None
+            )
+            predictions = load_prediction_artifact(output_dir).labels
 
             # Étape 4: Calcul des métriques selon loadmodel.py
             logger.info("Calcul des metriques tumorales...")
-            metrics = calculate_tumor_metrics_loadmodel(predictions)
+            summary = summarize_predictions(predictions)
+            metrics = calculate_tumor_metrics_loadmodel(summary)
 
             # Étape 5: Sélection des coupes représentatives
-            representative_slices = find_representative_slices_loadmodel(predictions, num_slices=3)
+            representative_slices = find_representative_slices_loadmodel(summary, num_slices=3)
 
             # Étape 6: Génération du rapport médical haute qualité
             logger.info("Generation du rapport medical...")
@@ -2345,11 +2460,15 @@ async def process_segmentation_with_loadmodel(
                     "report_path": str(report_path),
                     "output_directory": str(output_dir),
                     "representative_slices": representative_slices,
+                    "skipped_slices": skipped_slices,
                     "processing_mode": "real" if TENSORFLOW_AVAILABLE else "simulation"
                 }
             )
 
             logger.info(f"Segmentation terminee avec succes - ID: {segmentation_id}")
+            peak_rss = peak_rss_mb()
+            if peak_rss is not None:
+                logger.info(f"Pic memoire du processus: {peak_rss:.0f} Mo")
 
         except Exception as e:
             logger.error(f"Erreur lors de la segmentation {segmentation_id}: {e}")
@@ -2358,16 +2477,16 @@ async def process_segmentation_with_loadmodel(
         # Sortir de la boucle après le premier traitement
         break
 
-async def load_patient_images_for_segmentation(images_by_modality: Dict[str, Any]) -> Optional[Dict[str, np.ndarray]]:
-    """Charge les images du patient pour la segmentation"""
+async def load_patient_images_for_segmentation(images_by_modality: Dict[str, Any]) -> Optional[Dict[str, LazyVolume]]:
+    """Ouvre les images du patient pour la segmentation (lecture paresseuse, voir volume_reader)"""
     try:
         images_data = {}
 
         for modality, image_obj in images_by_modality.items():
             if hasattr(image_obj, 'file_path') and Path(image_obj.file_path).exists():
-                # Charger l'image NIfTI
-                nii_img = nib.load(image_obj.file_path)
-                images_data[modality] = nii_img.get_fdata()
+                # Ouvrir l'image NIfTI sans la charger : les coupes sont lues à la demande,
+                # avec les percentiles de normalisation calculés à l'upload
+                images_data[modality] = open_volume(image_obj.file_path, getattr(image_obj, 'image_metadata', None))
                 logger.info(f"✓ {modality}: {images_data[modality].shape}")
             else:
                 logger.warning(f"⚠️ Image manquante pour {modality}")
@@ -2383,8 +2502,14 @@ async def load_patient_images_for_segmentation(images_by_modality: Dict[str, Any
         logger.error(f"Erreur chargement images: {e}")
         return None
 
-def prepare_data_loadmodel_style(images_data: Dict[str, np.ndarray]) -> Tuple[np.ndarray, Dict, Dict]:
-    """Prépare les données selon le style de loadmodel.py"""
+def prepare_data_loadmodel_style(
+    images_data: Dict[str, LazyVolume],
+    build_input: bool = True
+) -> Tuple[Optional[np.ndarray], Dict, Dict, Optional[BrainBoundingBox]]:
+    """
+    Prépare les données selon le style de loadmodel.py (+ boîte englobante si AI_BRAIN_CROP).
+    build_input=False : entrée du modèle déjà pré-calculée, seuls les volumes sont préparés.
+    """
     try:
         # Simulation des données originales avec métadonnées
         original_data = {}
@@ -2395,107 +2520,59 @@ def prepare_data_loadmodel_style(images_data: Dict[str, np.ndarray]) -> Tuple[np
                 'affine': None   # Simulation
             }
 
-        # Normalisation selon loadmodel.py
-        normalized_data = {}
-        for modality, data in images_data.items():
-            # Normalisation robuste (percentile-based)
-            p1, p99 = np.percentile(data[data > 0], [1, 99])
-            normalized = np.clip((data - p1) / (p99 - p1), 0, 1)
-            normalized_data[modality.lower()] = normalized
+        # Normalisation selon loadmodel.py (percentile-based), appliquée aux seules coupes lues
+        normalized_data = {modality.lower(): normalize_volume(data) for modality, data in images_data.items()}
 
-        # Préparation pour le modèle (FLAIR + T1CE selon loadmodel.py)
-        X = np.empty((VOLUME_SLICES, IMG_SIZE, IMG_SIZE, 2))
+        if not build_input:
+            return None, original_data, normalized_data, None
 
-        for slice_idx in range(VOLUME_SLICES):
-            z_idx = slice_idx + VOLUME_START_AT
-            if z_idx < normalized_data['flair'].shape[2]:
-                X[slice_idx, :, :, 0] = cv2.resize(normalized_data['flair'][:, :, z_idx], (IMG_SIZE, IMG_SIZE))
-                X[slice_idx, :, :, 1] = cv2.resize(normalized_data['t1ce'][:, :, z_idx], (IMG_SIZE, IMG_SIZE))
-            else:
-                X[slice_idx, :, :, 0] = np.zeros((IMG_SIZE, IMG_SIZE))
-                X[slice_idx, :, :, 1] = np.zeros((IMG_SIZE, IMG_SIZE))
+        # Boîte englobante du cerveau calculée une fois sur toutes les modalités
+        bbox = compute_brain_bbox(images_data.values()) if settings.AI_BRAIN_CROP else None
+
+        # Préparation pour le modèle (FLAIR + T1CE selon loadmodel.py)
+        X = build_model_input(normalized_data, bbox)
 
         logger.info(f"✅ Données préparées selon loadmodel.py: {X.shape}")
-        return X, original_data, normalized_data
+        return X, original_data, normalized_data, bbox
 
     except Exception as e:
         logger.error(f"Erreur préparation données: {e}")
         raise
 
-async def run_real_segmentation(preprocessed_data: np.ndarray) -> np.ndarray:
-    """Exécute la vraie segmentation avec TensorFlow"""
+async def run_real_segmentation(preprocessed_data: np.ndarray) -> Tuple[np.ndarray, Optional[int]]:
+    """
+    Exécute la vraie segmentation avec TensorFlow.
+    Retourne (prédictions, coupes vides ignorées) ; None à la place du nombre de coupes
+    si la simulation de repli a été utilisée (résultat à ne pas mettre en cache).
+    """
     try:
-        model_path = "models/my_model.h5"  # Chemin vers votre modèle
-
-        if Path(model_path).exists():
-            # Charger le modèle avec les métriques personnalisées
-            custom_objects = {
-                'dice_coef': dice_coef_metric,
-                'precision': precision_metric,
-                'sensitivity': sensitivity_metric,
-                'specificity': specificity_metric,
-                'dice_coef_necrotic': dice_coef_necrotic_metric,
-                'dice_coef_edema': dice_coef_edema_metric,
-                'dice_coef_enhancing': dice_coef_enhancing_metric
-            }
-
-            model = tf.keras.models.load_model(model_path, custom_objects=custom_objects, compile=False)
-            predictions = model.predict(preprocessed_data, verbose=0)
-            logger.info("✅ Segmentation réelle terminée")
-            return predictions
+        if Path(model_registry.model_path).exists():
+            # Modèle partagé : chargé et préchauffé une seule fois au démarrage
+            predictions, selection = await inference_scheduler.predict_volume(preprocessed_data)
+            logger.info(f"✅ Segmentation réelle terminée ({selection.skipped} coupes vides ignorées)")
+            return predictions, selection.skipped
         else:
-            logger.warning(f"⚠️ Modèle non trouvé: {model_path} - Utilisation simulation")
-            return generate_realistic_segmentation_simulation(preprocessed_data)
+            logger.warning(f"⚠️ Modèle non trouvé: {model_registry.model_path} - Utilisation simulation")
+            return generate_realistic_segmentation_simulation(preprocessed_data), None
 
     except Exception as e:
         logger.error(f"Erreur segmentation réelle: {e}")
-        return generate_realistic_segmentation_simulation(preprocessed_data)
-
-def generate_realistic_segmentation_simulation(preprocessed_data: np.ndarray) -> np.ndarray:
-    """Génère une simulation réaliste de segmentation"""
-    try:
-        # Simulation basée sur les données réelles
-        predictions = np.random.rand(VOLUME_SLICES, IMG_SIZE, IMG_SIZE, 4)
-
-        # Rendre la simulation plus réaliste
-        for i in range(VOLUME_SLICES):
-            # Créer des régions tumorales cohérentes
-            center_x, center_y = IMG_SIZE // 2, IMG_SIZE // 2
-            radius = np.random.randint(10, 30)
-
-            y, x = np.ogrid[:IMG_SIZE, :IMG_SIZE]
-            mask = (x - center_x)**2 + (y - center_y)**2 <= radius**2
-
-            # Classe 0: Fond
-            predictions[i, :, :, 0] = 0.9
-            predictions[i, mask, 0] = 0.1
-
-            # Classes tumorales
-            predictions[i, mask, 1] = 0.3  # Nécrotique
-            predictions[i, mask, 2] = 0.4  # Œdème
-            predictions[i, mask, 3] = 0.2  # Rehaussé
-
-        logger.info("✅ Simulation de segmentation générée")
-        return predictions
+        return generate_realistic_segmentation_simulation(preprocessed_data), None
 
-    except Exception as e:
-        logger.error(f"Erreur simulation: {e}")
-        raise
-
-def calculate_tumor_metrics_loadmodel(predictions: np.ndarray) -> Dict[str, Any]:
+def calculate_tumor_metrics_loadmodel(predictions: Union[np.ndarray, SegmentationSummary]) -> Dict[str, Any]:
     """Calcule les métriques selon loadmodel.py"""
     try:
-        # Conversion en segmentation discrète
-        segmentation = np.argmax(predictions, axis=-1)
+        # Volumes dérivés de l'histogramme des classes (un seul argmax)
+        summary = summarize_predictions(predictions)
+        class_voxels = summary.class_voxels
 
         metrics = {}
         voxel_volume = 0.001  # 1mm³ = 0.001 cm³
 
         for class_idx in range(1, 4):  # Exclure le fond
             class_info = TUMOR_CLASSES[class_idx]
-            mask = (segmentation == class_idx)
 
-            volume_voxels = np.sum(mask)
+            volume_voxels = class_voxels[class_idx]
             volume_mm3 = volume_voxels * 1000  # Conversion
             volume_cm3 = volume_mm3 / 1000.0
 
@@ -2503,12 +2580,11 @@ def calculate_tumor_metrics_loadmodel(predictions: np.ndarray) -> Dict[str, Any]
                 'voxels': int(volume_voxels),
                 'mm3': float(volume_mm3),
                 'cm3': float(volume_cm3),
-                'percentage': float(volume_voxels / segmentation.size * 100)
+                'percentage': float(volume_voxels / summary.labels.size * 100)
             }
 
         # Calcul du volume tumoral total
-        total_tumor_mask = segmentation > 0
-        total_volume = np.sum(total_tumor_mask) * voxel_volume
+        total_volume = summary.tumor_voxels * voxel_volume
         metrics['total_tumor_volume_cm3'] = float(total_volume)
 
         return metrics
@@ -2517,45 +2593,12 @@ def calculate_tumor_metrics_loadmodel(predictions: np.ndarray) -> Dict[str, Any]
         logger.error(f"Erreur calcul métriques: {e}")
         return {"total_tumor_volume_cm3": 0.0}
 
-def find_representative_slices_loadmodel(predictions: np.ndarray, num_slices: int = 3) -> List[int]:
+def find_representative_slices_loadmodel(predictions: Union[np.ndarray, SegmentationSummary],
+                                         num_slices: int = 3) -> List[int]:
     """Sélectionne les coupes représentatives selon loadmodel.py"""
     try:
-        slice_scores = []
-
-        for i in range(predictions.shape[0]):
-            seg = np.argmax(predictions[i], axis=-1)
-
-            # Score basé sur la présence de différentes classes tumorales
-            classes_present = len(np.unique(seg[seg > 0]))
-            tumor_coverage = np.sum(seg > 0) / seg.size
-
-            # Préférence pour les coupes avec tumeur enhancing (classe 3)
-            enhancing_presence = np.sum(seg == 3) / seg.size
-
-            score = classes_present * 2 + tumor_coverage + enhancing_presence * 3
-            slice_scores.append(score)
-
-        # Sélection des meilleures coupes espacées
-        slice_scores = np.array(slice_scores)
-        selected_slices = []
-
-        # Première coupe: meilleur score global
-        best_idx = np.argmax(slice_scores)
-        selected_slices.append(best_idx)
-
-        # Coupes suivantes: meilleur score avec distance minimale
-        for _ in range(num_slices - 1):
-            remaining_scores = slice_scores.copy()
-
-            # Pénaliser les coupes trop proches des déjà sélectionnées
-            for selected in selected_slices:
-                distance_penalty = np.exp(-0.1 * np.abs(np.arange(len(remaining_scores)) - selected))
-                remaining_scores *= (1 - 0.7 * distance_penalty)
-
-            next_best = np.argmax(remaining_scores)
-            selected_slices.append(next_best)
-
-        return sorted(selected_slices)
+        # Score par coupe lu dans l'histogramme des classes par coupe
+        return summarize_predictions(predictions).representative_slices(num_slices)
 
     except Exception as e:
         logger.error(f"Erreur sélection coupes: {e}")
@@ -2608,15 +2651,8 @@ async def create_professional_visualization_loadmodel(
                 axes[row_idx, col].axis('off')
 
             # Segmentation
-            segmentation = np.argmax(predictions[slice_idx], axis=-1)
-            seg_colored = np.zeros((IMG_SIZE, IMG_SIZE, 3))
-
-            for class_idx in range(1, 4):
-                mask = segmentation == class_idx
-                if np.any(mask):
-                    color_hex = TUMOR_CLASSES[class_idx]['color']
-                    color_rgb = np.array([int(color_hex[i:i+2], 16) for i in (1, 3, 5)]) / 255.0
-                    seg_colored[mask] = color_rgb
+            segmentation = slice_labels(predictions, slice_idx)
+            seg_colored = TUMOR_CLASS_LUT[segmentation]  # RGB uint8 par table de correspondance
 
             axes[row_idx, 4].imshow(seg_colored)
             axes[row_idx, 4].axis('off')
@@ -2661,15 +2697,9 @@ async def save_segmentation_outputs(
 ):
     """Sauvegarde tous les fichiers de sortie"""
     try:
-        # 1. Sauvegarder les masques de segmentation
-        segmentation_discrete = np.argmax(predictions, axis=-1)
-
-        # Créer un fichier NIfTI simulé
-        nifti_path = output_dir / f"segmentation_{segmentation_id}.txt"
-        with open(nifti_path, 'w') as f:
-            f.write(f"Masque de segmentation - ID: {segmentation_id}\n")
-            f.write(f"Forme: {segmentation_discrete.shape}\n")
-            f.write(f"Classes détectées: {np.unique(segmentation_discrete)}\n")
+        # 1. Sauvegarder les masques de segmentation (étiquettes uint8 + sidecar JSON)
+        if not has_prediction_artifact(output_dir):
+            await inference_executor.run(save_prediction_artifact, output_dir, predictions, VOLUME_START_AT)
 
         # 2. Générer le rapport médical complet IDENTIQUE à backend.py
         print("🎨 Génération du rapport médical complet (format backend.py)...")
@@ -2743,25 +2773,3 @@ async def update_segmentation_status(
 
     except Exception as e:
         logger.error(f"Erreur mise à jour statut: {e}")
-
-# Métriques pour le modèle (versions simplifiées)
-def dice_coef_metric(y_true, y_pred, smooth=1.0):
-    return 0.85
-
-def precision_metric(y_true, y_pred):
-    return 0.82
-
-def sensitivity_metric(y_true, y_pred):
-    return 0.88
-
-def specificity_metric(y_true, y_pred):
-    return 0.91
-
-def dice_coef_necrotic_metric(y_true, y_pred):
-    return 0.79
-
-def dice_coef_edema_metric(y_true, y_pred):
-    return 0.83
-
-def dice_coef_enhancing_metric(y_true, y_pred):
-    return 0.86
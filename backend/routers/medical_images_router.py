@@ -7,10 +7,11 @@ from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File,
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import List, Optional
+from typing import Dict, List, Optional
 import logging
 import os
 import uuid
+import asyncio
 import aiofiles
 from pathlib import Path
 from datetime import datetime
@@ -19,11 +20,18 @@ from config.database import get_database
 from services.auth_service import AuthService
 from models.api_models import BaseResponse, MedicalImageCreate, MedicalImageResponse
 from models.database_models import User, MedicalImage
+from services.input_precompute import input_precomputer
+from services.volume_reader import (
+    INTENSITY_STATS_KEY, WORKING_COPY_KEY, compute_file_intensity_stats, create_working_copy
+)
 
 router = APIRouter()
 security = HTTPBearer()
 logger = logging.getLogger(__name__)
 
+# Tâches de préparation des uploads en cours (référence gardée jusqu'à leur fin)
+_preparation_tasks = set()
+
 # Dépendance pour récupérer l'utilisateur actuel
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     auth_service = AuthService()
@@ -138,6 +146,59 @@ async def get_medical_image(
             detail="Erreur interne du serveur"
         )
 
+async def prepare_uploaded_images(patient_id: str, uploaded_files: Dict[str, str]):
+    """
+    Tâche de fond lancée après l'upload :
+    1. copie de travail non compressée des .nii.gz (les lectures utilisent l'original tant
+       qu'elle n'est pas enregistrée dans image_metadata)
+    2. percentiles de normalisation de chaque image, enregistrés dans image_metadata
+       (une segmentation lancée avant la fin calcule ses bornes au premier accès)
+    3. pré-calcul de l'entrée du modèle (FLAIR + T1CE les plus récents du patient)
+    """
+    loop = asyncio.get_running_loop()
+    updates = {}  # ID de l'image -> entrées ajoutées à image_metadata
+    for image_id, file_path in uploaded_files.items():
+        updates[image_id] = {}
+        read_path = file_path
+        try:
+            working_copy = await loop.run_in_executor(None, create_working_copy, file_path)
+            if working_copy:
+                updates[image_id][WORKING_COPY_KEY] = read_path = working_copy
+        except Exception as e:
+            logger.warning(f"⚠️ Copie de travail non créée pour {file_path}: {e}")
+        try:
+            updates[image_id][INTENSITY_STATS_KEY] = await loop.run_in_executor(
+                None, compute_file_intensity_stats, read_path
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Statistiques d'intensité non calculées pour {read_path}: {e}")
+    updates = {image_id: entries for image_id, entries in updates.items() if entries}
+
+    async for db in get_database():
+        try:
+            if updates:
+                result = await db.execute(select(MedicalImage).where(MedicalImage.id.in_(list(updates))))
+                for image in result.scalars().all():
+                    # Nouveau dictionnaire : la colonne JSON est marquée comme modifiée
+                    image.image_metadata = {**(image.image_metadata or {}), **updates[image.id]}
+                await db.commit()
+                logger.info(f"📊 Copies de travail et statistiques enregistrées pour {len(updates)} image(s)")
+
+            result = await db.execute(
+                select(MedicalImage)
+                .where(MedicalImage.patient_id == patient_id, MedicalImage.modality.in_(["FLAIR", "T1CE"]))
+                .order_by(MedicalImage.uploaded_at)
+            )
+            latest = {img.modality: img for img in result.scalars().all()}
+            input_precomputer.schedule(
+                {modality: img.file_path for modality, img in latest.items()},
+                {modality: img.image_metadata for modality, img in latest.items()}
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Préparation des images uploadées incomplète: {e}")
+        break
+
+
 @router.post("/upload-modalities")
 async def upload_medical_modalities(
     patient_id: str = Form(..., description="ID du patient"),
@@ -200,6 +261,7 @@ async def upload_medical_modalities(
         # Générer un ID unique pour cette série d'images
         series_id = str(uuid.uuid4())
         uploaded_images = []
+        uploaded_files = {}  # ID de l'image -> fichier préparé en tâche de fond
 
         # Traiter chaque fichier
         for modality, file in valid_files.items():
@@ -228,20 +290,24 @@ async def upload_medical_modalities(
                     detail=f"Erreur lors de la sauvegarde du fichier {modality}: {str(e)}"
                 )
 
+            image_metadata = {
+                "series_id": series_id,
+                "original_filename": file.filename,
+                "content_type": file.content_type
+            }
+
             # Créer l'entrée en base de données
+            image_id = str(uuid.uuid4())
+            uploaded_files[image_id] = str(file_path)
             medical_image = MedicalImage(
-                id=str(uuid.uuid4()),
+                id=image_id,
                 patient_id=patient_id,
                 uploaded_by_user_id=current_user.id,
                 modality=modality,
                 file_path=str(file_path),
                 file_name=safe_filename,
                 file_size=len(content),
-                image_metadata={
-                    "series_id": series_id,
-                    "original_filename": file.filename,
-                    "content_type": file.content_type
-                },
+                image_metadata=image_metadata,
                 acquisition_date=datetime.strptime(acquisition_date, "%Y-%m-%d").date() if acquisition_date else None,
                 body_part="BRAIN",
                 notes=notes,
@@ -261,6 +327,12 @@ async def upload_medical_modalities(
 
         logger.info(f"Images médicales uploadées par {current_user.email} pour patient {patient_id}: {list(valid_files.keys())}")
 
+        # Copies de travail, statistiques d'intensité puis pré-calcul de l'entrée du modèle
+        # en tâche de fond : la réponse n'attend ni la décompression ni la lecture des volumes
+        task = asyncio.create_task(prepare_uploaded_images(patient_id, uploaded_files))
+        _preparation_tasks.add(task)
+        task.add_done_callback(_preparation_tasks.discard)
+
         return {
             "success": True,
             "message": f"✅ {len(uploaded_images)} modalité(s) uploadée(s) avec succès",
@@ -268,7 +340,8 @@ async def upload_medical_modalities(
             "patient_id": patient_id,
             "uploaded_modalities": uploaded_images,
             "total_size_mb": round(sum(img["size_mb"] for img in uploaded_images), 2),
-            "ready_for_segmentation": len(uploaded_images) >= 2  # Au moins 2 modalités pour la segmentation
+            "ready_for_segmentation": len(uploaded_images) >= 2,  # Au moins 2 modalités pour la segmentation
+            "background_preparation_scheduled": True
         }
 
     except HTTPException:
@@ -550,12 +623,15 @@ async def delete_image_series(
         # Supprimer les fichiers physiques et les entrées en base
         for image in images:
             try:
-                # Supprimer le fichier physique
+                # Supprimer le fichier physique (et sa copie de travail non compressée)
                 file_path = Path(image.file_path)
                 if file_path.exists():
                     file_path.unlink()
                     logger.info(f"Fichier supprimé: {file_path}")
                     deleted_files.append(str(file_path))
+                working_copy = (image.image_metadata or {}).get(WORKING_COPY_KEY)
+                if working_copy and Path(working_copy).exists():
+                    Path(working_copy).unlink()
 
                 deleted_modalities.append({
                     "modality": image.modality,
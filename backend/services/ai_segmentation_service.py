@@ -28,7 +28,6 @@ except ImportError:
                     return 1e-7
     tf = MockTF()
 
-import cv2
 try:
     from sklearn.preprocessing import MinMaxScaler
 except ImportError:
@@ -51,14 +50,13 @@ from models.database_models import (
     SegmentationStatus, TumorType
 )
 from services.mlops_service import mlops_service
+from services.model_registry import model_registry
+from services.preprocessing import VOLUME_START_AT, build_model_input
+from services.region_analysis import analyze_regions, sample_modalities
+from services.volume_reader import LazyVolume, normalize_volume, open_volume
 
 logger = logging.getLogger(__name__)
 
-# Configuration du modèle (importée de loadmodel.py)
-IMG_SIZE = 128
-VOLUME_SLICES = 100
-VOLUME_START_AT = 22
-
 # Classification médicale des régions tumorales selon BraTS
 TUMOR_CLASSES = {
     0: {'name': 'Tissu sain', 'abbr': 'Normal', 'color': '#000000', 'alpha': 0.0},
@@ -78,46 +76,23 @@ class AISegmentationService:
         self.model = None
         self.executor = ThreadPoolExecutor(max_workers=2)
 
-        # Métriques personnalisées pour votre modèle
-        self.custom_objects = {
-            'dice_coef': self.dice_coef,
-            'precision': self.precision,
-            'sensitivity': self.sensitivity,
-            'specificity': self.specificity,
-            'dice_coef_necrotic': self.dice_coef_necrotic,
-            'dice_coef_edema': self.dice_coef_edema,
-            'dice_coef_enhancing': self.dice_coef_enhancing
-        }
-
     async def load_model(self):
-        """Charge votre modèle U-Net Kaggle"""
+        """Récupère votre modèle U-Net Kaggle depuis le registre partagé"""
         try:
             if self.model is None:
-                logger.info(f"Chargement du modèle: {self.model_path}")
-
-                # Chargement asynchrone du modèle
+                # Le registre ne charge le modèle qu'une fois par processus
                 loop = asyncio.get_event_loop()
                 self.model = await loop.run_in_executor(
                     self.executor,
-                    self._load_model_sync
+                    model_registry.get_model
                 )
 
-                logger.info("✅ Modèle U-Net chargé avec succès")
-
             return self.model
 
         except Exception as e:
             logger.error(f"❌ Erreur lors du chargement du modèle: {e}")
             raise
 
-    def _load_model_sync(self):
-        """Charge le modèle de manière synchrone"""
-        return tf.keras.models.load_model(
-            self.model_path,
-            custom_objects=self.custom_objects,
-            compile=False
-        )
-
     async def create_segmentation(
         self,
         patient_id: str,
@@ -209,7 +184,7 @@ class AISegmentationService:
 
                 # Calcul des volumes et analyse
                 volume_analysis = await self._calculate_volumes(segmentation_result)
-                tumor_segments = await self._extract_tumor_segments(segmentation_result, volume_analysis)
+                tumor_segments = await self._extract_tumor_segments(segmentation_result, volume_analysis, images_data)
 
                 # Calcul du temps de traitement
                 processing_time_seconds = (datetime.utcnow() - start_time).total_seconds()
@@ -275,7 +250,7 @@ class AISegmentationService:
                 await self._update_segmentation_status(db, segmentation_id, SegmentationStatus.FAILED)
                 await db.rollback()
 
-    async def _load_image_series(self, db: AsyncSession, image_series_id: str) -> Optional[Dict[str, np.ndarray]]:
+    async def _load_image_series(self, db: AsyncSession, image_series_id: str) -> Optional[Dict[str, LazyVolume]]:
         """Charge une série d'images médicales"""
         try:
             # Récupération de la série d'images
@@ -302,9 +277,8 @@ class AISegmentationService:
                 image = result.scalar_one_or_none()
 
                 if image:
-                    # Chargement de l'image NIfTI
-                    img_data = nib.load(image.file_path).get_fdata()
-                    images_data[image.modality.value] = img_data
+                    # Ouverture paresseuse de l'image NIfTI (coupes lues à la demande)
+                    images_data[image.modality.value] = open_volume(image.file_path, image.image_metadata)
 
             # Vérification que nous avons les 4 modalités requises
             required_modalities = ["T1", "T1CE", "T2", "FLAIR"]
@@ -319,7 +293,7 @@ class AISegmentationService:
             logger.error(f"Erreur lors du chargement des images: {e}")
             return None
 
-    async def _prepare_input_data(self, images_data: Dict[str, np.ndarray]) -> np.ndarray:
+    async def _prepare_input_data(self, images_data: Dict[str, LazyVolume]) -> np.ndarray:
         """
         Prépare les données d'entrée pour votre modèle U-Net selon loadmodel.py
         """
@@ -333,26 +307,14 @@ class AISegmentationService:
             logger.info(f"Formes originales - T1: {t1.shape}, T1CE: {t1ce.shape}, T2: {t2.shape}, FLAIR: {flair.shape}")
 
             # Normalisation standardisée (percentile-based pour éviter les outliers)
-            normalized_data = {}
-            for modality, data in [('t1', t1), ('t1ce', t1ce), ('t2', t2), ('flair', flair)]:
-                # Normalisation robuste
-                p1, p99 = np.percentile(data[data > 0], [1, 99])
-                normalized = np.clip((data - p1) / (p99 - p1), 0, 1)
-                normalized_data[modality] = normalized
+            normalized_data = {
+                modality: normalize_volume(data)
+                for modality, data in [('t1', t1), ('t1ce', t1ce), ('t2', t2), ('flair', flair)]
+            }
 
             # Préparation pour le modèle (FLAIR + T1CE comme entrées principales selon loadmodel.py)
-            X = np.empty((VOLUME_SLICES, IMG_SIZE, IMG_SIZE, 2))
-
-            for slice_idx in range(VOLUME_SLICES):
-                z_idx = slice_idx + VOLUME_START_AT
-                # Vérifier que l'index est dans les limites
-                if z_idx < normalized_data['flair'].shape[2]:
-                    X[slice_idx, :, :, 0] = cv2.resize(normalized_data['flair'][:, :, z_idx], (IMG_SIZE, IMG_SIZE))
-                    X[slice_idx, :, :, 1] = cv2.resize(normalized_data['t1ce'][:, :, z_idx], (IMG_SIZE, IMG_SIZE))
-                else:
-                    # Remplir avec des zéros si on dépasse les limites
-                    X[slice_idx, :, :, 0] = np.zeros((IMG_SIZE, IMG_SIZE))
-                    X[slice_idx, :, :, 1] = np.zeros((IMG_SIZE, IMG_SIZE))
+            # Coupes hors volume remplies de zéros
+            X = build_model_input(normalized_data)
 
             logger.info(f"✅ Données d'entrée préparées selon loadmodel.py: {X.shape}")
             return X
@@ -383,66 +345,6 @@ class AISegmentationService:
             logger.error(f"Erreur lors de la segmentation: {e}")
             raise
 
-    # Métriques personnalisées pour votre modèle Kaggle (selon loadmodel.py)
-    @staticmethod
-    def dice_coef(y_true, y_pred, smooth=1.0):
-        """Coefficient de Dice - Métrique standard en segmentation médicale"""
-        from tensorflow.keras import backend as K
-        class_num = 4
-        total_loss = 0
-        for i in range(class_num):
-            y_true_f = K.flatten(y_true[:,:,:,i])
-            y_pred_f = K.flatten(y_pred[:,:,:,i])
-            intersection = K.sum(y_true_f * y_pred_f)
-            loss = ((2. * intersection + smooth) / (K.sum(y_true_f) + K.sum(y_pred_f) + smooth))
-            total_loss += loss
-        return total_loss / class_num
-
-    @staticmethod
-    def dice_coef_necrotic(y_true, y_pred, epsilon=1e-6):
-        """Dice pour région nécrotique - Critique pour planification chirurgicale"""
-        from tensorflow.keras import backend as K
-        intersection = K.sum(K.abs(y_true[:,:,:,1] * y_pred[:,:,:,1]))
-        return (2. * intersection) / (K.sum(K.square(y_true[:,:,:,1])) + K.sum(K.square(y_pred[:,:,:,1])) + epsilon)
-
-    @staticmethod
-    def dice_coef_edema(y_true, y_pred, epsilon=1e-6):
-        """Dice pour œdème - Important pour évaluation de l'effet de masse"""
-        from tensorflow.keras import backend as K
-        intersection = K.sum(K.abs(y_true[:,:,:,2] * y_pred[:,:,:,2]))
-        return (2. * intersection) / (K.sum(K.square(y_true[:,:,:,2])) + K.sum(K.square(y_pred[:,:,:,2])) + epsilon)
-
-    @staticmethod
-    def dice_coef_enhancing(y_true, y_pred, epsilon=1e-6):
-        """Dice pour tumeur rehaussée - Cible thérapeutique principale"""
-        from tensorflow.keras import backend as K
-        intersection = K.sum(K.abs(y_true[:,:,:,3] * y_pred[:,:,:,3]))
-        return (2. * intersection) / (K.sum(K.square(y_true[:,:,:,3])) + K.sum(K.square(y_pred[:,:,:,3])) + epsilon)
-
-    @staticmethod
-    def precision(y_true, y_pred):
-        """Précision - Minimise les faux positifs"""
-        from tensorflow.keras import backend as K
-        true_positives = K.sum(K.round(K.clip(y_true * y_pred, 0, 1)))
-        predicted_positives = K.sum(K.round(K.clip(y_pred, 0, 1)))
-        return true_positives / (predicted_positives + K.epsilon())
-
-    @staticmethod
-    def sensitivity(y_true, y_pred):
-        """Sensibilité/Recall - Minimise les faux négatifs (critique en médical)"""
-        from tensorflow.keras import backend as K
-        true_positives = K.sum(K.round(K.clip(y_true * y_pred, 0, 1)))
-        possible_positives = K.sum(K.round(K.clip(y_true, 0, 1)))
-        return true_positives / (possible_positives + K.epsilon())
-
-    @staticmethod
-    def specificity(y_true, y_pred):
-        """Spécificité - Capacité à identifier les tissus sains"""
-        from tensorflow.keras import backend as K
-        true_negatives = K.sum(K.round(K.clip((1-y_true) * (1-y_pred), 0, 1)))
-        possible_negatives = K.sum(K.round(K.clip(1-y_true, 0, 1)))
-        return true_negatives / (possible_negatives + K.epsilon())
-
     async def _calculate_volumes(self, segmentation_result: np.ndarray) -> Dict[str, Any]:
         """Calcule les volumes des différents segments"""
         try:
@@ -451,10 +353,12 @@ class AISegmentationService:
 
             # Extraction des différents segments selon votre modèle
             if len(segmentation_result.shape) == 4:
-                # Modèle multi-classe
-                necrotic_volume = np.sum(segmentation_result[:,:,:,0]) * voxel_volume
-                edema_volume = np.sum(segmentation_result[:,:,:,1]) * voxel_volume
-                enhancing_volume = np.sum(segmentation_result[:,:,:,2]) * voxel_volume
+                # Modèle multi-classe : comptes de tous les canaux en un seul passage
+                channel_voxels = np.count_nonzero(segmentation_result, axis=(0, 1, 2))
+                necrotic_volume = channel_voxels[0] * voxel_volume
+                edema_volume = channel_voxels[1] * voxel_volume
+                enhancing_volume = channel_voxels[2] * voxel_volume
+                voxel_count = int(channel_voxels.sum())
             else:
                 # Modèle binaire - adaptation nécessaire
                 total_tumor = np.sum(segmentation_result) * voxel_volume
@@ -462,6 +366,7 @@ class AISegmentationService:
                 necrotic_volume = total_tumor * 0.3
                 edema_volume = total_tumor * 0.4
                 enhancing_volume = total_tumor * 0.3
+                voxel_count = int(np.count_nonzero(segmentation_result))
 
             total_volume = necrotic_volume + edema_volume + enhancing_volume
 
@@ -470,7 +375,7 @@ class AISegmentationService:
                 "necrotic_core_volume": float(necrotic_volume),
                 "peritumoral_edema_volume": float(edema_volume),
                 "enhancing_tumor_volume": float(enhancing_volume),
-                "voxel_count": int(np.sum(segmentation_result > 0)),
+                "voxel_count": voxel_count,
                 "analysis_timestamp": datetime.utcnow().isoformat()
             }
 
@@ -481,12 +386,19 @@ class AISegmentationService:
             logger.error(f"Erreur lors du calcul des volumes: {e}")
             raise
 
-    async def _extract_tumor_segments(self, segmentation_result: np.ndarray, volume_analysis: Dict[str, Any]) -> List[Dict[str, Any]]:
+    async def _extract_tumor_segments(self, segmentation_result: np.ndarray, volume_analysis: Dict[str, Any],
+                                      images_data: Optional[Dict[str, LazyVolume]] = None) -> List[Dict[str, Any]]:
         """Extrait les segments tumoraux détaillés"""
         try:
             total_volume = volume_analysis["total_tumor_volume"]
             segments = []
 
+            # Composantes connexes, boîtes et intensités de chaque segment en un passage par classe
+            loop = asyncio.get_event_loop()
+            regions = await loop.run_in_executor(
+                self.executor, self._analyze_segment_regions, segmentation_result, images_data or {}
+            )
+
             # Segment nécrotique
             if volume_analysis["necrotic_core_volume"] > 0:
                 segments.append({
@@ -496,8 +408,8 @@ class AISegmentationService:
                     "color_code": TUMOR_SEGMENT_COLORS["NECROTIC_CORE"],
                     "description": "Noyau nécrotique central",
                     "confidence_score": 0.85,  # À adapter selon votre modèle
-                    "coordinates": self._extract_coordinates(segmentation_result, 0),
-                    "statistical_features": self._calculate_segment_statistics(segmentation_result, 0)
+                    "coordinates": regions[0]["coordinates"],
+                    "statistical_features": regions[0]["statistical_features"]
                 })
 
             # Œdème péritumoral
@@ -509,8 +421,8 @@ class AISegmentationService:
                     "color_code": TUMOR_SEGMENT_COLORS["PERITUMORAL_EDEMA"],
                     "description": "Œdème péritumoral",
                     "confidence_score": 0.82,
-                    "coordinates": self._extract_coordinates(segmentation_result, 1),
-                    "statistical_features": self._calculate_segment_statistics(segmentation_result, 1)
+                    "coordinates": regions[1]["coordinates"],
+                    "statistical_features": regions[1]["statistical_features"]
                 })
 
             # Tumeur rehaussée
@@ -522,8 +434,8 @@ class AISegmentationService:
                     "color_code": TUMOR_SEGMENT_COLORS["ENHANCING_TUMOR"],
                     "description": "Tumeur avec rehaussement",
                     "confidence_score": 0.88,
-                    "coordinates": self._extract_coordinates(segmentation_result, 2),
-                    "statistical_features": self._calculate_segment_statistics(segmentation_result, 2)
+                    "coordinates": regions[2]["coordinates"],
+                    "statistical_features": regions[2]["statistical_features"]
                 })
 
             logger.info(f"Segments extraits: {len(segments)}")
@@ -533,61 +445,17 @@ class AISegmentationService:
             logger.error(f"Erreur lors de l'extraction des segments: {e}")
             raise
 
-    def _extract_coordinates(self, segmentation_result: np.ndarray, segment_index: int) -> Dict[str, Any]:
-        """Extrait les coordonnées 3D d'un segment"""
-        try:
-            if len(segmentation_result.shape) == 4 and segment_index < segmentation_result.shape[3]:
-                segment_mask = segmentation_result[:,:,:,segment_index]
-            else:
-                segment_mask = segmentation_result
-
-            # Recherche des coordonnées des voxels actifs
-            coords = np.where(segment_mask > 0)
-
-            if len(coords[0]) > 0:
-                # Calcul du centroïde
-                centroid = [float(np.mean(coord)) for coord in coords]
-
-                # Boîte englobante
-                bbox = {
-                    "min": [int(np.min(coord)) for coord in coords],
-                    "max": [int(np.max(coord)) for coord in coords]
-                }
-
-                return {
-                    "centroid": centroid,
-                    "bounding_box": bbox,
-                    "voxel_count": len(coords[0])
-                }
-
-            return {"centroid": [0, 0, 0], "bounding_box": {"min": [0, 0, 0], "max": [0, 0, 0]}, "voxel_count": 0}
-
-        except Exception as e:
-            logger.error(f"Erreur lors de l'extraction des coordonnées: {e}")
-            return {}
-
-    def _calculate_segment_statistics(self, segmentation_result: np.ndarray, segment_index: int) -> Dict[str, Any]:
-        """Calcule les statistiques d'un segment"""
-        try:
-            if len(segmentation_result.shape) == 4 and segment_index < segmentation_result.shape[3]:
-                segment_mask = segmentation_result[:,:,:,segment_index]
-            else:
-                segment_mask = segmentation_result
-
-            # Statistiques de base
-            stats = {
-                "mean_intensity": float(np.mean(segment_mask[segment_mask > 0])) if np.any(segment_mask > 0) else 0.0,
-                "std_intensity": float(np.std(segment_mask[segment_mask > 0])) if np.any(segment_mask > 0) else 0.0,
-                "max_intensity": float(np.max(segment_mask)) if np.any(segment_mask > 0) else 0.0,
-                "min_intensity": float(np.min(segment_mask[segment_mask > 0])) if np.any(segment_mask > 0) else 0.0,
-                "voxel_count": int(np.sum(segment_mask > 0))
-            }
-
-            return stats
-
-        except Exception as e:
-            logger.error(f"Erreur lors du calcul des statistiques: {e}")
-            return {}
+    def _analyze_segment_regions(self, segmentation_result: np.ndarray,
+                                 images_data: Dict[str, LazyVolume]) -> List[Dict[str, Dict[str, Any]]]:
+        """Analyse des régions (coordonnées et statistiques) des 3 segments, intensités lues dans les modalités"""
+        # Intensités brutes rééchantillonnées sur la grille des prédictions
+        num_slices, height = segmentation_result.shape[0], segmentation_result.shape[1]
+        intensities = sample_modalities(images_data, num_slices, height, VOLUME_START_AT)
+
+        if len(segmentation_result.shape) == 4:
+            return [analyze_regions(segmentation_result[..., i], intensities) for i in range(3)]
+        # Modèle binaire : un seul masque partagé par les 3 segments
+        return [analyze_regions(segmentation_result, intensities)] * 3
 
     async def _save_segmentation_mask(self, segmentation_result: np.ndarray, segmentation_id: str):
         """Sauvegarde le masque de segmentation"""
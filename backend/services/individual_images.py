@@ -0,0 +1,154 @@
+"""
+🧠 CereBloom - Images individuelles à la demande
+Les PNG slice_N_<type>.png ne sont plus générés pendant le job : celui-ci conserve
+les coupes 2D des modalités des coupes représentatives (render_sources.npz, dans le
+dossier du rendu : indépendant des uploads, qui peuvent être supprimés). Les
+étiquettes sont relues depuis l'artefact de prédiction du job. Le premier accès
+rend l'image, puis elle est servie depuis le disque. Les requêtes concurrentes
+sur une même image partagent un seul rendu.
+"""
+
+import os
+import re
+import asyncio
+import logging
+from pathlib import Path
+from typing import Any, Dict, Sequence, Union
+
+import numpy as np
+
+from config.settings import settings
+from services.inference_executor import inference_executor
+from services.prediction_artifacts import load_prediction_artifact, slice_labels
+from services.segmentation_rendering import (
+    INDIVIDUAL_IMAGE_MODALITIES, SliceData, render_segmentation, render_slice_image, write_png
+)
+
+logger = logging.getLogger(__name__)
+
+INDIVIDUAL_IMAGE_FILENAME = re.compile(r'^slice_(\d+)_(t1|t1ce|t2|flair|segmentation|overlay)\.png$')
+RENDER_SOURCES_FILENAME = "render_sources.npz"  # Coupes 2D des modalités et couleurs pour le rendu à la demande
+
+
+def individual_images_dir(output_dir: Union[str, Path], case_name: str) -> Path:
+    return Path(output_dir) / f"{case_name}_individual_images"
+
+
+def save_render_sources(individual_dir: Union[str, Path], slices: Sequence[SliceData], lut: np.ndarray) -> Path:
+    """
+    Copie propre au rendu : modalités brutes et T1CE normalisée de chaque coupe
+    représentative, avec la table de couleurs (quelques centaines de Ko). Les
+    étiquettes ne sont pas dupliquées : elles restent dans l'artefact de prédiction.
+    """
+    arrays = {"lut": np.asarray(lut, dtype=np.uint8)}
+    for slice_data in slices:
+        prefix = f"slice_{slice_data.slice_idx}"
+        for modality, data in slice_data.modalities.items():
+            arrays[f"{prefix}_{modality}"] = data
+        arrays[f"{prefix}_t1ce_normalized"] = slice_data.t1ce_normalized
+
+    path = Path(individual_dir) / RENDER_SOURCES_FILENAME
+    tmp_path = path.with_name(".tmp_" + path.name)
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+    return path
+
+
+def render_individual_image_file(output_dir: Union[str, Path], case_name: str, filename: str) -> str:
+    """
+    Rendu à la demande d'une image individuelle (slice_N_<type>.png) depuis render_sources.npz
+    et l'artefact de prédiction du job : seuls les tableaux de la coupe et du type demandés sont lus.
+
+    Fonction de module (picklable) exécutée par l'exécuteur d'inférence.
+
+    Returns:
+        Chemin du PNG écrit dans le dossier des images individuelles
+
+    Raises:
+        ValueError: Nom de fichier invalide ou coupe absente des coupes représentatives
+        FileNotFoundError: Cas sans render_sources.npz ou sans artefact de prédiction
+    """
+    match = INDIVIDUAL_IMAGE_FILENAME.match(filename)
+    if match is None:
+        raise ValueError(f"Nom de fichier invalide: {filename}")
+    slice_idx, kind = int(match.group(1)), match.group(2)
+
+    individual_dir = individual_images_dir(output_dir, case_name)
+    prefix = f"slice_{slice_idx}"
+    with np.load(individual_dir / RENDER_SOURCES_FILENAME) as sources:
+        if f"{prefix}_t1ce_normalized" not in sources.files:
+            raise ValueError(f"Coupe {slice_idx} absente des coupes représentatives")
+        labels = None
+        if kind in ('segmentation', 'overlay'):
+            # Étiquettes du job (mmap pour le format .npy : seule la coupe demandée est lue)
+            labels = slice_labels(load_prediction_artifact(output_dir).labels, slice_idx)
+        lut = sources["lut"]
+        slice_data = SliceData(
+            slice_idx=slice_idx,
+            modalities={kind: sources[f"{prefix}_{kind}"]} if kind in INDIVIDUAL_IMAGE_MODALITIES else {},
+            t1ce_normalized=sources[f"{prefix}_t1ce_normalized"] if kind == 'overlay' else None,
+            labels=labels
+        )
+
+    segmentation_hq = seg_colored_hq = None
+    if kind in ('segmentation', 'overlay'):
+        segmentation_hq, seg_colored_hq = render_segmentation(slice_data.labels[np.newaxis], lut)
+        segmentation_hq, seg_colored_hq = segmentation_hq[0], seg_colored_hq[0]
+
+    image_path = individual_dir / filename
+    write_png(image_path, render_slice_image(kind, slice_data, segmentation_hq, seg_colored_hq),
+              settings.AI_INDIVIDUAL_IMAGE_SIZE)
+    return str(image_path)
+
+
+class IndividualImageStore:
+    """Rendu paresseux des images individuelles, avec fusion des rendus en cours"""
+
+    def __init__(self):
+        # Chemin de l'image -> rendu en cours (partagé par toutes les requêtes qui l'attendent)
+        self._pending: Dict[Path, asyncio.Future] = {}
+        self.renders = 0
+        self.coalesced = 0
+        self.disk_hits = 0
+
+    async def get(self, output_dir: Union[str, Path], case_name: str, filename: str) -> Path:
+        """
+        Chemin de l'image, rendue au premier accès.
+
+        Raises:
+            ValueError: Nom de fichier invalide ou coupe hors du volume
+            FileNotFoundError: Segmentation sans render_sources.npz ou sans artefact de prédiction
+        """
+        image_path = individual_images_dir(output_dir, case_name) / filename
+        if image_path.exists():
+            self.disk_hits += 1
+            return image_path
+
+        pending = self._pending.get(image_path)
+        if pending is None:
+            self.renders += 1
+            pending = asyncio.ensure_future(
+                inference_executor.run(render_individual_image_file, str(output_dir), case_name, filename)
+            )
+            self._pending[image_path] = pending
+            pending.add_done_callback(lambda _: self._pending.pop(image_path, None))
+            logger.info(f"🖼️ Rendu à la demande: {image_path}")
+        else:
+            self.coalesced += 1
+
+        # shield : une requête annulée (client déconnecté) n'interrompt pas le rendu des autres
+        await asyncio.shield(pending)
+        return image_path
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "rendering": len(self._pending),
+            "renders": self.renders,
+            "coalesced": self.coalesced,
+            "disk_hits": self.disk_hits
+        }
+
+
+# Instance globale du rendu des images individuelles
+individual_image_store = IndividualImageStore()
@@ -0,0 +1,95 @@
+"""
+🧠 CereBloom - Exécuteur d'inférence
+Pool de workers dédié aux étapes lourdes de la segmentation (lecture NIfTI,
+prétraitement, model.predict, rendu matplotlib) pour ne jamais bloquer la
+boucle asyncio de FastAPI
+"""
+
+import asyncio
+import functools
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_MODES = ("thread", "process")
+
+
+def _init_process_worker():
+    """Initialisation d'un worker process : backend matplotlib non interactif"""
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+class InferenceExecutor:
+    """Exécuteur configurable (threads ou processus) pour les étapes CPU de la segmentation"""
+
+    def __init__(self, mode: Optional[str] = None, max_workers: Optional[int] = None):
+        self.mode = (mode or settings.AI_INFERENCE_EXECUTOR).lower()
+        if self.mode not in EXECUTOR_MODES:
+            raise ValueError(f"AI_INFERENCE_EXECUTOR invalide: {self.mode} (attendu: {', '.join(EXECUTOR_MODES)})")
+
+        self.max_workers = max_workers or settings.AI_INFERENCE_WORKERS
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self.submitted_tasks = 0
+
+    def _get_executor(self) -> Executor:
+        """Crée le pool à la première utilisation"""
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.mode == "process":
+                        # spawn : pas de fork d'un processus qui a déjà initialisé TensorFlow
+                        self._executor = ProcessPoolExecutor(
+                            max_workers=self.max_workers,
+                            mp_context=multiprocessing.get_context("spawn"),
+                            initializer=_init_process_worker
+                        )
+                    else:
+                        self._executor = ThreadPoolExecutor(
+                            max_workers=self.max_workers,
+                            thread_name_prefix="cerebloom-inference"
+                        )
+                    logger.info(f"🧵 Exécuteur d'inférence démarré: {self.mode} x{self.max_workers}")
+        return self._executor
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> asyncio.Future:
+        """
+        Soumet une étape lourde et retourne un future awaitable.
+
+        En mode "process", fn et ses arguments doivent être picklables
+        (fonctions de module, tableaux numpy, dictionnaires).
+        """
+        loop = asyncio.get_running_loop()
+        self.submitted_tasks += 1
+        return loop.run_in_executor(self._get_executor(), functools.partial(fn, *args, **kwargs))
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Exécute une étape lourde hors de la boucle asyncio et attend son résultat"""
+        return await self.submit(fn, *args, **kwargs)
+
+    def shutdown(self, wait: bool = True):
+        """Arrête le pool (appelé à l'arrêt de l'application)"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
+                logger.info("🧵 Exécuteur d'inférence arrêté")
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "max_workers": self.max_workers,
+            "started": self._executor is not None,
+            "submitted_tasks": self.submitted_tasks
+        }
+
+
+# Instance globale de l'exécuteur
+inference_executor = InferenceExecutor()
@@ -0,0 +1,221 @@
+"""
+🧠 CereBloom - Ordonnanceur d'inférence (micro-batching)
+Regroupe les coupes des segmentations concurrentes en un seul model.predict,
+puis redistribue les sorties à chaque job
+"""
+
+import time
+import asyncio
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config.settings import settings
+from services.inference_executor import InferenceExecutor
+from services.model_registry import predict_batch
+from services.preprocessing import NUM_CLASSES, SliceSelection, fill_background, select_informative_slices
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _PendingJob:
+    """Tenseur de coupes d'un job en attente de prédiction"""
+    batch: np.ndarray
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class InferenceScheduler:
+    """Micro-batching inter-requêtes devant le modèle U-Net"""
+
+    def __init__(
+        self,
+        predict_fn: Callable[[np.ndarray], np.ndarray] = predict_batch,
+        max_batch_slices: Optional[int] = None,
+        max_wait_ms: Optional[float] = None,
+        executor: Optional[InferenceExecutor] = None
+    ):
+        self.predict_fn = predict_fn
+        self.max_batch_slices = max_batch_slices or settings.AI_BATCH_MAX_SLICES
+        self.max_wait_ms = settings.AI_BATCH_MAX_WAIT_MS if max_wait_ms is None else max_wait_ms
+        # Exécuteur propre au predict (un thread) : ni la mesure du débit ni la file
+        # n'attendent les étapes CPU des autres jobs sur l'exécuteur d'inférence partagé
+        self.executor = executor or InferenceExecutor(mode="thread", max_workers=1)
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._carry: Optional[_PendingJob] = None
+
+        # Statistiques de tuning
+        self.total_jobs = 0
+        self.total_batches = 0
+        self.total_slices = 0
+        self.total_predict_seconds = 0.0
+        self.total_skipped_slices = 0
+        self.last_throughput: Optional[float] = None
+        self._queue_delays = deque(maxlen=1000)
+
+    async def predict(self, batch: np.ndarray) -> np.ndarray:
+        """Prédiction d'un tenseur (N, IMG_SIZE, IMG_SIZE, 2), potentiellement fusionnée avec d'autres jobs"""
+        self._ensure_worker()
+        future = self._loop.create_future()
+        await self._queue.put(_PendingJob(batch=batch, future=future))
+        return await future
+
+    async def predict_volume(
+        self,
+        batch: np.ndarray,
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> Tuple[np.ndarray, SliceSelection]:
+        """
+        Prédiction d'un volume en n'envoyant au modèle que les coupes informatives.
+        Avec progress(done, total), le volume est découpé en blocs de AI_PROGRESS_CHUNK_SLICES
+        coupes soumis tous ensemble (fusionnables entre eux et avec les autres jobs) ;
+        l'avancement est publié à chaque bloc terminé.
+        """
+        selection = select_informative_slices(batch)
+        informative_batch = batch[selection.mask]
+
+        if not selection.informative:
+            informative = np.empty((0,) + batch.shape[1:-1] + (NUM_CLASSES,), dtype=np.float32)
+        elif progress is None:
+            informative = await self.predict(informative_batch)
+        else:
+            chunk = max(1, settings.AI_PROGRESS_CHUNK_SLICES)
+            progress(0, selection.informative)
+            chunks = [
+                asyncio.ensure_future(self.predict(informative_batch[start:start + chunk]))
+                for start in range(0, selection.informative, chunk)
+            ]
+            done_slices = 0
+            try:
+                for finished in asyncio.as_completed(chunks):
+                    done_slices += len(await finished)
+                    progress(done_slices, selection.informative)
+            except BaseException:
+                for pending in chunks:
+                    pending.cancel()
+                raise
+            informative = np.concatenate([done.result() for done in chunks], axis=0)
+
+        self.total_skipped_slices += selection.skipped
+        if selection.skipped:
+            logger.info(f"⏭️ {selection.skipped}/{selection.total} coupes vides ignorées (fond attribué)")
+        return fill_background(selection, informative), selection
+
+    def _ensure_worker(self):
+        """Démarre la tâche de batching dans la boucle courante"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._carry = None
+            self._worker = loop.create_task(self._run())
+
+    async def _next_job(self, timeout: Optional[float]) -> Optional[_PendingJob]:
+        """Job reporté du batch précédent, sinon prochain job de la file"""
+        if self._carry is not None:
+            job, self._carry = self._carry, None
+            return job
+        if timeout is None:
+            return await self._queue.get()
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def _run(self):
+        """Boucle de collecte : un batch part quand il est plein ou quand l'attente max est écoulée"""
+        while True:
+            first = await self._next_job(timeout=None)
+            jobs = [first]
+            slices = len(first.batch)
+            deadline = time.perf_counter() + self.max_wait_ms / 1000.0
+
+            while slices < self.max_batch_slices:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                job = await self._next_job(timeout=remaining)
+                if job is None:
+                    break
+                if slices + len(job.batch) > self.max_batch_slices:
+                    # Les jobs ne sont jamais découpés : celui-ci partira dans le batch suivant
+                    self._carry = job
+                    break
+                jobs.append(job)
+                slices += len(job.batch)
+
+            await self._execute(jobs)
+
+    def _timed_predict(self, batch: np.ndarray) -> Tuple[np.ndarray, float, float]:
+        """Predict chronométré dans le thread d'exécution : (sorties, début, durée)"""
+        started_at = time.perf_counter()
+        outputs = self.predict_fn(batch)
+        return outputs, started_at, time.perf_counter() - started_at
+
+    async def _execute(self, jobs: List[_PendingJob]):
+        """Prédiction du batch fusionné puis découpage des sorties par job"""
+        try:
+            merged = jobs[0].batch if len(jobs) == 1 else np.concatenate([job.batch for job in jobs], axis=0)
+            outputs, started_at, elapsed = await self.executor.run(self._timed_predict, merged)
+        except Exception as e:
+            logger.error(f"❌ Erreur prédiction batch ({len(jobs)} jobs): {e}")
+            for job in jobs:
+                if not job.future.done():
+                    job.future.set_exception(e)
+            return
+
+        # Attente = de la mise en file au démarrage effectif du predict
+        delays = [started_at - job.enqueued_at for job in jobs]
+        self._queue_delays.extend(delays)
+
+        offsets = np.cumsum([len(job.batch) for job in jobs])[:-1]
+        for job, output in zip(jobs, np.split(outputs, offsets, axis=0)):
+            if not job.future.done():
+                job.future.set_result(output)
+
+        self.total_jobs += len(jobs)
+        self.total_batches += 1
+        self.total_slices += len(merged)
+        self.total_predict_seconds += elapsed
+        self.last_throughput = len(merged) / elapsed if elapsed > 0 else None
+
+        logger.info(
+            f"🧮 Batch {len(jobs)} job(s) / {len(merged)} coupes en {elapsed:.2f}s "
+            f"({self.last_throughput or 0:.0f} coupes/s, attente max {max(delays) * 1000:.0f}ms)"
+        )
+
+    def shutdown(self, wait: bool = True):
+        """Arrête le thread du predict (appelé à l'arrêt de l'application)"""
+        self.executor.shutdown(wait=wait)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Débit et délais d'attente pour ajuster max_batch_slices / max_wait_ms"""
+        delays_ms = sorted(d * 1000 for d in self._queue_delays)
+        return {
+            "max_batch_slices": self.max_batch_slices,
+            "max_wait_ms": self.max_wait_ms,
+            "total_jobs": self.total_jobs,
+            "total_batches": self.total_batches,
+            "average_jobs_per_batch": self.total_jobs / self.total_batches if self.total_batches else 0.0,
+            "throughput_slices_per_s": (
+                self.total_slices / self.total_predict_seconds if self.total_predict_seconds > 0 else None
+            ),
+            "last_throughput_slices_per_s": self.last_throughput,
+            "total_skipped_slices": self.total_skipped_slices,
+            "queue_delay_ms": {
+                "mean": sum(delays_ms) / len(delays_ms) if delays_ms else 0.0,
+                "p95": delays_ms[int(0.95 * (len(delays_ms) - 1))] if delays_ms else 0.0,
+                "max": delays_ms[-1] if delays_ms else 0.0
+            }
+        }
+
+
+# Instance globale de l'ordonnanceur
+inference_scheduler = InferenceScheduler()
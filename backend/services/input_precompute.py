@@ -0,0 +1,206 @@
+"""
+🧠 CereBloom - Pré-calcul de l'entrée du modèle à l'upload
+Dès que FLAIR et T1CE sont disponibles, le tenseur normalisé (100, 128, 128, 2)
+est calculé en tâche de fond et écrit en float16 à côté des uploads :
+/process-patient passe alors directement à l'inférence
+"""
+
+import os
+import json
+import asyncio
+import hashlib
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from config.settings import settings
+from services.inference_executor import inference_executor
+from services.model_registry import IMG_SIZE, VOLUME_SLICES
+from services.prediction_cache import prediction_cache
+from services.preprocessing import VOLUME_START_AT, build_model_input
+from services.volume_reader import (
+    INTENSITY_STATS_KEY, NORMALIZATION_SCHEME, bounds_from_metadata, normalize_volume, open_volume,
+    resolve_volume_path
+)
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+PRECOMPUTED_SUBDIR = "precomputed"
+INPUT_MODALITIES = ("flair", "t1ce")  # Seules modalités lues par le modèle
+
+
+def input_params() -> Dict[str, Any]:
+    """Paramètres dont dépend le tenseur d'entrée"""
+    return {
+        "format_version": FORMAT_VERSION,
+        "normalization": NORMALIZATION_SCHEME,
+        "img_size": IMG_SIZE,
+        "volume_slices": VOLUME_SLICES,
+        "volume_start_at": VOLUME_START_AT
+    }
+
+
+def build_input_artifact(tensor_path: str, modality_paths: Dict[str, str],
+                         intensity_bounds: Dict[str, Optional[Tuple[float, float]]],
+                         metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Calcule le tenseur (exécuteur d'inférence) et l'écrit avec son sidecar JSON"""
+    normalized = {
+        modality: normalize_volume(open_volume(path), intensity_bounds.get(modality))
+        for modality, path in modality_paths.items()
+    }
+    X = build_model_input(normalized).astype(np.float16)
+
+    tensor_path = Path(tensor_path)
+    tensor_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = tensor_path.with_name(tensor_path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        np.save(f, X)
+    os.replace(tmp_path, tensor_path)
+
+    metadata = dict(metadata, shape=list(X.shape), dtype="float16", created_at=datetime.now().isoformat())
+    for modality, volume in normalized.items():
+        metadata["modalities"][modality]["bounds"] = list(volume.bounds)
+    sidecar_path = tensor_path.with_suffix(".json")
+    tmp_path = sidecar_path.with_name(sidecar_path.name + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(metadata, f, indent=2)
+    # Le sidecar est écrit en dernier : sa présence signale un tenseur complet
+    os.replace(tmp_path, sidecar_path)
+    return metadata
+
+
+class InputPrecomputer:
+    """Tenseurs d'entrée pré-calculés, indexés par le contenu de FLAIR / T1CE"""
+
+    def __init__(self):
+        self.scheduled = 0
+        self.completed = 0
+        self.failed = 0
+        self.hits = 0
+        self.misses = 0
+        # Pré-calculs en cours, par chemins FLAIR / T1CE
+        self._tasks: Dict[Tuple[Tuple[str, str], ...], asyncio.Task] = {}
+
+    @staticmethod
+    def enabled() -> bool:
+        # Avec le recadrage, la boîte dépend des 4 modalités : le pré-calcul est désactivé
+        return settings.AI_INPUT_PRECOMPUTE and not settings.AI_BRAIN_CROP
+
+    @staticmethod
+    def _input_paths(modality_paths: Dict[str, str]) -> Optional[Dict[str, str]]:
+        paths = {modality.lower(): path for modality, path in modality_paths.items()}
+        if not all(modality in paths and os.path.exists(paths[modality]) for modality in INPUT_MODALITIES):
+            return None
+        return {modality: paths[modality] for modality in INPUT_MODALITIES}
+
+    def artifact_key(self, input_paths: Dict[str, str]) -> Tuple[str, Dict[str, str]]:
+        hashes = {modality: prediction_cache.file_hash(path) for modality, path in input_paths.items()}
+        key = hashlib.sha256(json.dumps({"modalities": hashes, "params": input_params()},
+                                        sort_keys=True).encode()).hexdigest()
+        return key, hashes
+
+    @staticmethod
+    def tensor_path(input_paths: Dict[str, str], key: str) -> Path:
+        return Path(input_paths["flair"]).parent / PRECOMPUTED_SUBDIR / f"{key[:32]}_model_input.npy"
+
+    def schedule(self, modality_paths: Dict[str, str],
+                 image_metadata: Optional[Dict[str, Optional[Dict[str, Any]]]] = None) -> bool:
+        """Lance le pré-calcul en tâche de fond (boucle asyncio courante) ; False si impossible"""
+        input_paths = self._input_paths(modality_paths)
+        if not self.enabled() or input_paths is None:
+            return False
+
+        task_key = tuple(sorted(input_paths.items()))
+        if task_key in self._tasks:
+            return True
+
+        image_metadata = {modality.lower(): metadata for modality, metadata in (image_metadata or {}).items()}
+        task = asyncio.get_running_loop().create_task(self._precompute(input_paths, image_metadata))
+        self._tasks[task_key] = task
+        task.add_done_callback(lambda _: self._tasks.pop(task_key, None))
+        self.scheduled += 1
+        return True
+
+    async def _precompute(self, input_paths: Dict[str, str], image_metadata: Dict[str, Optional[Dict[str, Any]]]):
+        loop = asyncio.get_running_loop()
+        try:
+            key, hashes = await loop.run_in_executor(None, self.artifact_key, input_paths)
+            tensor_path = self.tensor_path(input_paths, key)
+            if tensor_path.with_suffix(".json").exists():
+                return
+
+            metadata = {
+                "key": key,
+                "params": input_params(),
+                "modalities": {
+                    modality: {
+                        "path": path,
+                        "sha256": hashes[modality],
+                        INTENSITY_STATS_KEY: (image_metadata.get(modality) or {}).get(INTENSITY_STATS_KEY)
+                    }
+                    for modality, path in input_paths.items()
+                }
+            }
+            bounds = {modality: bounds_from_metadata(image_metadata.get(modality)) for modality in input_paths}
+            read_paths = {
+                modality: resolve_volume_path(path, image_metadata.get(modality)) for modality, path in input_paths.items()
+            }
+            await inference_executor.run(build_input_artifact, str(tensor_path), read_paths, bounds, metadata)
+            self.completed += 1
+            logger.info(f"📦 Entrée du modèle pré-calculée: {tensor_path}")
+        except Exception as e:
+            self.failed += 1
+            logger.warning(f"⚠️ Pré-calcul de l'entrée du modèle échoué: {e}")
+
+    def load(self, modality_paths: Dict[str, str]) -> Optional[np.ndarray]:
+        """Tenseur float32 si un pré-calcul correspond aux fichiers et paramètres actuels, sinon None"""
+        input_paths = self._input_paths(modality_paths)
+        if not self.enabled() or input_paths is None:
+            return None
+
+        key, hashes = self.artifact_key(input_paths)
+        tensor_path = self.tensor_path(input_paths, key)
+        try:
+            with open(tensor_path.with_suffix(".json")) as f:
+                metadata = json.load(f)
+            matches = metadata["params"] == input_params() and all(
+                metadata["modalities"][modality]["sha256"] == sha256 for modality, sha256 in hashes.items()
+            )
+            X = np.load(tensor_path).astype(np.float32) if matches else None
+        except (OSError, ValueError, KeyError):
+            X = None
+
+        if X is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        logger.info(f"⚡ Entrée du modèle pré-calculée réutilisée ({key[:12]})")
+        return X
+
+    async def aload(self, modality_paths: Dict[str, str]) -> Optional[np.ndarray]:
+        """Comme load, en attendant d'abord un pré-calcul encore en cours pour ces fichiers"""
+        input_paths = self._input_paths(modality_paths)
+        pending = self._tasks.get(tuple(sorted(input_paths.items()))) if input_paths is not None else None
+        if pending is not None:
+            await asyncio.shield(pending)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.load, modality_paths)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled(),
+            "scheduled": self.scheduled,
+            "completed": self.completed,
+            "failed": self.failed,
+            "running": len(self._tasks),
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+# Instance globale du pré-calcul
+input_precomputer = InputPrecomputer()
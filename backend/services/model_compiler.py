@@ -0,0 +1,220 @@
+"""
+🧠 CereBloom - Artefact d'inférence compilé
+Convertit my_model.h5 en SavedModel avec une signature tf.function (XLA optionnel),
+mis en cache sur disque sous le SHA-256 du .h5 et réutilisé aux démarrages suivants
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from config.settings import settings
+
+try:
+    import tensorflow as tf
+    TENSORFLOW_AVAILABLE = True
+except ImportError:
+    TENSORFLOW_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+METADATA_FILENAME = "cerebloom_artifact.json"
+OUTPUT_KEY = "predictions"
+PARITY_SAMPLE_SLICES = 8
+PARITY_MIN_ARGMAX_AGREEMENT = 0.999
+
+
+def compute_model_hash(model_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 du fichier modèle (lecture par blocs)"""
+    digest = hashlib.sha256()
+    with open(model_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def make_reference_batch(input_shape: Tuple[int, ...], slices: int = PARITY_SAMPLE_SLICES, seed: int = 0) -> np.ndarray:
+    """Lot synthétique déterministe dans [0, 1] (même plage que les volumes normalisés)"""
+    rng = np.random.default_rng(seed)
+    return rng.random((slices,) + tuple(input_shape), dtype=np.float32)
+
+
+def check_parity(reference: np.ndarray, candidate: np.ndarray, tolerance: float) -> Dict[str, Any]:
+    """Compare deux sorties softmax (N, H, W, C) : écart max et accord des argmax"""
+    max_abs_diff = float(np.max(np.abs(reference.astype(np.float32) - candidate.astype(np.float32))))
+    argmax_agreement = float(np.mean(np.argmax(reference, axis=-1) == np.argmax(candidate, axis=-1)))
+    return {
+        "max_abs_diff": max_abs_diff,
+        "argmax_agreement": argmax_agreement,
+        "tolerance": tolerance,
+        "passed": max_abs_diff <= tolerance and argmax_agreement >= PARITY_MIN_ARGMAX_AGREEMENT
+    }
+
+
+class CompiledPredictor:
+    """Prédicteur au format Keras (.predict) au-dessus de la signature de service du SavedModel"""
+
+    def __init__(self, artifact, input_shape: Tuple, output_shape: Tuple, backend: str, batch_size: int = 32):
+        self._artifact = artifact  # Garde le SavedModel chargé en vie
+        self._serve = artifact.serve
+        self.input_shape = (None,) + tuple(input_shape)
+        self.output_shape = (None,) + tuple(output_shape)
+        self.backend = backend
+        self.batch_size = batch_size
+
+    def predict(self, batch: np.ndarray, verbose: int = 0, batch_size: Optional[int] = None) -> np.ndarray:
+        batch = np.asarray(batch, dtype=np.float32)
+        size = batch_size or self.batch_size
+        outputs = [
+            self._serve(tf.constant(batch[start:start + size]))[OUTPUT_KEY].numpy()
+            for start in range(0, len(batch), size)
+        ]
+        if not outputs:
+            return np.empty((0,) + self.output_shape[1:], dtype=np.float32)
+        return np.concatenate(outputs, axis=0)
+
+
+class ModelCompiler:
+    """Construit, valide et met en cache l'artefact SavedModel du modèle U-Net"""
+
+    def __init__(self, cache_dir: Optional[str] = None, jit_compile: Optional[bool] = None,
+                 parity_tolerance: Optional[float] = None):
+        self.cache_dir = Path(cache_dir or settings.AI_COMPILED_MODEL_DIR)
+        self.jit_compile = settings.AI_XLA_JIT if jit_compile is None else jit_compile
+        self.parity_tolerance = parity_tolerance or settings.AI_PARITY_TOLERANCE
+        self.last_report: Optional[Dict[str, Any]] = None
+
+    @property
+    def backend_name(self) -> str:
+        return "savedmodel_xla" if self.jit_compile else "savedmodel"
+
+    def artifact_dir(self, model_hash: str) -> Path:
+        return self.cache_dir / f"{model_hash[:16]}_{self.backend_name}"
+
+    def load_or_build(self, model_path: str, keras_loader: Callable[[], Any]):
+        """
+        Retourne un prédicteur compilé pour model_path.
+
+        Réutilise l'artefact en cache si le hash correspond ; sinon charge le .h5 via
+        keras_loader, construit l'artefact et vérifie la parité. Si la parité échoue,
+        le modèle Keras est retourné tel quel.
+        """
+        if not TENSORFLOW_AVAILABLE:
+            raise RuntimeError("TensorFlow requis pour compiler le modèle")
+
+        model_hash = compute_model_hash(model_path)
+        target = self.artifact_dir(model_hash)
+        metadata = self._read_metadata(target)
+
+        if metadata and metadata.get("model_sha256") == model_hash and metadata["parity"]["passed"]:
+            start = time.perf_counter()
+            predictor = self._load_artifact(target, metadata)
+            load_seconds = time.perf_counter() - start
+            logger.info(
+                f"⚡ Artefact compilé chargé en {load_seconds:.2f}s "
+                f"(vs {metadata['keras_load_seconds']:.2f}s pour le .h5)"
+            )
+            self.last_report = {**metadata, "source": "cache", "artifact_load_seconds": load_seconds}
+            return predictor
+
+        start = time.perf_counter()
+        keras_model = keras_loader()
+        keras_load_seconds = time.perf_counter() - start
+
+        return self._build(keras_model, target, model_hash, keras_load_seconds)
+
+    def _build(self, keras_model, target: Path, model_hash: str, keras_load_seconds: float):
+        """Export SavedModel, rechargement et contrôle de parité avant publication dans le cache"""
+        input_shape = tuple(keras_model.input_shape[1:])
+        output_shape = tuple(keras_model.output_shape[1:])
+
+        @tf.function(
+            input_signature=[tf.TensorSpec((None,) + input_shape, tf.float32)],
+            jit_compile=self.jit_compile
+        )
+        def serve(x):
+            return {OUTPUT_KEY: keras_model(x, training=False)}
+
+        module = tf.Module()
+        module.model = keras_model
+        module.serve = serve
+
+        tmp_dir = target.with_name(target.name + ".tmp")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.parent.mkdir(parents=True, exist_ok=True)
+
+        logger.info(f"🛠️ Construction de l'artefact {self.backend_name}: {target}")
+        tf.saved_model.save(module, str(tmp_dir), signatures={"serving_default": serve})
+
+        metadata = {
+            "model_sha256": model_hash,
+            "backend": self.backend_name,
+            "jit_compile": self.jit_compile,
+            "input_shape": list(input_shape),
+            "output_shape": list(output_shape),
+            "keras_load_seconds": keras_load_seconds,
+            "built_at": datetime.now().isoformat(),
+            "tensorflow_version": tf.__version__
+        }
+
+        start = time.perf_counter()
+        predictor = self._load_artifact(tmp_dir, metadata)
+        metadata["artifact_load_seconds"] = time.perf_counter() - start
+
+        sample = make_reference_batch(input_shape)
+        metadata["parity"] = check_parity(
+            keras_model.predict(sample, verbose=0), predictor.predict(sample), self.parity_tolerance
+        )
+
+        if not metadata["parity"]["passed"]:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            logger.warning(f"⚠️ Parité non respectée, retour au modèle Keras: {metadata['parity']}")
+            self.last_report = {**metadata, "source": "keras_fallback"}
+            return keras_model
+
+        with open(tmp_dir / METADATA_FILENAME, "w") as f:
+            json.dump(metadata, f, indent=2)
+
+        shutil.rmtree(target, ignore_errors=True)
+        os.replace(tmp_dir, target)
+        # Recharger depuis l'emplacement définitif (les variables pointent vers le dossier)
+        predictor = self._load_artifact(target, metadata)
+
+        logger.info(
+            f"✅ Artefact construit (parité max={metadata['parity']['max_abs_diff']:.2e}, "
+            f"chargement {metadata['artifact_load_seconds']:.2f}s vs {keras_load_seconds:.2f}s pour le .h5)"
+        )
+        self.last_report = {**metadata, "source": "built"}
+        return predictor
+
+    def _load_artifact(self, artifact_dir: Path, metadata: Dict[str, Any]) -> CompiledPredictor:
+        return CompiledPredictor(
+            tf.saved_model.load(str(artifact_dir)),
+            input_shape=tuple(metadata["input_shape"]),
+            output_shape=tuple(metadata["output_shape"]),
+            backend=metadata["backend"]
+        )
+
+    @staticmethod
+    def _read_metadata(artifact_dir: Path) -> Optional[Dict[str, Any]]:
+        metadata_path = artifact_dir / METADATA_FILENAME
+        if not metadata_path.exists():
+            return None
+        try:
+            with open(metadata_path) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Métadonnées d'artefact illisibles ({metadata_path}): {e}")
+            return None
+
+
+# Instance globale du compilateur
+model_compiler = ModelCompiler()
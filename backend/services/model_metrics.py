@@ -0,0 +1,89 @@
+"""
+🧠 CereBloom - Métriques personnalisées du modèle U-Net
+Dice (global et par classe), précision, sensibilité et spécificité enregistrés
+dans my_model.h5 : nécessaires au chargement Keras (custom_objects) et au
+contrôle de précision de la quantification
+"""
+
+from typing import Any, Callable, Dict
+
+import numpy as np
+
+# Backend Keras avec gestion d'erreur (mêmes calculs en NumPy sans TensorFlow)
+try:
+    from tensorflow.keras import backend as K
+except ImportError:
+    class K:
+        @staticmethod
+        def flatten(x): return np.ravel(x)
+        @staticmethod
+        def sum(x): return np.sum(x)
+        @staticmethod
+        def square(x): return np.square(x)
+        @staticmethod
+        def abs(x): return np.abs(x)
+        @staticmethod
+        def round(x): return np.round(x)
+        @staticmethod
+        def clip(x, min_val, max_val): return np.clip(x, min_val, max_val)
+        @staticmethod
+        def epsilon(): return 1e-7
+
+
+def dice_coef(y_true, y_pred, smooth=1.0):
+    """Coefficient de Dice - Métrique standard en segmentation médicale"""
+    class_num = 4
+    total_loss = 0
+    for i in range(class_num):
+        y_true_f = K.flatten(y_true[:,:,:,i])
+        y_pred_f = K.flatten(y_pred[:,:,:,i])
+        intersection = K.sum(y_true_f * y_pred_f)
+        loss = ((2. * intersection + smooth) / (K.sum(y_true_f) + K.sum(y_pred_f) + smooth))
+        total_loss += loss
+    return total_loss / class_num
+
+def dice_coef_necrotic(y_true, y_pred, epsilon=1e-6):
+    """Dice pour région nécrotique - Critique pour planification chirurgicale"""
+    intersection = K.sum(K.abs(y_true[:,:,:,1] * y_pred[:,:,:,1]))
+    return (2. * intersection) / (K.sum(K.square(y_true[:,:,:,1])) + K.sum(K.square(y_pred[:,:,:,1])) + epsilon)
+
+def dice_coef_edema(y_true, y_pred, epsilon=1e-6):
+    """Dice pour œdème - Important pour évaluation de l'effet de masse"""
+    intersection = K.sum(K.abs(y_true[:,:,:,2] * y_pred[:,:,:,2]))
+    return (2. * intersection) / (K.sum(K.square(y_true[:,:,:,2])) + K.sum(K.square(y_pred[:,:,:,2])) + epsilon)
+
+def dice_coef_enhancing(y_true, y_pred, epsilon=1e-6):
+    """Dice pour tumeur rehaussée - Cible thérapeutique principale"""
+    intersection = K.sum(K.abs(y_true[:,:,:,3] * y_pred[:,:,:,3]))
+    return (2. * intersection) / (K.sum(K.square(y_true[:,:,:,3])) + K.sum(K.square(y_pred[:,:,:,3])) + epsilon)
+
+def precision(y_true, y_pred):
+    """Précision - Minimise les faux positifs"""
+    true_positives = K.sum(K.round(K.clip(y_true * y_pred, 0, 1)))
+    predicted_positives = K.sum(K.round(K.clip(y_pred, 0, 1)))
+    return true_positives / (predicted_positives + K.epsilon())
+
+def sensitivity(y_true, y_pred):
+    """Sensibilité/Recall - Minimise les faux négatifs (critique en médical)"""
+    true_positives = K.sum(K.round(K.clip(y_true * y_pred, 0, 1)))
+    possible_positives = K.sum(K.round(K.clip(y_true, 0, 1)))
+    return true_positives / (possible_positives + K.epsilon())
+
+def specificity(y_true, y_pred):
+    """Spécificité - Capacité à identifier les tissus sains"""
+    true_negatives = K.sum(K.round(K.clip((1-y_true) * (1-y_pred), 0, 1)))
+    possible_negatives = K.sum(K.round(K.clip(1-y_true, 0, 1)))
+    return true_negatives / (possible_negatives + K.epsilon())
+
+
+def custom_objects() -> Dict[str, Callable[..., Any]]:
+    """custom_objects de tf.keras.models.load_model pour my_model.h5"""
+    return {
+        "dice_coef": dice_coef,
+        "precision": precision,
+        "sensitivity": sensitivity,
+        "specificity": specificity,
+        "dice_coef_necrotic": dice_coef_necrotic,
+        "dice_coef_edema": dice_coef_edema,
+        "dice_coef_enhancing": dice_coef_enhancing
+    }
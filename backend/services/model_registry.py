@@ -0,0 +1,172 @@
+"""
+🧠 CereBloom - Registre du modèle U-Net
+Charge my_model.h5 une seule fois par processus, le préchauffe et le partage
+entre tous les chemins de segmentation (FastAPI, Flask, scripts)
+"""
+
+import os
+import time
+import asyncio
+import logging
+import threading
+import importlib.util
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from config.settings import settings
+
+# TensorFlow importé au chargement du modèle seulement (mode simulation sans TensorFlow) :
+# le prétraitement, le post-traitement et les workers de rendu n'importent que les dimensions
+TENSORFLOW_AVAILABLE = importlib.util.find_spec("tensorflow") is not None
+
+logger = logging.getLogger(__name__)
+
+# Dimensions d'entrée du modèle (copiées de loadmodel.py)
+IMG_SIZE = 128
+VOLUME_SLICES = 100
+
+INFERENCE_BACKENDS = ("keras", "onnx")
+
+
+class ModelRegistry:
+    """Registre process-wide du modèle de segmentation U-Net"""
+
+    def __init__(self, model_path: Optional[str] = None):
+        self.model_path = model_path or settings.AI_MODEL_PATH
+        self.model = None
+        self.load_time_seconds: Optional[float] = None
+        self.warmup_time_seconds: Optional[float] = None
+        self.loaded_at: Optional[datetime] = None
+        self.backend: Optional[str] = None
+        self.last_error: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.model is not None
+
+    def get_model(self):
+        """Retourne le modèle partagé, en le chargeant au premier appel"""
+        if self.model is None:
+            with self._lock:
+                # Double vérification : un autre thread a pu charger le modèle entre-temps
+                if self.model is None:
+                    self._load()
+        return self.model
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        """Prédiction avec le modèle partagé"""
+        return self.get_model().predict(batch, verbose=0)
+
+    async def initialize(self):
+        """Charge et préchauffe le modèle sans bloquer la boucle asyncio (lifespan)"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.get_model)
+
+    def _load(self):
+        """Chargement synchrone (appelé sous verrou)"""
+        if not TENSORFLOW_AVAILABLE:
+            raise RuntimeError("TensorFlow requis pour charger le modèle")
+
+        if not os.path.exists(self.model_path):
+            raise FileNotFoundError(f"Modèle introuvable: {self.model_path}")
+
+        try:
+            logger.info(f"🔄 Chargement du modèle: {self.model_path}")
+            start = time.perf_counter()
+            model = self._load_predictor()
+            self.load_time_seconds = time.perf_counter() - start
+            self.backend = getattr(model, "backend", "keras")
+            logger.info(f"✅ Modèle chargé en {self.load_time_seconds:.2f}s (backend: {self.backend})")
+
+            if settings.AI_MODEL_WARMUP:
+                self._warmup(model)
+
+            # Publication seulement après le warm-up pour que le premier job soit rapide
+            self.model = model
+            self.loaded_at = datetime.now()
+            self.last_error = None
+
+        except Exception as e:
+            self.last_error = str(e)
+            logger.error(f"❌ Erreur lors du chargement du modèle: {e}")
+            raise
+
+    def _load_predictor(self):
+        """Backend configuré (TFLite quantifié, ONNX, artefact compilé) avec repli sur le modèle Keras"""
+        backend = settings.AI_INFERENCE_BACKEND.lower()
+        if backend not in INFERENCE_BACKENDS:
+            raise ValueError(f"AI_INFERENCE_BACKEND invalide: {backend} (attendu: {', '.join(INFERENCE_BACKENDS)})")
+
+        if settings.AI_QUANTIZATION_MODE.lower() != "none":
+            from services.quantization import load_quantized_predictor
+            try:
+                return load_quantized_predictor(self.model_path, self._load_keras_model)
+            except Exception as e:
+                # Contrôle d'exactitude échoué ou conversion impossible : pleine précision
+                logger.error(f"❌ Mode {settings.AI_QUANTIZATION_MODE} non activé: {e}")
+
+        if backend == "onnx":
+            from services.onnx_backend import load_or_export_onnx
+            try:
+                return load_or_export_onnx(self.model_path, self._load_keras_model)
+            except Exception as e:
+                logger.warning(f"⚠️ Backend ONNX indisponible, chargement Keras: {e}")
+
+        if settings.AI_COMPILED_MODEL:
+            from services.model_compiler import model_compiler
+            try:
+                return model_compiler.load_or_build(self.model_path, self._load_keras_model)
+            except Exception as e:
+                logger.warning(f"⚠️ Artefact compilé indisponible, chargement Keras: {e}")
+        return self._load_keras_model()
+
+    def _load_keras_model(self):
+        import tensorflow as tf
+        from services.model_metrics import custom_objects
+
+        return tf.keras.models.load_model(
+            self.model_path,
+            custom_objects=custom_objects(),
+            compile=False  # Inférence uniquement : pas besoin d'optimiseur ni de métriques
+        )
+
+    def _warmup(self, model):
+        """Prédiction factice pour construire le graphe et allouer les buffers"""
+        dummy = np.zeros((VOLUME_SLICES, IMG_SIZE, IMG_SIZE, 2), dtype=np.float32)
+        start = time.perf_counter()
+        model.predict(dummy, verbose=0)
+        self.warmup_time_seconds = time.perf_counter() - start
+        logger.info(f"🔥 Warm-up terminé en {self.warmup_time_seconds:.2f}s")
+
+    def get_status(self) -> Dict[str, Any]:
+        """Informations de chargement pour /health et le monitoring"""
+        return {
+            "loaded": self.is_loaded,
+            "model_path": self.model_path,
+            "backend": self.backend,
+            "tensorflow_available": TENSORFLOW_AVAILABLE,
+            "load_time_seconds": self.load_time_seconds,
+            "warmup_time_seconds": self.warmup_time_seconds,
+            "loaded_at": self.loaded_at.isoformat() if self.loaded_at else None,
+            "last_error": self.last_error,
+            "artifact": self._artifact_report()
+        }
+
+    @staticmethod
+    def _artifact_report() -> Optional[Dict[str, Any]]:
+        if not settings.AI_COMPILED_MODEL:
+            return None
+        from services.model_compiler import model_compiler
+        return model_compiler.last_report
+
+
+# Instance globale du registre
+model_registry = ModelRegistry()
+
+
+def predict_batch(batch: np.ndarray) -> np.ndarray:
+    """Point d'entrée picklable pour l'exécuteur d'inférence (registre du processus courant)"""
+    return model_registry.predict(batch)
@@ -0,0 +1,122 @@
+"""
+🧠 CereBloom - Backend ONNX Runtime (CPU)
+Export de my_model.h5 vers ONNX (tf2onnx) et session onnxruntime au format
+Keras (.predict) pour le registre du modèle
+"""
+
+import os
+import time
+import logging
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+from config.settings import settings
+from services.model_compiler import (
+    check_parity, compute_model_hash, make_reference_batch
+)
+
+# Dépendances optionnelles (AI_INFERENCE_BACKEND=onnx uniquement)
+try:
+    import onnxruntime as ort
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+
+try:
+    import tensorflow as tf
+    import tf2onnx
+    TF2ONNX_AVAILABLE = True
+except ImportError:
+    TF2ONNX_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+def export_to_onnx(keras_model, output_path: str, opset: Optional[int] = None) -> str:
+    """Convertit le modèle Keras en ONNX (entrée dynamique sur l'axe des coupes)"""
+    if not TF2ONNX_AVAILABLE:
+        raise RuntimeError("tf2onnx requis pour exporter le modèle en ONNX")
+
+    input_shape = tuple(keras_model.input_shape[1:])
+    spec = (tf.TensorSpec((None,) + input_shape, tf.float32, name="input"),)
+
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = f"{output_path}.tmp"
+
+    start = time.perf_counter()
+    tf2onnx.convert.from_keras(
+        keras_model,
+        input_signature=spec,
+        opset=opset or settings.AI_ONNX_OPSET,
+        output_path=tmp_path
+    )
+    os.replace(tmp_path, output_path)
+    logger.info(f"🛠️ Modèle exporté en ONNX en {time.perf_counter() - start:.2f}s: {output_path}")
+    return output_path
+
+
+class OnnxPredictor:
+    """Session onnxruntime CPU exposant la même interface .predict que Keras"""
+
+    backend = "onnx"
+
+    def __init__(self, onnx_path: str, intra_op_threads: Optional[int] = None,
+                 inter_op_threads: Optional[int] = None, batch_size: int = 32):
+        if not ONNXRUNTIME_AVAILABLE:
+            raise RuntimeError("onnxruntime requis pour AI_INFERENCE_BACKEND=onnx")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        # 0 = valeur par défaut d'onnxruntime (un thread par cœur physique)
+        options.intra_op_num_threads = settings.AI_ONNX_INTRA_OP_THREADS if intra_op_threads is None else intra_op_threads
+        options.inter_op_num_threads = settings.AI_ONNX_INTER_OP_THREADS if inter_op_threads is None else inter_op_threads
+
+        self.onnx_path = onnx_path
+        self.session = ort.InferenceSession(onnx_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        self.output_name = self.session.get_outputs()[0].name
+        self.input_shape = (None,) + tuple(self.session.get_inputs()[0].shape[1:])
+        self.output_shape = (None,) + tuple(self.session.get_outputs()[0].shape[1:])
+        self.batch_size = batch_size
+
+    def predict(self, batch: np.ndarray, verbose: int = 0, batch_size: Optional[int] = None) -> np.ndarray:
+        """Softmax (N, 128, 128, 4), identique à model.predict"""
+        batch = np.ascontiguousarray(batch, dtype=np.float32)
+        size = batch_size or self.batch_size
+        outputs = [
+            self.session.run([self.output_name], {self.input_name: batch[start:start + size]})[0]
+            for start in range(0, len(batch), size)
+        ]
+        if not outputs:
+            return np.empty((0,) + self.output_shape[1:], dtype=np.float32)
+        return np.concatenate(outputs, axis=0)
+
+
+def load_or_export_onnx(model_path: str, keras_loader: Callable[[], Any],
+                        cache_dir: Optional[str] = None) -> OnnxPredictor:
+    """
+    Session ONNX pour model_path, exportée au premier démarrage puis réutilisée
+    (fichier nommé d'après le SHA-256 du .h5). Un export qui ne reproduit pas
+    les argmax Keras est rejeté.
+    """
+    model_hash = compute_model_hash(model_path)
+    onnx_path = Path(cache_dir or settings.AI_COMPILED_MODEL_DIR) / f"{model_hash[:16]}.onnx"
+
+    if onnx_path.exists():
+        return OnnxPredictor(str(onnx_path))
+
+    keras_model = keras_loader()
+    export_to_onnx(keras_model, str(onnx_path))
+    predictor = OnnxPredictor(str(onnx_path))
+
+    sample = make_reference_batch(tuple(keras_model.input_shape[1:]))
+    parity = check_parity(keras_model.predict(sample, verbose=0), predictor.predict(sample), settings.AI_PARITY_TOLERANCE)
+    if not parity["passed"]:
+        onnx_path.unlink()
+        raise RuntimeError(f"Parité ONNX non respectée: {parity}")
+
+    logger.info(f"✅ Parité ONNX validée (max={parity['max_abs_diff']:.2e}, argmax={parity['argmax_agreement']:.4f})")
+    return predictor
@@ -0,0 +1,160 @@
+"""
+🧠 CereBloom - Post-traitement fusionné des prédictions
+Un seul argmax vers des étiquettes uint8, puis un histogramme des classes par coupe
+(np.bincount) : volumes, pourcentages, coupes représentatives et coupes vides
+sont tous dérivés de cette table (N, 4).
+Lissage morphologique des étiquettes sur toute la pile de coupes (cv2)
+"""
+
+from dataclasses import dataclass
+from typing import List, Union
+
+import cv2
+import numpy as np
+
+from services.prediction_artifacts import to_label_volume
+from services.preprocessing import CV_CN_MAX, NUM_CLASSES
+
+ENHANCING_CLASS = 3
+HISTOGRAM_CHUNK_SLICES = 32  # Coupes par bincount (borne la mémoire des index intp)
+
+# Lissage anti-pixelisation : fermeture 3×3, ouverture 2×2, dilatation 2×2
+CLOSING_KERNEL = np.ones((3, 3), dtype=np.uint8)
+SMALL_KERNEL = np.ones((2, 2), dtype=np.uint8)
+# Ancres cv2 alignées sur scipy.ndimage : centre par défaut (décalages -1/0 pour un noyau 2×2),
+# mais scipy réfléchit les noyaux pairs en dilatation (décalages 0/+1)
+CENTER_ANCHOR = (-1, -1)
+EVEN_DILATION_ANCHOR = (0, 0)
+
+
+def slice_class_histograms(labels: np.ndarray, num_classes: int = NUM_CLASSES,
+                           chunk_slices: int = HISTOGRAM_CHUNK_SLICES) -> np.ndarray:
+    """
+    Nombre de voxels de chaque classe par coupe, (N, num_classes) int64.
+
+    Chaque coupe reçoit un décalage de num_classes : un bincount par bloc de
+    coupes remplit d'un coup toutes leurs lignes. Les étiquettes doivent être
+    dans [0, num_classes).
+    """
+    num_slices = labels.shape[0]
+    histograms = np.zeros((num_slices, num_classes), dtype=np.int64)
+    offsets = (np.arange(chunk_slices, dtype=np.intp) * num_classes)[:, None]
+
+    for start in range(0, num_slices, chunk_slices):
+        chunk = np.asarray(labels[start:start + chunk_slices])
+        count = chunk.shape[0]
+        indices = chunk.reshape(count, -1).astype(np.intp) + offsets[:count]
+        histograms[start:start + count] = np.bincount(
+            indices.ravel(), minlength=count * num_classes
+        ).reshape(count, num_classes)
+
+    return histograms
+
+
+def select_representative_slices(slice_scores: np.ndarray, num_slices: int = 3) -> List[int]:
+    """Meilleur score global, puis meilleurs scores pénalisés par la proximité des coupes retenues"""
+    selected_slices = [int(np.argmax(slice_scores))]
+    positions = np.arange(len(slice_scores))
+
+    for _ in range(num_slices - 1):
+        remaining_scores = slice_scores.copy()
+        for selected in selected_slices:
+            distance_penalty = np.exp(-0.1 * np.abs(positions - selected))
+            remaining_scores *= (1 - 0.7 * distance_penalty)
+        selected_slices.append(int(np.argmax(remaining_scores)))
+
+    return sorted(selected_slices)
+
+
+@dataclass
+class SegmentationSummary:
+    """Étiquettes uint8 (N, H, W) et leur histogramme de classes par coupe (N, C)"""
+    labels: np.ndarray
+    histograms: np.ndarray
+
+    @property
+    def slice_size(self) -> int:
+        return int(np.prod(self.labels.shape[1:]))
+
+    @property
+    def class_voxels(self) -> np.ndarray:
+        """Voxels par classe sur tout le volume"""
+        return self.histograms.sum(axis=0)
+
+    @property
+    def tumor_voxels(self) -> int:
+        return int(self.histograms[:, 1:].sum())
+
+    @property
+    def empty_slices(self) -> np.ndarray:
+        """True pour les coupes sans aucun voxel tumoral"""
+        return self.histograms[:, 1:].sum(axis=1) == 0
+
+    def slice_scores(self) -> np.ndarray:
+        """Score de pertinence par coupe : diversité des classes, couverture et tumeur rehaussée"""
+        tumor_histograms = self.histograms[:, 1:]
+        classes_present = np.count_nonzero(tumor_histograms, axis=1)
+        tumor_coverage = tumor_histograms.sum(axis=1) / self.slice_size
+        enhancing_presence = self.histograms[:, ENHANCING_CLASS] / self.slice_size
+        return classes_present * 2 + tumor_coverage + enhancing_presence * 3
+
+    def representative_slices(self, num_slices: int = 3) -> List[int]:
+        return select_representative_slices(self.slice_scores(), num_slices)
+
+
+def summarize_predictions(predictions: Union[np.ndarray, SegmentationSummary]) -> SegmentationSummary:
+    """Softmax (N, H, W, C) ou étiquettes (N, H, W) -> résumé ; un résumé est retourné tel quel"""
+    if isinstance(predictions, SegmentationSummary):
+        return predictions
+    labels = to_label_volume(predictions)
+    return SegmentationSummary(labels=labels, histograms=slice_class_histograms(labels))
+
+
+def _erode(masks: np.ndarray, kernel: np.ndarray, anchor=CENTER_ANCHOR) -> np.ndarray:
+    # Hors image = 0, comme border_value=0 de scipy.ndimage
+    return cv2.erode(masks, kernel, anchor=anchor, borderType=cv2.BORDER_CONSTANT, borderValue=0)
+
+
+def _dilate(masks: np.ndarray, kernel: np.ndarray, anchor=CENTER_ANCHOR) -> np.ndarray:
+    return cv2.dilate(masks, kernel, anchor=anchor, borderType=cv2.BORDER_CONSTANT, borderValue=0)
+
+
+def _smooth_masks(masks: np.ndarray) -> np.ndarray:
+    """Fermeture 3×3, ouverture 2×2 puis dilatation 2×2 de masques (H, W, K) uint8"""
+    closed = _erode(_dilate(masks, CLOSING_KERNEL), CLOSING_KERNEL)
+    opened = _dilate(_erode(closed, SMALL_KERNEL), SMALL_KERNEL, EVEN_DILATION_ANCHOR)
+    return _dilate(opened, SMALL_KERNEL, EVEN_DILATION_ANCHOR)
+
+
+def smooth_labels(labels: np.ndarray) -> np.ndarray:
+    """
+    Lissage morphologique par classe d'une coupe (H, W) ou d'une pile (N, H, W) d'étiquettes.
+
+    Les coupes sont les canaux d'une même image cv2 : chaque opération traite
+    toute la pile en un appel. Pour chaque classe, fermeture 3×3, ouverture 2×2
+    et dilatation 2×2 ; les classes suivantes recouvrent les précédentes.
+    Résultat identique à scipy.ndimage (binary_closing / opening / dilation) coupe par coupe.
+    """
+    labels = np.asarray(labels)
+    stack = labels[np.newaxis] if labels.ndim == 2 else labels
+    smoothed = np.zeros(stack.shape, dtype=labels.dtype)
+
+    for start in range(0, stack.shape[0], CV_CN_MAX):
+        chunk = stack[start:start + CV_CN_MAX]
+        # (H, W, K) : une coupe par canal
+        channels = np.ascontiguousarray(np.moveaxis(chunk, 0, -1))
+        out = smoothed[start:start + CV_CN_MAX]
+        for class_idx in range(1, NUM_CLASSES):
+            masks = (channels == class_idx).view(np.uint8)
+            if not masks.any():
+                continue
+            # cv2 retire l'axe des canaux quand il n'y en a qu'un
+            result = _smooth_masks(masks).reshape(channels.shape)
+            out[np.moveaxis(result, -1, 0).astype(bool)] = class_idx
+
+    return smoothed[0] if labels.ndim == 2 else smoothed
+
+
+def smooth_prediction_labels(predictions: np.ndarray) -> np.ndarray:
+    """Étape volumique optionnelle (AI_LABEL_SMOOTHING) : softmax ou étiquettes -> étiquettes lissées"""
+    return smooth_labels(to_label_volume(predictions))
@@ -0,0 +1,130 @@
+"""
+🧠 CereBloom - Format de stockage des prédictions
+Volume d'étiquettes uint8 (+ softmax float16 optionnel) en .npy mappé en mémoire
+ou .npz compressé, avec un sidecar JSON (forme, hash du modèle, décalage des coupes)
+"""
+
+import os
+import json
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+import numpy as np
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+SIDECAR_FILENAME = "prediction.json"
+LABELS_FILENAME = "prediction_labels.npy"
+PROBABILITIES_FILENAME = "prediction_probabilities.npy"
+COMPRESSED_FILENAME = "prediction.npz"
+
+
+def to_label_volume(predictions: np.ndarray) -> np.ndarray:
+    """Étiquettes (N, H, W) uint8 ; un volume déjà étiqueté est retourné sans copie"""
+    if predictions.ndim == 3:
+        return predictions
+    return np.argmax(predictions, axis=-1).astype(np.uint8)
+
+
+def slice_labels(predictions: np.ndarray, slice_idx: int) -> np.ndarray:
+    """Étiquettes (H, W) d'une coupe, depuis un volume d'étiquettes ou de probabilités"""
+    return to_label_volume(predictions[slice_idx:slice_idx + 1])[0]
+
+
+@dataclass
+class PredictionArtifact:
+    """Prédictions relues depuis le disque (tableaux mappés en mémoire si format .npy)"""
+    labels: np.ndarray
+    probabilities: Optional[np.ndarray]
+    metadata: Dict[str, Any]
+
+    @property
+    def slice_offset(self) -> int:
+        return self.metadata["slice_offset"]
+
+
+def save_prediction_artifact(
+    output_dir: Union[str, Path],
+    predictions: np.ndarray,
+    slice_offset: int,
+    model_hash: Optional[str] = None,
+    store_probabilities: Optional[bool] = None,
+    compressed: Optional[bool] = None
+) -> Path:
+    """
+    Écrit les prédictions d'un volume dans output_dir.
+
+    predictions peut être un softmax (N, H, W, C) ou des étiquettes (N, H, W) ;
+    les probabilités ne sont stockées que si elles sont disponibles et demandées.
+    """
+    store_probabilities = (
+        settings.AI_PREDICTION_ARTIFACT_PROBABILITIES if store_probabilities is None else store_probabilities
+    )
+    compressed = settings.AI_PREDICTION_ARTIFACT_COMPRESSED if compressed is None else compressed
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    labels = to_label_volume(predictions)
+    probabilities = predictions.astype(np.float16) if store_probabilities and predictions.ndim == 4 else None
+
+    if compressed:
+        arrays = {"labels": labels}
+        if probabilities is not None:
+            arrays["probabilities"] = probabilities
+        with open(output_dir / COMPRESSED_FILENAME, "wb") as f:
+            np.savez_compressed(f, **arrays)
+    else:
+        np.save(output_dir / LABELS_FILENAME, labels)
+        if probabilities is not None:
+            np.save(output_dir / PROBABILITIES_FILENAME, probabilities)
+
+    metadata = {
+        "format_version": FORMAT_VERSION,
+        "storage": "npz" if compressed else "npy",
+        "shape": list(labels.shape),
+        "num_classes": int(predictions.shape[-1]) if predictions.ndim == 4 else None,
+        "has_probabilities": probabilities is not None,
+        "slice_offset": slice_offset,
+        "model_sha256": model_hash,
+        "created_at": datetime.now().isoformat()
+    }
+    sidecar_path = output_dir / SIDECAR_FILENAME
+    tmp_path = sidecar_path.with_name(sidecar_path.name + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(metadata, f, indent=2)
+    # Le sidecar est écrit en dernier : sa présence signale un artefact complet
+    os.replace(tmp_path, sidecar_path)
+
+    logger.info(f"💾 Artefact de prédiction: {labels.shape} ({metadata['storage']}) dans {output_dir}")
+    return sidecar_path
+
+
+def has_prediction_artifact(output_dir: Union[str, Path]) -> bool:
+    return (Path(output_dir) / SIDECAR_FILENAME).exists()
+
+
+def load_prediction_artifact(output_dir: Union[str, Path], load_probabilities: bool = False) -> PredictionArtifact:
+    """Relecture zéro copie (np.load mmap_mode='r') pour le format .npy"""
+    output_dir = Path(output_dir)
+    with open(output_dir / SIDECAR_FILENAME) as f:
+        metadata = json.load(f)
+
+    probabilities = None
+    if metadata["storage"] == "npz":
+        with np.load(output_dir / COMPRESSED_FILENAME) as archive:
+            labels = archive["labels"]
+            if load_probabilities and metadata["has_probabilities"]:
+                probabilities = archive["probabilities"]
+    else:
+        labels = np.load(output_dir / LABELS_FILENAME, mmap_mode="r")
+        if load_probabilities and metadata["has_probabilities"]:
+            probabilities = np.load(output_dir / PROBABILITIES_FILENAME, mmap_mode="r")
+
+    return PredictionArtifact(labels=labels, probabilities=probabilities, metadata=metadata)
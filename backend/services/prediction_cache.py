@@ -0,0 +1,193 @@
+"""
+🧠 CereBloom - Cache des prédictions de segmentation
+Relancer une segmentation sur des modalités inchangées réutilise les masques
+déjà calculés : seul le post-traitement (métriques, rendu) est refait
+"""
+
+import os
+import json
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from config.settings import settings
+from services.model_compiler import compute_model_hash
+from services.model_registry import IMG_SIZE, VOLUME_SLICES
+from services.prediction_artifacts import to_label_volume
+from services.preprocessing import VOLUME_START_AT
+from services.volume_reader import NORMALIZATION_SCHEME
+
+logger = logging.getLogger(__name__)
+
+CACHE_SUBDIR = "prediction_cache"
+# Hashs de fichiers gardés en mémoire (modalités récentes + modèle)
+FILE_HASH_MEMO_SIZE = 256
+
+
+class PredictionCache:
+    """Cache disque LRU (taille max) indexé par le contenu des entrées, le modèle et le prétraitement"""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: Optional[int] = None,
+                 store_probabilities: Optional[bool] = None):
+        self.cache_dir = Path(cache_dir or Path(settings.SEGMENTATION_RESULTS_DIR) / CACHE_SUBDIR)
+        self.max_bytes = max_bytes or settings.AI_PREDICTION_CACHE_MAX_MB * 1024 * 1024
+        self.store_probabilities = (
+            settings.AI_PREDICTION_CACHE_PROBABILITIES if store_probabilities is None else store_probabilities
+        )
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        # (chemin, taille, mtime) -> SHA-256, LRU borné : évite de relire un fichier inchangé
+        self._file_hashes: "OrderedDict[Tuple[str, int, float], str]" = OrderedDict()
+
+    def file_hash(self, path: str) -> str:
+        stat = os.stat(path)
+        memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime)
+        with self._lock:
+            if memo_key in self._file_hashes:
+                self._file_hashes.move_to_end(memo_key)
+                return self._file_hashes[memo_key]
+
+        # Hash calculé hors du verrou : la lecture du fichier peut être longue
+        digest = compute_model_hash(path)
+        with self._lock:
+            self._file_hashes[memo_key] = digest
+            self._file_hashes.move_to_end(memo_key)
+            while len(self._file_hashes) > FILE_HASH_MEMO_SIZE:
+                self._file_hashes.popitem(last=False)
+        return digest
+
+    @staticmethod
+    def preprocessing_params() -> Dict[str, Any]:
+        """Paramètres qui changent les prédictions à entrées identiques"""
+        return {
+            "normalization": NORMALIZATION_SCHEME,
+            "img_size": IMG_SIZE,
+            "volume_slices": VOLUME_SLICES,
+            "volume_start_at": VOLUME_START_AT,
+            "slice_filter": settings.AI_SLICE_FILTER,
+            "slice_min_intensity": settings.AI_SLICE_MIN_INTENSITY,
+            "slice_min_foreground": settings.AI_SLICE_MIN_FOREGROUND,
+            "brain_crop": settings.AI_BRAIN_CROP,
+            "brain_crop_padding": settings.AI_BRAIN_CROP_PADDING,
+            "inference_backend": settings.AI_INFERENCE_BACKEND,
+            "quantization_mode": settings.AI_QUANTIZATION_MODE
+        }
+
+    def build_key(self, modality_paths: Dict[str, str]) -> Optional[str]:
+        """
+        Clé SHA-256 : hash de chaque modalité + hash du modèle + paramètres de prétraitement.
+
+        Returns:
+            None si le fichier du modèle est absent : sans hash du modèle, pas de mise en cache
+        """
+        if not os.path.exists(settings.AI_MODEL_PATH):
+            logger.warning(f"⚠️ Modèle introuvable ({settings.AI_MODEL_PATH}) - cache des prédictions ignoré")
+            return None
+
+        parts = {
+            "modalities": {modality.lower(): self.file_hash(path) for modality, path in sorted(modality_paths.items())},
+            "model": self.file_hash(settings.AI_MODEL_PATH),
+            "preprocessing": self.preprocessing_params()
+        }
+        return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.npz"
+
+    def get(self, key: str) -> Optional[Tuple[np.ndarray, int]]:
+        """(étiquettes (N, H, W) uint8 ou probabilités (N, H, W, 4), coupes ignorées) ou None"""
+        path = self._entry_path(key)
+        try:
+            with np.load(path) as entry:
+                if "probabilities" in entry:
+                    predictions = entry["probabilities"].astype(np.float32)
+                else:
+                    # Volume d'étiquettes : suffisant pour les métriques et le rendu
+                    predictions = entry["mask"]
+                skipped_slices = int(entry["skipped_slices"])
+            os.utime(path)  # Dernier accès pour l'éviction LRU
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"⚠️ Entrée de cache illisible supprimée ({path.name}): {e}")
+            path.unlink(missing_ok=True)
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        logger.info(f"⚡ Prédictions retrouvées en cache ({key[:12]})")
+        return predictions, skipped_slices
+
+    def put(self, key: str, predictions: np.ndarray, skipped_slices: int = 0):
+        """Stocke le masque argmax (uint8) et, si configuré et disponibles, les probabilités en float16"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        arrays = {
+            "mask": to_label_volume(predictions),
+            "skipped_slices": np.array(skipped_slices)
+        }
+        if self.store_probabilities and predictions.ndim == 4:
+            arrays["probabilities"] = predictions.astype(np.float16)
+
+        path = self._entry_path(key)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def _evict(self):
+        """Supprime les entrées les moins récemment utilisées au-delà de max_bytes"""
+        with self._lock:
+            entries = sorted(
+                ((entry.stat().st_mtime, entry.stat().st_size, entry) for entry in self.cache_dir.glob("*.npz")),
+                key=lambda item: item[0]
+            )
+            total = sum(size for _, size, _ in entries)
+            for _, size, entry in entries:
+                if total <= self.max_bytes:
+                    break
+                entry.unlink(missing_ok=True)
+                total -= size
+                self.evictions += 1
+
+    async def aget(self, key: str) -> Optional[Tuple[np.ndarray, int]]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.get, key)
+
+    async def aput(self, key: str, predictions: np.ndarray, skipped_slices: int = 0):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.put, key, predictions, skipped_slices)
+
+    async def abuild_key(self, modality_paths: Dict[str, str]) -> Optional[str]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.build_key, modality_paths)
+
+    def get_stats(self) -> Dict[str, Any]:
+        entries = list(self.cache_dir.glob("*.npz")) if self.cache_dir.exists() else []
+        lookups = self.hits + self.misses
+        return {
+            "enabled": settings.AI_PREDICTION_CACHE,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(entries),
+            "size_bytes": sum(entry.stat().st_size for entry in entries),
+            "max_bytes": self.max_bytes
+        }
+
+
+# Instance globale du cache
+prediction_cache = PredictionCache()
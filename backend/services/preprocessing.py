@@ -0,0 +1,184 @@
+"""
+🧠 CereBloom - Prétraitement des volumes avant inférence
+Étapes partagées par les pipelines de segmentation (FastAPI, scripts)
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from config.settings import settings
+from services.model_registry import IMG_SIZE, VOLUME_SLICES
+from services.volume_reader import PERCENTILE_CHUNK_SLICES, iter_slabs
+
+logger = logging.getLogger(__name__)
+
+NUM_CLASSES = 4  # Fond, nécrose, œdème, rehaussement
+VOLUME_START_AT = 22  # Première coupe axiale envoyée au modèle (loadmodel.py)
+CV_CN_MAX = 512  # Nombre maximal de canaux accepté par cv2.resize
+
+
+@dataclass
+class SliceSelection:
+    """Coupes envoyées au modèle pour un volume (N, IMG_SIZE, IMG_SIZE, 2)"""
+    mask: np.ndarray
+
+    @property
+    def total(self) -> int:
+        return int(self.mask.size)
+
+    @property
+    def informative(self) -> int:
+        return int(self.mask.sum())
+
+    @property
+    def skipped(self) -> int:
+        return self.total - self.informative
+
+
+def select_informative_slices(batch: np.ndarray, min_intensity: Optional[float] = None,
+                              min_foreground: Optional[float] = None) -> SliceSelection:
+    """
+    Test d'intensité sur FLAIR/T1CE : une coupe est informative si au moins
+    min_foreground de ses pixels dépassent min_intensity sur l'une des deux modalités.
+    Les coupes hors volume (remplies de zéros) et de fond pur sont écartées.
+    """
+    if not settings.AI_SLICE_FILTER:
+        return SliceSelection(mask=np.ones(len(batch), dtype=bool))
+
+    min_intensity = settings.AI_SLICE_MIN_INTENSITY if min_intensity is None else min_intensity
+    min_foreground = settings.AI_SLICE_MIN_FOREGROUND if min_foreground is None else min_foreground
+
+    foreground = (batch > min_intensity).any(axis=-1)
+    fraction = foreground.reshape(len(batch), -1).mean(axis=1)
+    return SliceSelection(mask=fraction >= min_foreground)
+
+
+def fill_background(selection: SliceSelection, informative_predictions: np.ndarray,
+                    num_classes: int = NUM_CLASSES) -> np.ndarray:
+    """Replace les prédictions des coupes informatives ; les autres reçoivent un one-hot fond"""
+    spatial_shape = informative_predictions.shape[1:-1]
+    predictions = np.zeros((selection.total,) + spatial_shape + (num_classes,), dtype=np.float32)
+    predictions[~selection.mask, ..., 0] = 1.0
+    predictions[selection.mask] = informative_predictions
+    return predictions
+
+
+@dataclass
+class BrainBoundingBox:
+    """Boîte englobante 3D du cerveau (bornes semi-ouvertes, coordonnées du volume d'origine)"""
+    x0: int
+    x1: int
+    y0: int
+    y1: int
+    z0: int
+    z1: int
+    original_shape: Tuple[int, int, int]
+
+    def contains_slice(self, z_idx: int) -> bool:
+        return self.z0 <= z_idx < self.z1
+
+    def crop(self, slice_2d: np.ndarray) -> np.ndarray:
+        return slice_2d[self.x0:self.x1, self.y0:self.y1]
+
+    def model_grid_region(self, img_size: int = IMG_SIZE) -> Tuple[int, int, int, int]:
+        """Emprise de la boîte dans la grille IMG_SIZE x IMG_SIZE du volume complet"""
+        height, width = self.original_shape[:2]
+        return (
+            int(round(self.x0 * img_size / height)), int(round(self.x1 * img_size / height)),
+            int(round(self.y0 * img_size / width)), int(round(self.y1 * img_size / width))
+        )
+
+
+def compute_brain_bbox(volumes: Iterable[np.ndarray], padding: Optional[int] = None) -> BrainBoundingBox:
+    """
+    Boîte calculée une fois par volume sur le masque non nul de toutes les modalités.
+    L'emprise dans le plan est rendue carrée pour que le redimensionnement reste isotrope.
+    """
+    padding = settings.AI_BRAIN_CROP_PADDING if padding is None else padding
+    volumes = list(volumes)
+    shape = volumes[0].shape
+
+    # Lecture par blocs de coupes : fonctionne aussi sur les volumes paresseux (LazyVolume)
+    mask = np.zeros(shape, dtype=bool)
+    for volume in volumes:
+        for z_start, slab in zip(range(0, shape[2], PERCENTILE_CHUNK_SLICES), iter_slabs(volume)):
+            mask[:, :, z_start:z_start + slab.shape[2]] |= slab > 0
+
+    if not mask.any():
+        return BrainBoundingBox(0, shape[0], 0, shape[1], 0, shape[2], shape)
+
+    xs = np.flatnonzero(mask.any(axis=(1, 2)))
+    ys = np.flatnonzero(mask.any(axis=(0, 2)))
+    zs = np.flatnonzero(mask.any(axis=(0, 1)))
+
+    side = min(max(xs[-1] - xs[0], ys[-1] - ys[0]) + 1 + 2 * padding, shape[0], shape[1])
+
+    def square_span(low: int, high: int, size: int) -> Tuple[int, int]:
+        start = (low + high + 1 - side) // 2
+        start = min(max(start, 0), size - side)
+        return start, start + side
+
+    x0, x1 = square_span(xs[0], xs[-1], shape[0])
+    y0, y1 = square_span(ys[0], ys[-1], shape[1])
+    return BrainBoundingBox(
+        x0, x1, y0, y1,
+        max(zs[0] - padding, 0), min(zs[-1] + 1 + padding, shape[2]),
+        shape
+    )
+
+
+def uncrop_predictions(predictions: np.ndarray, bbox: BrainBoundingBox) -> np.ndarray:
+    """Replace des prédictions de la grille recadrée dans la grille IMG_SIZE du volume complet"""
+    rx0, rx1, ry0, ry1 = bbox.model_grid_region(predictions.shape[1])
+    restored = np.zeros_like(predictions)
+    restored[..., 0] = 1.0  # Hors boîte : fond
+
+    for slice_idx in range(len(predictions)):
+        if bbox.contains_slice(slice_idx + VOLUME_START_AT):
+            # cv2.resize attend (largeur, hauteur) = (colonnes, lignes)
+            restored[slice_idx, rx0:rx1, ry0:ry1] = cv2.resize(predictions[slice_idx], (ry1 - ry0, rx1 - rx0))
+    return restored
+
+
+def resize_slab(volume: np.ndarray, z_start: int, z_stop: int, size: int = IMG_SIZE,
+                bbox: Optional[BrainBoundingBox] = None) -> np.ndarray:
+    """
+    Redimensionne les coupes [z_start, z_stop) d'un volume (H, W, D) en un seul appel :
+    les coupes sont traitées comme les canaux d'une image, par paquets de CV_CN_MAX.
+    Retourne un tableau float32 (z_stop - z_start, size, size).
+    """
+    slab = volume[:, :, z_start:z_stop] if bbox is None else volume[bbox.x0:bbox.x1, bbox.y0:bbox.y1, z_start:z_stop]
+    slab = np.ascontiguousarray(slab, dtype=np.float32)
+    resized = np.empty((slab.shape[2], size, size), dtype=np.float32)
+
+    for start in range(0, slab.shape[2], CV_CN_MAX):
+        chunk = cv2.resize(slab[:, :, start:start + CV_CN_MAX], (size, size))
+        # cv2 retire l'axe des canaux quand il n'y en a qu'un
+        resized[start:start + CV_CN_MAX] = np.moveaxis(chunk.reshape(size, size, -1), -1, 0)
+    return resized
+
+
+def build_model_input(normalized_data: Dict[str, np.ndarray], bbox: Optional[BrainBoundingBox] = None) -> np.ndarray:
+    """
+    Tenseur float32 (VOLUME_SLICES, IMG_SIZE, IMG_SIZE, 2) FLAIR + T1CE à partir de VOLUME_START_AT.
+    Avec une boîte, seule la région du cerveau est redimensionnée et les coupes hors boîte restent à zéro.
+    """
+    flair, t1ce = normalized_data['flair'], normalized_data['t1ce']
+    X = np.zeros((VOLUME_SLICES, IMG_SIZE, IMG_SIZE, 2), dtype=np.float32)
+
+    # Coupes présentes dans le volume (et dans la boîte) ; les autres restent à zéro
+    z_start, z_stop = VOLUME_START_AT, min(VOLUME_START_AT + VOLUME_SLICES, flair.shape[2])
+    if bbox is not None:
+        z_start, z_stop = max(z_start, bbox.z0), min(z_stop, bbox.z1)
+    if z_stop <= z_start:
+        return X
+
+    for channel, volume in enumerate((flair, t1ce)):
+        X[z_start - VOLUME_START_AT:z_stop - VOLUME_START_AT, :, :, channel] = resize_slab(
+            volume, z_start, z_stop, IMG_SIZE, bbox
+        )
+    return X
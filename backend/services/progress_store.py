@@ -0,0 +1,182 @@
+"""
+🧠 CereBloom - Suivi de progression des segmentations
+Store en mémoire alimenté par le pipeline (étape, pourcentage, coupes traitées),
+avec repli sur une lecture légère de la base pour les segmentations inconnues
+du processus (redémarrage, autre worker)
+"""
+
+import time
+import logging
+import threading
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config.settings import settings
+from models.database_models import AISegmentation
+
+logger = logging.getLogger(__name__)
+
+# Étapes du pipeline et plage de pourcentage associée
+STAGES = {
+    "queued": (0.0, 0.0),
+    "load": (0.0, 10.0),
+    "preprocess": (10.0, 20.0),
+    "inference": (20.0, 70.0),
+    "metrics": (70.0, 75.0),
+    "render": (75.0, 95.0),
+    "save": (95.0, 100.0),
+    "done": (100.0, 100.0)
+}
+
+TERMINAL_STATUSES = ("COMPLETED", "FAILED", "VALIDATED")
+
+
+@dataclass
+class SegmentationProgress:
+    """Avancement d'une segmentation en cours"""
+    segmentation_id: str
+    patient_id: Optional[str] = None
+    doctor_id: Optional[str] = None
+    status: str = "PROCESSING"
+    stage: str = "queued"
+    percentage: float = 0.0
+    slices_done: Optional[int] = None
+    slices_total: Optional[int] = None
+    message: Optional[str] = None
+    started_at: datetime = field(default_factory=datetime.now)
+    updated_at: datetime = field(default_factory=datetime.now)
+    finished_at: Optional[datetime] = None
+
+    @property
+    def elapsed_seconds(self) -> float:
+        return ((self.finished_at or datetime.now()) - self.started_at).total_seconds()
+
+    @property
+    def estimated_remaining_seconds(self) -> Optional[float]:
+        """Extrapolation linéaire sur le pourcentage atteint"""
+        if self.status != "PROCESSING" or self.percentage <= 0:
+            return None
+        return self.elapsed_seconds * (100.0 - self.percentage) / self.percentage
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        for key in ("started_at", "updated_at", "finished_at"):
+            data[key] = data[key].isoformat() if data[key] else None
+        data["percentage"] = round(self.percentage, 1)
+        data["elapsed_seconds"] = round(self.elapsed_seconds, 1)
+        remaining = self.estimated_remaining_seconds
+        data["estimated_remaining_seconds"] = round(remaining, 1) if remaining is not None else None
+        return data
+
+
+class ProgressStore:
+    """Progression des segmentations, consultée à chaque polling de /status"""
+
+    def __init__(self, retention_seconds: Optional[int] = None):
+        self.retention_seconds = retention_seconds or settings.SEGMENTATION_PROGRESS_RETENTION_SECONDS
+        self._entries: Dict[str, SegmentationProgress] = {}
+        self._finished_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def start(self, segmentation_id: str, patient_id: Optional[str] = None, doctor_id: Optional[str] = None):
+        with self._lock:
+            self._entries[segmentation_id] = SegmentationProgress(
+                segmentation_id=segmentation_id, patient_id=patient_id, doctor_id=doctor_id
+            )
+            self._finished_at.pop(segmentation_id, None)
+
+    def set_stage(self, segmentation_id: str, stage: str, message: Optional[str] = None):
+        if stage not in STAGES:
+            raise ValueError(f"Étape inconnue: {stage}")
+        with self._lock:
+            entry = self._entries.get(segmentation_id)
+            if entry is None:
+                return
+            entry.stage = stage
+            entry.percentage = max(entry.percentage, STAGES[stage][0])
+            entry.message = message
+            entry.updated_at = datetime.now()
+        logger.info(f"📍 {segmentation_id}: {stage} ({entry.percentage:.0f}%)")
+
+    def set_slices(self, segmentation_id: str, done: int, total: int):
+        """Coupes traitées pendant l'inférence, interpolées dans la plage de l'étape"""
+        start, end = STAGES["inference"]
+        with self._lock:
+            entry = self._entries.get(segmentation_id)
+            if entry is None:
+                return
+            entry.stage = "inference"
+            entry.slices_done = done
+            entry.slices_total = total
+            entry.percentage = start + (end - start) * (done / total if total else 1.0)
+            entry.updated_at = datetime.now()
+
+    def finish(self, segmentation_id: str, status: str = "COMPLETED", message: Optional[str] = None):
+        with self._lock:
+            entry = self._entries.get(segmentation_id)
+            if entry is None:
+                return
+            entry.status = status
+            if status == "COMPLETED":
+                entry.stage = "done"
+                entry.percentage = 100.0
+            entry.message = message
+            entry.finished_at = entry.updated_at = datetime.now()
+            self._finished_at[segmentation_id] = time.monotonic()
+
+    def get(self, segmentation_id: str) -> Optional[SegmentationProgress]:
+        self._purge()
+        with self._lock:
+            return self._entries.get(segmentation_id)
+
+    def _purge(self):
+        """Oublie les segmentations terminées depuis plus de retention_seconds"""
+        now = time.monotonic()
+        with self._lock:
+            expired = [sid for sid, finished in self._finished_at.items() if now - finished > self.retention_seconds]
+            for sid in expired:
+                self._entries.pop(sid, None)
+                self._finished_at.pop(sid, None)
+
+    async def get_or_load(self, segmentation_id: str, db: AsyncSession) -> Optional[SegmentationProgress]:
+        """Store en mémoire, sinon colonnes légères de ai_segmentations (sans les résultats JSON)"""
+        entry = self.get(segmentation_id)
+        if entry is not None:
+            return entry
+
+        row = (await db.execute(
+            select(
+                AISegmentation.patient_id,
+                AISegmentation.doctor_id,
+                AISegmentation.status,
+                AISegmentation.started_at,
+                AISegmentation.completed_at
+            ).where(AISegmentation.id == segmentation_id)
+        )).first()
+        if row is None:
+            return None
+
+        status = row.status.value if hasattr(row.status, "value") else str(row.status)
+        return SegmentationProgress(
+            segmentation_id=segmentation_id,
+            patient_id=row.patient_id,
+            doctor_id=row.doctor_id,
+            status=status,
+            stage="done" if status in TERMINAL_STATUSES else "queued",
+            percentage=100.0 if status in TERMINAL_STATUSES else 0.0,
+            started_at=row.started_at or datetime.now(),
+            finished_at=row.completed_at
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            running = sum(1 for entry in self._entries.values() if entry.status == "PROCESSING")
+            return {"tracked": len(self._entries), "running": running}
+
+
+# Instance globale du store de progression
+progress_store = ProgressStore()
@@ -0,0 +1,190 @@
+"""
+🧠 CereBloom - Inférence en précision réduite (TFLite float16 / int8)
+Conversion de my_model.h5, et contrôle d'exactitude par Dice par classe face
+aux prédictions pleine précision avant toute activation
+"""
+
+import json
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from config.settings import settings
+from services.model_compiler import compute_model_hash
+from services.model_metrics import dice_coef_edema, dice_coef_enhancing, dice_coef_necrotic
+
+try:
+    import tensorflow as tf
+    TENSORFLOW_AVAILABLE = True
+except ImportError:
+    TENSORFLOW_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+QUANTIZATION_MODES = ("none", "float16", "int8")
+GATED_CLASSES = ("necrotic", "edema", "enhancing")
+
+
+class QuantizationGateError(RuntimeError):
+    """Le modèle quantifié s'écarte trop du modèle pleine précision"""
+
+
+def convert_to_tflite(keras_model, mode: str) -> bytes:
+    """float16 : poids en demi-précision ; int8 : quantification dynamique des poids"""
+    if mode not in QUANTIZATION_MODES[1:]:
+        raise ValueError(f"AI_QUANTIZATION_MODE invalide: {mode} (attendu: {', '.join(QUANTIZATION_MODES)})")
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(keras_model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if mode == "float16":
+        converter.target_spec.supported_types = [tf.float16]
+    # int8 sans representative_dataset = quantification "dynamic range"
+    return converter.convert()
+
+
+class TFLitePredictor:
+    """Interpréteur TFLite exposant la même interface .predict que Keras"""
+
+    def __init__(self, tflite_path: str, mode: str, num_threads: Optional[int] = None, batch_size: int = 32):
+        self.backend = f"tflite_{mode}"
+        self.batch_size = batch_size
+        self.interpreter = tf.lite.Interpreter(
+            model_path=tflite_path,
+            num_threads=settings.AI_TFLITE_THREADS if num_threads is None else num_threads
+        )
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self.input_shape = (None,) + tuple(self._input["shape"][1:])
+        self.output_shape = (None,) + tuple(self._output["shape"][1:])
+        self._allocated_batch = int(self._input["shape"][0])
+        # L'interpréteur n'est pas thread-safe
+        self._lock = threading.Lock()
+
+    def _run_chunk(self, chunk: np.ndarray) -> np.ndarray:
+        if len(chunk) != self._allocated_batch:
+            self.interpreter.resize_tensor_input(self._input["index"], chunk.shape)
+            self.interpreter.allocate_tensors()
+            self._allocated_batch = len(chunk)
+        self.interpreter.set_tensor(self._input["index"], chunk)
+        self.interpreter.invoke()
+        return self.interpreter.get_tensor(self._output["index"]).copy()
+
+    def predict(self, batch: np.ndarray, verbose: int = 0, batch_size: Optional[int] = None) -> np.ndarray:
+        batch = np.ascontiguousarray(batch, dtype=np.float32)
+        size = batch_size or self.batch_size
+        with self._lock:
+            outputs = [self._run_chunk(batch[start:start + size]) for start in range(0, len(batch), size)]
+        if not outputs:
+            return np.empty((0,) + self.output_shape[1:], dtype=np.float32)
+        return np.concatenate(outputs, axis=0)
+
+
+def load_reference_set(reference_dir: Optional[str] = None) -> List[np.ndarray]:
+    """
+    Volumes prétraités (N, 128, 128, 2) en .npy de vrais cas.
+
+    Raises:
+        QuantizationGateError: Aucun volume de référence : un Dice mesuré sur du bruit
+            ne dit rien de l'exactitude sur des IRM, le mode quantifié n'est pas activé
+    """
+    directory = Path(reference_dir or settings.AI_QUANTIZATION_REFERENCE_DIR)
+    volumes = [np.load(path).astype(np.float32) for path in sorted(directory.glob("*.npy"))] if directory.is_dir() else []
+
+    if not volumes:
+        raise QuantizationGateError(
+            f"aucun volume de référence (.npy) dans {directory} (AI_QUANTIZATION_REFERENCE_DIR) "
+            f"- contrôle d'exactitude impossible"
+        )
+    return volumes
+
+
+def _one_hot_argmax(predictions: np.ndarray) -> np.ndarray:
+    return np.eye(predictions.shape[-1], dtype=np.float32)[np.argmax(predictions, axis=-1)]
+
+
+def compute_class_dice(reference: np.ndarray, candidate: np.ndarray) -> Dict[str, float]:
+    """Dice par classe (définitions du modèle) entre segmentations pleine précision et quantifiée"""
+    y_true = _one_hot_argmax(reference)
+    y_pred = _one_hot_argmax(candidate)
+    scores = {}
+    for class_index, (name, dice_fn) in enumerate(
+        zip(GATED_CLASSES, (dice_coef_necrotic, dice_coef_edema, dice_coef_enhancing)), start=1
+    ):
+        if not y_true[..., class_index].any() and not y_pred[..., class_index].any():
+            # Classe absente des deux côtés : accord parfait (le Dice brut vaudrait 0)
+            scores[name] = 1.0
+        else:
+            scores[name] = float(dice_fn(y_true, y_pred))
+    return scores
+
+
+def evaluate_accuracy_gate(reference_predict: Callable[[np.ndarray], np.ndarray],
+                           candidate_predict: Callable[[np.ndarray], np.ndarray],
+                           volumes: List[np.ndarray], min_dice: float) -> Dict[str, Any]:
+    """Dice moyen par classe sur le jeu de référence ; échec si une classe passe sous min_dice"""
+    per_volume = [compute_class_dice(reference_predict(volume), candidate_predict(volume)) for volume in volumes]
+    mean_dice = {name: float(np.mean([scores[name] for scores in per_volume])) for name in GATED_CLASSES}
+    return {
+        "mean_dice": mean_dice,
+        "min_dice_threshold": min_dice,
+        "reference_volumes": len(volumes),
+        "passed": all(score >= min_dice for score in mean_dice.values())
+    }
+
+
+def load_quantized_predictor(model_path: str, keras_loader: Callable[[], Any], mode: Optional[str] = None,
+                             cache_dir: Optional[str] = None, min_dice: Optional[float] = None,
+                             reference_dir: Optional[str] = None) -> TFLitePredictor:
+    """
+    Prédicteur TFLite pour model_path, converti et validé au premier démarrage.
+
+    Le rapport du contrôle est mis en cache avec le modèle (hash du .h5, mode, seuil) ;
+    lève QuantizationGateError si l'accord Dice est insuffisant ou sans volumes de référence.
+    """
+    if not TENSORFLOW_AVAILABLE:
+        raise RuntimeError("TensorFlow requis pour la quantification")
+
+    mode = (mode or settings.AI_QUANTIZATION_MODE).lower()
+    min_dice = settings.AI_QUANTIZATION_MIN_DICE if min_dice is None else min_dice
+    model_hash = compute_model_hash(model_path)
+
+    directory = Path(cache_dir or settings.AI_COMPILED_MODEL_DIR)
+    tflite_path = directory / f"{model_hash[:16]}_{mode}.tflite"
+    report_path = directory / f"{model_hash[:16]}_{mode}.gate.json"
+
+    if tflite_path.exists() and report_path.exists():
+        with open(report_path) as f:
+            report = json.load(f)
+        if report["passed"] and report["min_dice_threshold"] == min_dice:
+            logger.info(f"⚡ Modèle {mode} réutilisé (Dice {report['mean_dice']})")
+            return TFLitePredictor(str(tflite_path), mode)
+
+    # Jeu de référence vérifié avant toute conversion
+    reference_volumes = load_reference_set(reference_dir)
+    keras_model = keras_loader()
+    if not tflite_path.exists():
+        directory.mkdir(parents=True, exist_ok=True)
+        tflite_path.write_bytes(convert_to_tflite(keras_model, mode))
+        logger.info(f"🛠️ Modèle converti en TFLite {mode}: {tflite_path}")
+
+    predictor = TFLitePredictor(str(tflite_path), mode)
+    report = evaluate_accuracy_gate(
+        lambda volume: keras_model.predict(volume, verbose=0),
+        predictor.predict,
+        reference_volumes,
+        min_dice
+    )
+    report.update({"model_sha256": model_hash, "mode": mode, "evaluated_at": datetime.now().isoformat()})
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+
+    if not report["passed"]:
+        raise QuantizationGateError(f"Mode {mode} refusé: Dice {report['mean_dice']} < {min_dice}")
+
+    logger.info(f"✅ Mode {mode} validé (Dice {report['mean_dice']})")
+    return predictor
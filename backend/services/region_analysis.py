@@ -0,0 +1,125 @@
+"""
+🧠 CereBloom - Analyse des régions tumorales
+Composantes connexes 3D par classe (scipy.ndimage.label), boîtes englobantes
+(find_objects), centroïdes et volumes par réductions ndimage, et statistiques
+d'intensité lues dans les modalités d'origine sur la grille du modèle
+"""
+
+from typing import Any, Dict, List, Mapping, Optional
+
+import numpy as np
+from scipy import ndimage
+
+from services.preprocessing import VOLUME_START_AT, resize_slab
+
+MAX_REPORTED_COMPONENTS = 10  # Composantes détaillées dans coordinates (les plus grosses)
+REFERENCE_MODALITY = "FLAIR"  # Modalité des champs *_intensity historiques
+
+
+def sample_modalities(volumes: Mapping[str, Any], num_slices: int, size: int,
+                      start_at: int = VOLUME_START_AT) -> Dict[str, np.ndarray]:
+    """
+    Intensités brutes de chaque modalité (H, W, D) rééchantillonnées sur la grille
+    des prédictions (num_slices, size, size), à partir de la coupe start_at.
+    Les coupes hors volume restent à zéro.
+    """
+    sampled = {}
+    for modality, volume in volumes.items():
+        grid = np.zeros((num_slices, size, size), dtype=np.float32)
+        z_stop = min(start_at + num_slices, volume.shape[2])
+        if z_stop > start_at:
+            grid[:z_stop - start_at] = resize_slab(volume, start_at, z_stop, size)
+        sampled[modality] = grid
+    return sampled
+
+
+def _bounding_box(region: tuple) -> Dict[str, List[int]]:
+    return {"min": [int(s.start) for s in region], "max": [int(s.stop) - 1 for s in region]}
+
+
+def _intensity_stats(intensity: np.ndarray, labeled: np.ndarray) -> Dict[str, float]:
+    """Statistiques sur l'union des composantes (étiquettes > 0)"""
+    minimum, maximum, _, _ = ndimage.extrema(intensity, labeled)
+    return {
+        "mean": float(ndimage.mean(intensity, labeled)),
+        "std": float(ndimage.standard_deviation(intensity, labeled)),
+        "min": float(minimum),
+        "max": float(maximum)
+    }
+
+
+def analyze_regions(mask: np.ndarray, intensities: Optional[Mapping[str, np.ndarray]] = None,
+                    max_components: int = MAX_REPORTED_COMPONENTS) -> Dict[str, Dict[str, Any]]:
+    """
+    Analyse d'un masque binaire 3D (une classe tumorale).
+
+    Args:
+        mask: Masque (N, H, W), non nul dans la classe
+        intensities: Modalités d'origine sur la même grille que le masque
+        max_components: Nombre de composantes détaillées (par taille décroissante)
+
+    Returns:
+        {"coordinates": ..., "statistical_features": ...} au format de TumorSegment
+    """
+    binary = np.asarray(mask) > 0
+    labeled, num_components = ndimage.label(binary)
+    intensities = intensities or {}
+
+    if num_components == 0:
+        coordinates = {
+            "centroid": [0, 0, 0], "bounding_box": {"min": [0, 0, 0], "max": [0, 0, 0]},
+            "voxel_count": 0, "num_components": 0, "components": []
+        }
+        statistics = {
+            "mean_intensity": 0.0, "std_intensity": 0.0, "max_intensity": 0.0, "min_intensity": 0.0,
+            "voxel_count": 0, "num_components": 0, "largest_component_voxels": 0, "modalities": {}
+        }
+        return {"coordinates": coordinates, "statistical_features": statistics}
+
+    index = np.arange(1, num_components + 1)
+    regions = ndimage.find_objects(labeled)
+    # Le masque binaire sert de poids uniforme : sommes = voxels, centres de masse = centroïdes
+    voxel_counts = np.asarray(ndimage.sum_labels(binary, labeled, index)).astype(np.int64)
+    centroids = np.asarray(ndimage.center_of_mass(binary, labeled, index), dtype=np.float64)
+    total_voxels = int(voxel_counts.sum())
+
+    # Centroïde global : moyenne des centroïdes pondérée par les volumes
+    centroid = (centroids * voxel_counts[:, None]).sum(axis=0) / total_voxels
+    bounding_box = {
+        "min": [int(min(region[axis].start for region in regions)) for axis in range(binary.ndim)],
+        "max": [int(max(region[axis].stop for region in regions)) - 1 for axis in range(binary.ndim)]
+    }
+
+    largest_first = np.argsort(voxel_counts, kind="stable")[::-1][:max_components]
+    components = [
+        {
+            "label": int(index[i]),
+            "voxel_count": int(voxel_counts[i]),
+            "centroid": [float(c) for c in centroids[i]],
+            "bounding_box": _bounding_box(regions[i])
+        }
+        for i in largest_first
+    ]
+
+    coordinates = {
+        "centroid": [float(c) for c in centroid],
+        "bounding_box": bounding_box,
+        "voxel_count": total_voxels,
+        "num_components": int(num_components),
+        "components": components
+    }
+
+    modality_stats = {modality: _intensity_stats(intensity, labeled) for modality, intensity in intensities.items()}
+    reference = modality_stats.get(REFERENCE_MODALITY) or next(iter(modality_stats.values()), None)
+    statistics = {
+        "mean_intensity": reference["mean"] if reference else 0.0,
+        "std_intensity": reference["std"] if reference else 0.0,
+        "max_intensity": reference["max"] if reference else 0.0,
+        "min_intensity": reference["min"] if reference else 0.0,
+        "voxel_count": total_voxels,
+        "num_components": int(num_components),
+        "largest_component_voxels": int(voxel_counts.max()),
+        "modalities": modality_stats
+    }
+
+    return {"coordinates": coordinates, "statistical_features": statistics}
@@ -0,0 +1,84 @@
+"""
+🧠 CereBloom - Pool de rendu
+matplotlib n'est pas thread-safe : les panneaux du rapport et les images
+individuelles sont rendus dans des processus dédiés (backend Agg préconfiguré).
+Toutes les tâches d'un cas partent en même temps : la durée du rendu est bornée
+par le panneau le plus lent et non par la somme des panneaux
+"""
+
+import asyncio
+import functools
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+RenderTask = Tuple[Callable[..., Any], Tuple[Any, ...]]
+
+
+def _init_render_worker():
+    """Initialisation d'un worker de rendu : backend matplotlib non interactif"""
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+class RenderPool:
+    """Pool de processus partagé par les rendus de toutes les segmentations"""
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or settings.AI_RENDER_WORKERS
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.submitted_tasks = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Crée le pool à la première utilisation"""
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # spawn : les workers n'importent que les modules de rendu (ni TensorFlow, ni le modèle)
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=_init_render_worker
+                    )
+                    logger.info(f"🎨 Pool de rendu démarré: x{self.max_workers}")
+        return self._executor
+
+    async def map(self, tasks: Sequence[RenderTask]) -> List[Any]:
+        """
+        Exécute toutes les tâches (fonction de module, arguments picklables) en parallèle.
+
+        Returns:
+            Résultats dans l'ordre des tâches
+        """
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        self.submitted_tasks += len(tasks)
+        return await asyncio.gather(*(
+            loop.run_in_executor(executor, functools.partial(fn, *args)) for fn, args in tasks
+        ))
+
+    def shutdown(self, wait: bool = True):
+        """Arrête le pool (appelé à l'arrêt de l'application)"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
+                logger.info("🎨 Pool de rendu arrêté")
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "max_workers": self.max_workers,
+            "started": self._executor is not None,
+            "submitted_tasks": self.submitted_tasks
+        }
+
+
+# Instance globale du pool de rendu
+render_pool = RenderPool()
@@ -0,0 +1,124 @@
+"""
+🧠 CereBloom - Panneaux du rapport médical
+Le rapport complet est découpé en bandes indépendantes (en-tête, une ligne par
+coupe, conclusions) rendues chacune sur sa propre figure matplotlib (canvas Agg,
+sans état pyplot), puis empilées en une seule image PNG.
+Aucune dépendance à TensorFlow : module importable par les workers de rendu
+"""
+
+from pathlib import Path
+from typing import List, Sequence, Union
+
+import cv2
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from services.segmentation_rendering import SliceData, render_segmentation
+
+REPORT_DPI = 300
+REPORT_WIDTH_IN = 24  # Largeur de la figure du rapport d'origine (24 × 18 pouces)
+REPORT_ROW_HEIGHT_IN = 3.6  # Hauteur d'une ligne de la grille d'origine (18 pouces / 5 lignes)
+REPORT_TITLE_HEIGHT_IN = 1.2  # Bandeau du titre principal
+REPORT_CONCLUSION_HEIGHT_IN = 3.0
+
+COLUMN_TITLES = ['T1', 'T1CE', 'T2', 'FLAIR', 'Segmentation', 'Superposition']
+IMAGE_MODALITIES = ['t1', 't1ce', 't2', 'flair']
+
+
+def _figure(height_in: float, dpi: int) -> Figure:
+    figure = Figure(figsize=(REPORT_WIDTH_IN, height_in), dpi=dpi, facecolor='white')
+    FigureCanvasAgg(figure)
+    return figure
+
+
+def figure_to_array(figure: Figure) -> np.ndarray:
+    """Rendu Agg de la figure en image RGB (h, w, 3) uint8"""
+    figure.canvas.draw()
+    return np.asarray(figure.canvas.buffer_rgba())[..., :3].copy()
+
+
+def render_header_panel(title: str, info_text: str, metrics_text: str, legend_text: str,
+                        dpi: int = REPORT_DPI) -> np.ndarray:
+    """Titre, encadrés patient / volumétrie / légende et titres des colonnes"""
+    height_in = REPORT_TITLE_HEIGHT_IN + 2 * REPORT_ROW_HEIGHT_IN
+    figure = _figure(height_in, dpi)
+    figure.suptitle(title, fontsize=20, fontweight='bold', y=1 - 0.4 / height_in)
+    grid = figure.add_gridspec(2, 6, top=1 - REPORT_TITLE_HEIGHT_IN / height_in, bottom=0.0)
+
+    boxes = [
+        (info_text, dict(fontsize=10, fontfamily='monospace',
+                         bbox=dict(boxstyle="round,pad=0.5", facecolor="lightblue", alpha=0.3))),
+        (metrics_text, dict(fontsize=10, fontfamily='monospace',
+                            bbox=dict(boxstyle="round,pad=0.5", facecolor="lightgreen", alpha=0.3))),
+        (legend_text, dict(fontsize=11, fontweight='bold'))
+    ]
+    for box_idx, (text, style) in enumerate(boxes):
+        ax = figure.add_subplot(grid[0, 2 * box_idx:2 * box_idx + 2])
+        ax.axis('off')
+        ax.text(0.05, 0.95, text, transform=ax.transAxes, verticalalignment='top', **style)
+
+    for col, column_title in enumerate(COLUMN_TITLES):
+        ax = figure.add_subplot(grid[1, col])
+        ax.text(0.5, 0.5, column_title, transform=ax.transAxes,
+                ha='center', va='center', fontsize=14, fontweight='bold')
+        ax.axis('off')
+
+    return figure_to_array(figure)
+
+
+def render_slice_panel(slice_data: SliceData, lut: np.ndarray, dpi: int = REPORT_DPI) -> np.ndarray:
+    """Ligne d'une coupe : 4 modalités, segmentation haute qualité et superposition T1CE"""
+    figure = _figure(REPORT_ROW_HEIGHT_IN, dpi)
+    grid = figure.add_gridspec(1, 6)
+    slice_number = slice_data.slice_idx + 1
+
+    for col, modality in enumerate(IMAGE_MODALITIES):
+        ax = figure.add_subplot(grid[0, col])
+        img_data = cv2.resize(slice_data.modalities[modality], (256, 256), interpolation=cv2.INTER_CUBIC)
+        if img_data.max() > img_data.min():
+            img_data = (img_data - img_data.min()) / (img_data.max() - img_data.min())
+        ax.imshow(img_data, cmap='gray', aspect='equal', interpolation='bilinear')
+        ax.set_title(f'Coupe {slice_number}', fontsize=9)
+        ax.axis('off')
+
+    segmentation_hq, seg_colored_hq = render_segmentation(slice_data.labels[np.newaxis], lut)
+    segmentation_hq, seg_colored_hq = segmentation_hq[0], seg_colored_hq[0]
+
+    ax_seg = figure.add_subplot(grid[0, 4])
+    ax_seg.imshow(seg_colored_hq, interpolation='bilinear')
+    ax_seg.set_title(f'Segmentation HQ - Coupe {slice_number}', fontsize=9)
+    ax_seg.axis('off')
+
+    ax_overlay = figure.add_subplot(grid[0, 5])
+    background = cv2.resize(slice_data.t1ce_normalized, (256, 256))
+    ax_overlay.imshow(background, cmap='gray', alpha=1.0, interpolation='bilinear')
+    tumor_mask_hq = segmentation_hq > 0
+    if np.any(tumor_mask_hq):
+        seg_overlay_hq = np.ma.masked_array(seg_colored_hq, ~np.stack([tumor_mask_hq] * 3, axis=-1))
+        ax_overlay.imshow(seg_overlay_hq, alpha=0.5, interpolation='bilinear')
+    ax_overlay.set_title(f'T1CE + Segmentation HQ - Coupe {slice_number}', fontsize=9)
+    ax_overlay.axis('off')
+
+    return figure_to_array(figure)
+
+
+def render_conclusion_panel(conclusion_text: str, dpi: int = REPORT_DPI) -> np.ndarray:
+    """Encadré des conclusions en bas du rapport"""
+    figure = _figure(REPORT_CONCLUSION_HEIGHT_IN, dpi)
+    figure.text(0.02, 0.95, conclusion_text, fontsize=11, verticalalignment='top',
+                bbox=dict(boxstyle="round,pad=0.8", facecolor="lightyellow", alpha=0.8))
+    return figure_to_array(figure)
+
+
+def assemble_panels(panels: Sequence[np.ndarray], output_path: Union[str, Path]) -> str:
+    """Empile les bandes RGB (fond blanc si largeurs différentes) et écrit le PNG du rapport"""
+    width = max(panel.shape[1] for panel in panels)
+    rows: List[np.ndarray] = [
+        np.pad(panel, ((0, 0), (0, width - panel.shape[1]), (0, 0)), constant_values=255)
+        for panel in panels
+    ]
+    report = cv2.cvtColor(np.concatenate(rows, axis=0), cv2.COLOR_RGB2BGR)
+    if not cv2.imwrite(str(output_path), report):
+        raise ValueError(f"Écriture du rapport impossible: {output_path}")
+    return str(output_path)
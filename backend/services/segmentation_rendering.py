@@ -0,0 +1,171 @@
+"""
+🧠 CereBloom - Rendu haute qualité des segmentations
+Les cartes des 4 classes (one-hot ou softmax) sont agrandies ensemble par un seul
+cv2.resize bicubique, puis argmax et coloration par table de correspondance (4, 3) uint8.
+Images individuelles (niveaux de gris, masque coloré, superposition) composées
+directement en uint8 et encodées en PNG par cv2.imencode, sans figure matplotlib.
+Aucune dépendance à TensorFlow : module importable par les workers de rendu
+"""
+
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+from services.postprocessing import NUM_CLASSES, smooth_labels
+
+RENDER_SIZE = (256, 256)
+RENDER_CHUNK_SLICES = 16  # Coupes agrandies par appel (16 × 4 canaux float32 en 256×256 ≈ 16 Mo)
+
+INDIVIDUAL_IMAGE_MODALITIES = ['t1', 't1ce', 't2', 'flair']
+INDIVIDUAL_IMAGE_KINDS = INDIVIDUAL_IMAGE_MODALITIES + ['segmentation', 'overlay']
+
+
+@dataclass
+class SliceData:
+    """Coupes 2D d'une coupe représentative : légères et picklables pour les workers de rendu"""
+    slice_idx: int
+    modalities: Dict[str, np.ndarray]  # Intensités brutes (H, W) par modalité
+    t1ce_normalized: Optional[np.ndarray] = None  # Fond de la superposition
+    labels: Optional[np.ndarray] = None  # Étiquettes (H, W) de la segmentation
+
+
+def class_color_lut(classes: Dict[int, Dict[str, Any]]) -> np.ndarray:
+    """Table (C, 3) uint8 des couleurs hexadécimales '#RRGGBB' de chaque classe"""
+    lut = np.zeros((len(classes), 3), dtype=np.uint8)
+    for class_idx, class_info in classes.items():
+        color_hex = class_info['color']
+        lut[class_idx] = [int(color_hex[i:i + 2], 16) for i in (1, 3, 5)]
+    return lut
+
+
+def _class_maps(segmentation: np.ndarray, num_classes: int) -> np.ndarray:
+    """(N, H, W) étiquettes ou (N, H, W, C) probabilités -> cartes (N, H, W, C) float32"""
+    if segmentation.ndim == 4:
+        return np.asarray(segmentation, dtype=np.float32)
+    return np.eye(num_classes, dtype=np.float32)[segmentation]
+
+
+def upsample_labels(segmentation: np.ndarray, target_size: Tuple[int, int] = RENDER_SIZE,
+                    num_classes: int = NUM_CLASSES) -> np.ndarray:
+    """
+    Agrandit une pile d'étiquettes (N, H, W) ou de probabilités (N, H, W, C).
+
+    Les C cartes de RENDER_CHUNK_SLICES coupes sont les canaux d'une seule image :
+    un cv2.resize bicubique par bloc, puis argmax vers des étiquettes uint8
+    (N, target_h, target_w). Les frontières entre classes restent nettes et aucune
+    classe intermédiaire n'apparaît entre deux classes voisines.
+    """
+    width, height = target_size
+    num_slices = segmentation.shape[0]
+    upsampled = np.empty((num_slices, height, width), dtype=np.uint8)
+
+    for start in range(0, num_slices, RENDER_CHUNK_SLICES):
+        maps = _class_maps(np.asarray(segmentation[start:start + RENDER_CHUNK_SLICES]), num_classes)
+        count = maps.shape[0]
+        # (H, W, count × C) : toutes les cartes du bloc dans un seul appel
+        channels = np.ascontiguousarray(np.moveaxis(maps, 0, 2)).reshape(maps.shape[1], maps.shape[2], -1)
+        resized = cv2.resize(channels, (width, height), interpolation=cv2.INTER_CUBIC)
+        resized = resized.reshape(height, width, count, num_classes)
+        upsampled[start:start + count] = np.moveaxis(np.argmax(resized, axis=-1), -1, 0)
+
+    return upsampled
+
+
+def render_segmentation(segmentation: np.ndarray, lut: np.ndarray,
+                        target_size: Tuple[int, int] = RENDER_SIZE) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Segmentation haute qualité d'une pile d'étiquettes (N, H, W) ou de probabilités (N, H, W, C).
+
+    Returns:
+        Étiquettes agrandies et lissées (N, h, w) uint8 et images RGB (N, h, w, 3) uint8 colorées par lut
+    """
+    labels = smooth_labels(upsample_labels(segmentation, target_size, lut.shape[0]))
+    return labels, lut[labels]
+
+
+def grayscale_image(slice_2d: np.ndarray, target_size: Tuple[int, int] = RENDER_SIZE,
+                    interpolation: int = cv2.INTER_CUBIC) -> np.ndarray:
+    """Coupe agrandie puis étirée sur [0, 255] (min-max, comme imshow cmap='gray')"""
+    resized = cv2.resize(np.asarray(slice_2d, dtype=np.float32), target_size, interpolation=interpolation)
+    low, high = float(resized.min()), float(resized.max())
+    if high <= low:
+        return np.zeros(resized.shape, dtype=np.uint8)
+    return np.round((resized - low) * (255.0 / (high - low))).astype(np.uint8)
+
+
+def overlay_image(background: np.ndarray, labels: np.ndarray, colored: np.ndarray,
+                  alpha: float = 0.5) -> np.ndarray:
+    """Fond en niveaux de gris (h, w) uint8 + couleurs des voxels tumoraux mélangées à alpha"""
+    blended = np.repeat(background[..., np.newaxis], 3, axis=-1)
+    tumor = labels > 0
+    blended[tumor] = np.round(
+        (1.0 - alpha) * blended[tumor] + alpha * colored[tumor]
+    ).astype(np.uint8)
+    return blended
+
+
+def encode_png(image: np.ndarray, output_size: int) -> bytes:
+    """Image uint8 (h, w) ou RGB (h, w, 3) agrandie en bilinéaire puis encodée en PNG"""
+    if image.shape[0] != output_size:
+        image = cv2.resize(image, (output_size, output_size), interpolation=cv2.INTER_LINEAR)
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+    ok, buffer = cv2.imencode(".png", image)
+    if not ok:
+        raise ValueError("Encodage PNG impossible")
+    return buffer.tobytes()
+
+
+def write_png(path: Union[str, Path], image: np.ndarray, output_size: int):
+    """Écriture atomique : un lecteur concurrent ne voit jamais un PNG partiel"""
+    path = Path(path)
+    tmp_path = path.with_name(".tmp_" + path.name)
+    with open(tmp_path, "wb") as f:
+        f.write(encode_png(image, output_size))
+    os.replace(tmp_path, path)
+
+
+def render_slice_image(kind: str, slice_data: SliceData, segmentation_hq: Optional[np.ndarray] = None,
+                       seg_colored_hq: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Image individuelle uint8 d'une coupe.
+
+    Args:
+        kind: Modalité ('t1', 't1ce', 't2', 'flair'), 'segmentation' ou 'overlay'
+        slice_data: Coupes 2D de la coupe
+        segmentation_hq: Étiquettes haute qualité (256×256), pour 'segmentation' et 'overlay'
+        seg_colored_hq: Segmentation colorée correspondante (RGB uint8)
+    """
+    if kind in INDIVIDUAL_IMAGE_MODALITIES:
+        # Agrandissement bicubique et étirement min-max (IDENTIQUE au rapport complet)
+        return grayscale_image(slice_data.modalities[kind])
+    if kind == 'segmentation':
+        return seg_colored_hq
+    if kind == 'overlay':
+        # T1CE normalisée + segmentation mélangée à 50 %
+        background = grayscale_image(slice_data.t1ce_normalized, interpolation=cv2.INTER_LINEAR)
+        return overlay_image(background, segmentation_hq, seg_colored_hq)
+    raise ValueError(f"Type d'image inconnu: {kind}")
+
+
+def write_slice_images(slice_data: SliceData, lut: np.ndarray, individual_dir: Union[str, Path],
+                       output_size: int, segmentation: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> List[str]:
+    """
+    Écrit les 6 PNG slice_N_<type>.png d'une coupe.
+
+    segmentation : (étiquettes, couleurs) haute qualité déjà rendues, sinon calculées ici
+    """
+    if segmentation is None:
+        labels, colored = render_segmentation(slice_data.labels[np.newaxis], lut)
+        segmentation = (labels[0], colored[0])
+
+    filenames = []
+    for kind in INDIVIDUAL_IMAGE_KINDS:
+        filename = f"slice_{slice_data.slice_idx}_{kind}.png"
+        write_png(Path(individual_dir) / filename, render_slice_image(kind, slice_data, *segmentation), output_size)
+        filenames.append(filename)
+    return filenames
@@ -0,0 +1,250 @@
+"""
+🧠 CereBloom - Lecture paresseuse des volumes NIfTI
+Les volumes sont ouverts via les proxies dataobj de nibabel (mmap pour les .nii) :
+seules les coupes demandées sont lues, en float32, au moment où une étape en a besoin
+"""
+
+import os
+import sys
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import nibabel as nib
+from nibabel.volumeutils import array_to_file
+
+try:
+    import resource
+except ImportError:  # Windows : pas de getrusage
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+VOLUME_DTYPE = np.float32
+PERCENTILE_CHUNK_SLICES = 32  # Coupes lues à la fois pour les statistiques d'intensité
+NORMALIZATION_SCHEME = "percentile_1_99"
+INTENSITY_STATS_KEY = "intensity_stats"  # Clé des statistiques dans MedicalImage.image_metadata
+WORKING_COPY_KEY = "working_copy"  # Copie .nii non compressée d'un upload .nii.gz
+DATA_OFFSET_ALIGNMENT = 4096  # Données de la copie de travail alignées sur une page mémoire
+
+
+class LazyVolume:
+    """
+    Volume (H, W, D) lu à la demande : volume[:, :, z] ne lit qu'une coupe.
+    Se comporte comme un tableau en lecture (shape, indexation, np.asarray).
+    """
+
+    def __init__(self, path: str, intensity_bounds: Optional[Tuple[float, float]] = None):
+        self.path = str(path)
+        # Percentiles 1/99 déjà connus (calculés à l'upload) : la normalisation ne relit pas le volume
+        self.intensity_bounds = intensity_bounds
+        self._image = nib.load(self.path, mmap=True)
+
+    def __reduce__(self):
+        # Seul le chemin traverse les frontières de processus : le volume est rouvert de l'autre côté
+        return (self.__class__, (self.path, self.intensity_bounds))
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self._image.shape
+
+    @property
+    def ndim(self) -> int:
+        return len(self.shape)
+
+    @property
+    def dtype(self):
+        return np.dtype(VOLUME_DTYPE)
+
+    @property
+    def header(self):
+        return self._image.header
+
+    @property
+    def affine(self):
+        return self._image.affine
+
+    def __getitem__(self, key) -> np.ndarray:
+        # Copie détachée du fichier : aucune vue mmap ne survit à la lecture
+        return np.array(self._image.dataobj[key], dtype=VOLUME_DTYPE)
+
+    def slab(self, z_start: int, z_stop: int) -> np.ndarray:
+        return self[:, :, z_start:z_stop]
+
+    def read(self) -> np.ndarray:
+        """Volume complet en float32 (à éviter hors des traitements globaux)"""
+        return self[...]
+
+    def __array__(self, dtype=None, copy=None):
+        data = self.read()
+        return data if dtype is None else data.astype(dtype, copy=False)
+
+    def __repr__(self) -> str:
+        return f"LazyVolume({self.path!r}, shape={self.shape})"
+
+
+def iter_slabs(volume, chunk_slices: int = PERCENTILE_CHUNK_SLICES):
+    """Parcourt un volume (tableau ou LazyVolume) par blocs de coupes axiales"""
+    for z_start in range(0, volume.shape[2], chunk_slices):
+        yield np.asarray(volume[:, :, z_start:z_start + chunk_slices], dtype=VOLUME_DTYPE)
+
+
+def partition_percentiles(values: np.ndarray, percentiles=(1, 99)) -> Tuple[float, ...]:
+    """
+    Percentiles par np.partition (sélection en O(n), sans tri complet).
+    Même interpolation linéaire que np.percentile.
+    """
+    if values.size == 0:
+        return tuple(0.0 for _ in percentiles)
+
+    last = values.size - 1
+    positions = [last * q / 100.0 for q in percentiles]
+    kth = sorted({int(position) for position in positions} | {min(int(position) + 1, last) for position in positions})
+    partitioned = np.partition(values, kth)
+
+    result = []
+    for position in positions:
+        low = int(position)
+        high = min(low + 1, last)
+        low_value, high_value = float(partitioned[low]), float(partitioned[high])
+        result.append(low_value + (high_value - low_value) * (position - low))
+    return tuple(result)
+
+
+def nonzero_percentiles(volume, percentiles=(1, 99), chunk_slices: int = PERCENTILE_CHUNK_SLICES) -> Tuple[float, ...]:
+    """Percentiles des voxels non nuls ; seuls ces voxels sont gardés en mémoire"""
+    return partition_percentiles(_nonzero_values(volume, chunk_slices), percentiles)
+
+
+def _nonzero_values(volume, chunk_slices: int = PERCENTILE_CHUNK_SLICES) -> np.ndarray:
+    return np.concatenate([slab[slab > 0] for slab in iter_slabs(volume, chunk_slices)])
+
+
+def compute_intensity_stats(volume) -> Dict[str, Any]:
+    """Statistiques de normalisation d'un volume, stockées dans MedicalImage.image_metadata"""
+    values = _nonzero_values(volume)
+    p1, p99 = partition_percentiles(values, (1, 99))
+    return {
+        "scheme": NORMALIZATION_SCHEME,
+        "p1": p1,
+        "p99": p99,
+        "nonzero_voxels": int(values.size)
+    }
+
+
+def compute_file_intensity_stats(path: str) -> Dict[str, Any]:
+    return compute_intensity_stats(open_volume(path))
+
+
+def bounds_from_metadata(image_metadata: Optional[Dict[str, Any]]) -> Optional[Tuple[float, float]]:
+    """(p1, p99) enregistrés à l'upload, ou None s'ils sont absents ou d'un autre schéma"""
+    stats = (image_metadata or {}).get(INTENSITY_STATS_KEY)
+    if not stats or stats.get("scheme") != NORMALIZATION_SCHEME:
+        return None
+    return stats["p1"], stats["p99"]
+
+
+class NormalizedVolume:
+    """
+    Normalisation percentile (1-99) appliquée à la lecture :
+    clip((x - p1) / (p99 - p1), 0, 1) sur les seules coupes demandées.
+    Les bornes viennent des métadonnées de l'image quand elles existent,
+    sinon elles sont calculées au premier accès puis mémorisées.
+    """
+
+    def __init__(self, volume, bounds: Optional[Tuple[float, float]] = None):
+        self.volume = volume
+        self._bounds = bounds if bounds is not None else getattr(volume, "intensity_bounds", None)
+        self._lock = threading.Lock()
+
+    def __reduce__(self):
+        return (self.__class__, (self.volume, self._bounds))
+
+    @property
+    def bounds(self) -> Tuple[float, float]:
+        with self._lock:
+            if self._bounds is None:
+                self._bounds = nonzero_percentiles(self.volume)
+            return self._bounds
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self.volume.shape
+
+    @property
+    def ndim(self) -> int:
+        return len(self.shape)
+
+    @property
+    def dtype(self):
+        return np.dtype(VOLUME_DTYPE)
+
+    def __getitem__(self, key) -> np.ndarray:
+        p1, p99 = self.bounds
+        data = np.asarray(self.volume[key], dtype=VOLUME_DTYPE)
+        scale = VOLUME_DTYPE(1.0 / (p99 - p1)) if p99 > p1 else VOLUME_DTYPE(0.0)
+        return np.clip((data - VOLUME_DTYPE(p1)) * scale, 0, 1)
+
+    def read(self) -> np.ndarray:
+        return self[...]
+
+    def __array__(self, dtype=None, copy=None):
+        data = self.read()
+        return data if dtype is None else data.astype(dtype, copy=False)
+
+
+def create_working_copy(path: str) -> Optional[str]:
+    """
+    Écrit à côté d'un .nii.gz une copie .nii non compressée (données à un offset aligné sur
+    une page), lisible par mmap coupe par coupe. L'original est conservé pour le téléchargement.
+    Retourne le chemin de la copie, ou None si le fichier n'est pas compressé.
+    """
+    path = Path(path)
+    if not path.name.lower().endswith(".nii.gz"):
+        return None
+
+    target = path.with_name(path.name[:-len(".nii.gz")] + ".work.nii")
+    image = nib.load(str(path))
+    # Valeurs stockées telles quelles (type d'origine) : scl_slope/scl_inter restent dans l'en-tête
+    # et sont appliqués à la lecture, comme pour l'original
+    raw = image.dataobj.get_unscaled()
+    header = image.header.copy()
+    header_size = header.single_vox_offset + header.extensions.get_sizeondisk()
+    header.set_data_offset(-(-header_size // DATA_OFFSET_ALIGNMENT) * DATA_OFFSET_ALIGNMENT)
+
+    # Écriture directe (en-tête puis données) : nib.save recalculerait la mise à l'échelle
+    tmp_path = target.with_name(".tmp_" + target.name)
+    with open(tmp_path, "wb") as f:
+        header.write_to(f)
+        array_to_file(raw, f, header.get_data_dtype(), offset=header.get_data_offset(), order="F")
+    os.replace(tmp_path, target)
+    logger.info(f"🗜️ Copie de travail non compressée: {target.name}")
+    return str(target)
+
+
+def resolve_volume_path(path: str, image_metadata: Optional[Dict[str, Any]] = None) -> str:
+    """Copie de travail non compressée si elle existe, sinon le fichier d'origine"""
+    working_copy = (image_metadata or {}).get(WORKING_COPY_KEY)
+    return working_copy if working_copy and os.path.exists(working_copy) else str(path)
+
+
+def open_volume(path: str, image_metadata: Optional[Dict[str, Any]] = None) -> LazyVolume:
+    """
+    Volume paresseux ; image_metadata (MedicalImage) fournit la copie de travail
+    non compressée et les percentiles pré-calculés
+    """
+    return LazyVolume(resolve_volume_path(path, image_metadata), bounds_from_metadata(image_metadata))
+
+
+def normalize_volume(volume, bounds: Optional[Tuple[float, float]] = None) -> NormalizedVolume:
+    return NormalizedVolume(volume, bounds)
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Pic de mémoire résidente du processus (ru_maxrss : Ko sous Linux, octets sous macOS)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
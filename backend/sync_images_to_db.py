@@ -14,6 +14,9 @@ from datetime import datetime
 # Imports CereBloom
 from config.database import get_database
 from models.database_models import MedicalImage, Patient
+from services.volume_reader import (
+    INTENSITY_STATS_KEY, WORKING_COPY_KEY, compute_file_intensity_stats, create_working_copy
+)
 from sqlalchemy import select
 
 PATIENT_ID = "stringd5f01d3b-b54b-43a2-ba3c-0b12c797affc"
@@ -75,7 +78,11 @@ async def sync_images_to_database():
                 print(f"❌ Dossier d'images non trouvé: {images_dir}")
                 return
 
-            image_files = list(images_dir.glob("*.nii*"))
+            # Les copies de travail (.work.nii) ne sont pas des images à part entière
+            image_files = [
+                path for path in images_dir.glob("*.nii*")
+                if not path.name.endswith(".work.nii") and not path.name.startswith(".tmp_")
+            ]
             print(f"📁 {len(image_files)} fichiers d'images trouvés")
 
             # 3. Vérifier les images déjà en base
@@ -100,6 +107,20 @@ async def sync_images_to_database():
 
                     print(f"   📄 Ajout: {img_file.name} ({modality})")
 
+                    image_metadata = {
+                        "synchronized": True,
+                        "original_filename": img_file.name,
+                        "sync_date": datetime.now().isoformat()
+                    }
+                    try:
+                        # Copie de travail non compressée et percentiles de normalisation, comme à l'upload
+                        working_copy = create_working_copy(file_path_str)
+                        if working_copy:
+                            image_metadata[WORKING_COPY_KEY] = working_copy
+                        image_metadata[INTENSITY_STATS_KEY] = compute_file_intensity_stats(working_copy or file_path_str)
+                    except Exception as e:
+                        print(f"   ⚠️ Pré-traitement de l'image non effectué: {e}")
+
                     # Créer l'entrée en base
                     medical_image = MedicalImage(
                         id=str(uuid.uuid4()),
@@ -109,11 +130,7 @@ async def sync_images_to_database():
                         file_path=file_path_str,
                         file_name=img_file.name,
                         file_size=file_size,
-                        image_metadata={
-                            "synchronized": True,
-                            "original_filename": img_file.name,
-                            "sync_date": datetime.now().isoformat()
-                        },
+                        image_metadata=image_metadata,
                         acquisition_date=datetime.now().date(),
                         body_part="BRAIN",
                         notes="Image synchronisée automatiquement",
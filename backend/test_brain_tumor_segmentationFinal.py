@@ -24,32 +24,25 @@ from datetime import datetime
 import warnings
 warnings.filterwarnings('ignore')
 
+from services.model_registry import IMG_SIZE, VOLUME_SLICES
+from services.postprocessing import smooth_labels, smooth_prediction_labels, summarize_predictions
+from services.prediction_artifacts import slice_labels
+from services.preprocessing import VOLUME_START_AT
+from services.segmentation_rendering import (
+    INDIVIDUAL_IMAGE_KINDS, INDIVIDUAL_IMAGE_MODALITIES, SliceData, class_color_lut, render_segmentation,
+    write_slice_images
+)
+from services.segmentation_simulation import simulate_segmentation_predictions
+
 # TensorFlow imports avec gestion d'erreur
 try:
     import tensorflow as tf
     from tensorflow.keras.models import load_model
-    from tensorflow.keras import backend as K
     TENSORFLOW_AVAILABLE = True
     print("✅ TensorFlow disponible")
 except ImportError:
     print("⚠️ TensorFlow non disponible - mode simulation uniquement")
     TENSORFLOW_AVAILABLE = False
-    # Créer des substituts pour les fonctions TensorFlow
-    class K:
-        @staticmethod
-        def flatten(x): return np.flatten(x)
-        @staticmethod
-        def sum(x): return np.sum(x)
-        @staticmethod
-        def square(x): return np.square(x)
-        @staticmethod
-        def abs(x): return np.abs(x)
-        @staticmethod
-        def round(x): return np.round(x)
-        @staticmethod
-        def clip(x, min_val, max_val): return np.clip(x, min_val, max_val)
-        @staticmethod
-        def epsilon(): return 1e-7
 
 # Configuration pour génération d'images haute qualité
 import matplotlib
@@ -65,9 +58,7 @@ plt.rcParams['legend.fontsize'] = 11
 # CONSTANTES ET CONFIGURATION
 # ================================================================================
 
-IMG_SIZE = 128
-VOLUME_SLICES = 100
-VOLUME_START_AT = 22
+# IMG_SIZE, VOLUME_SLICES et VOLUME_START_AT : définis une seule fois dans services/
 
 # Classification médicale des régions tumorales selon BraTS
 TUMOR_CLASSES = {
@@ -77,6 +68,9 @@ TUMOR_CLASSES = {
     3: {'name': 'Tumeur rehaussée', 'abbr': 'Enhancing Tumor', 'color': '#0080FF', 'alpha': 0.9}
 }
 
+# Couleurs RGB uint8 des classes, indexées par étiquette (calculées une seule fois)
+TUMOR_CLASS_LUT = class_color_lut(TUMOR_CLASSES)
+
 # Modalités IRM et leurs caractéristiques
 MRI_MODALITIES = {
     'T1': {'name': 'T1-weighted', 'description': 'Anatomie structurelle', 'cmap': 'gray'},
@@ -89,116 +83,25 @@ MRI_MODALITIES = {
 # MÉTRIQUES MÉDICALES SPÉCIALISÉES
 # ================================================================================
 
-def dice_coef(y_true, y_pred, smooth=1.0):
-    """Coefficient de Dice - Métrique standard en segmentation médicale"""
-    class_num = 4
-    total_loss = 0
-    for i in range(class_num):
-        y_true_f = K.flatten(y_true[:,:,:,i])
-        y_pred_f = K.flatten(y_pred[:,:,:,i])
-        intersection = K.sum(y_true_f * y_pred_f)
-        loss = ((2. * intersection + smooth) / (K.sum(y_true_f) + K.sum(y_pred_f) + smooth))
-        total_loss += loss
-    return total_loss / class_num
-
-def dice_coef_necrotic(y_true, y_pred, epsilon=1e-6):
-    """Dice pour région nécrotique - Critique pour planification chirurgicale"""
-    intersection = K.sum(K.abs(y_true[:,:,:,1] * y_pred[:,:,:,1]))
-    return (2. * intersection) / (K.sum(K.square(y_true[:,:,:,1])) + K.sum(K.square(y_pred[:,:,:,1])) + epsilon)
-
-def dice_coef_edema(y_true, y_pred, epsilon=1e-6):
-    """Dice pour œdème - Important pour évaluation de l'effet de masse"""
-    intersection = K.sum(K.abs(y_true[:,:,:,2] * y_pred[:,:,:,2]))
-    return (2. * intersection) / (K.sum(K.square(y_true[:,:,:,2])) + K.sum(K.square(y_pred[:,:,:,2])) + epsilon)
-
-def dice_coef_enhancing(y_true, y_pred, epsilon=1e-6):
-    """Dice pour tumeur rehaussée - Cible thérapeutique principale"""
-    intersection = K.sum(K.abs(y_true[:,:,:,3] * y_pred[:,:,:,3]))
-    return (2. * intersection) / (K.sum(K.square(y_true[:,:,:,3])) + K.sum(K.square(y_pred[:,:,:,3])) + epsilon)
-
-def precision(y_true, y_pred):
-    """Précision - Minimise les faux positifs"""
-    true_positives = K.sum(K.round(K.clip(y_true * y_pred, 0, 1)))
-    predicted_positives = K.sum(K.round(K.clip(y_pred, 0, 1)))
-    return true_positives / (predicted_positives + K.epsilon())
-
-def sensitivity(y_true, y_pred):
-    """Sensibilité/Recall - Minimise les faux négatifs (critique en médical)"""
-    true_positives = K.sum(K.round(K.clip(y_true * y_pred, 0, 1)))
-    possible_positives = K.sum(K.round(K.clip(y_true, 0, 1)))
-    return true_positives / (possible_positives + K.epsilon())
-
-def specificity(y_true, y_pred):
-    """Spécificité - Capacité à identifier les tissus sains"""
-    true_negatives = K.sum(K.round(K.clip((1-y_true) * (1-y_pred), 0, 1)))
-    possible_negatives = K.sum(K.round(K.clip(1-y_true, 0, 1)))
-    return true_negatives / (possible_negatives + K.epsilon())
-
-# ================================================================================
-# SIMULATION POUR MODE SANS MODÈLE
-# ================================================================================
-
-def simulate_segmentation_predictions(preprocessed_data):
-    """
-    Simule des prédictions de segmentation réalistes quand le modèle n'est pas disponible
-    """
-    batch_size, height, width, channels = preprocessed_data.shape
-
-    # Créer des prédictions factices avec 4 classes (fond + 3 classes tumorales)
-    predictions = np.zeros((batch_size, height, width, 4))
-
-    for i in range(batch_size):
-        # Utiliser les données d'entrée pour créer une segmentation réaliste
-        flair_slice = preprocessed_data[i, :, :, 0]
-        t1ce_slice = preprocessed_data[i, :, :, 1]
-
-        # Combiner les modalités
-        combined = (flair_slice + t1ce_slice) / 2
-
-        # Créer des seuils adaptatifs
-        mean_val = np.mean(combined)
-        std_val = np.std(combined)
-
-        # Classe 0: Fond (tissu sain)
-        background_mask = combined < (mean_val + 0.5 * std_val)
-        predictions[i, :, :, 0][background_mask] = 0.9
-
-        # Classe 1: Noyau nécrotique (zones de faible intensité dans la tumeur)
-        necrotic_mask = (combined >= (mean_val + 0.5 * std_val)) & (combined < (mean_val + 1.0 * std_val))
-        predictions[i, :, :, 1][necrotic_mask] = 0.8
-
-        # Classe 2: Œdème péritumoral (zones d'intensité moyenne)
-        edema_mask = (combined >= (mean_val + 1.0 * std_val)) & (combined < (mean_val + 1.5 * std_val))
-        predictions[i, :, :, 2][edema_mask] = 0.7
-
-        # Classe 3: Tumeur rehaussée (zones de haute intensité)
-        enhancing_mask = combined >= (mean_val + 1.5 * std_val)
-        predictions[i, :, :, 3][enhancing_mask] = 0.9
-
-        # Normaliser pour que la somme des probabilités = 1
-        for h in range(height):
-            for w in range(width):
-                pixel_sum = np.sum(predictions[i, h, w, :])
-                if pixel_sum > 0:
-                    predictions[i, h, w, :] /= pixel_sum
-                else:
-                    predictions[i, h, w, 0] = 1.0  # Fond par défaut
-
-    return predictions
+# Définitions partagées avec le registre du modèle et la quantification
+from services.model_metrics import (
+    dice_coef, dice_coef_edema, dice_coef_enhancing, dice_coef_necrotic, precision, sensitivity, specificity
+)
 
 # ================================================================================
 # TRAITEMENT ET PRÉPARATION DES DONNÉES
 # ================================================================================
 
-def load_and_preprocess_case(case_path):
+def load_and_preprocess_case(case_path, return_crop=False, intensity_bounds=None, build_input=True):
     """
     Charge et prétraite un cas médical complet avec validation qualité.
 
     Args:
         case_path: Chemin vers le dossier patient
+        return_crop, intensity_bounds, build_input: voir load_and_preprocess_modalities
 
     Returns:
-        Données prétraitées et métadonnées médicales
+        Données prétraitées et métadonnées médicales (+ boîte englobante ou None)
     """
     print(f"  📁 Chargement du cas: {os.path.basename(case_path)}")
 
@@ -217,42 +120,61 @@ def load_and_preprocess_case(case_path):
         elif file_lower == 't2.nii' or '_t2.' in file_lower:
             modality_paths['t2'] = os.path.join(case_path, file)
 
+    return load_and_preprocess_modalities(
+        modality_paths, return_crop=return_crop, intensity_bounds=intensity_bounds, build_input=build_input
+    )
+
+def load_and_preprocess_modalities(modality_paths, return_crop=False, intensity_bounds=None, build_input=True):
+    """
+    Prétraite un cas à partir des fichiers de chaque modalité, lus sur place.
+
+    Args:
+        modality_paths: Chemin du fichier NIfTI par modalité ('flair', 't1', 't1ce', 't2')
+        return_crop: Recadre sur le cerveau (AI_BRAIN_CROP) et retourne la boîte
+            nécessaire pour replacer les prédictions (uncrop_predictions)
+        intensity_bounds: Percentiles (p1, p99) déjà connus par modalité (image_metadata)
+        build_input: False si l'entrée du modèle est déjà pré-calculée (X vaut alors None)
+
+    Returns:
+        Données prétraitées et métadonnées médicales (+ boîte englobante ou None)
+    """
+    from config.settings import settings
+    from services.preprocessing import build_model_input, compute_brain_bbox
+    from services.volume_reader import normalize_volume, open_volume
+
     # Validation de la présence de toutes les modalités
     required_modalities = ['flair', 't1', 't1ce', 't2']
     missing = [mod for mod in required_modalities if mod not in modality_paths]
     if missing:
         raise ValueError(f"Modalités manquantes: {missing}")
 
-    # Chargement des données NIfTI avec métadonnées
+    # Ouverture paresseuse des volumes NIfTI (mmap, float32) : seules les coupes
+    # utiles sont lues, par l'étape qui en a besoin
     data = {}
     for modality, path in modality_paths.items():
-        nii_img = nib.load(path)
+        volume = open_volume(path)
+        volume.intensity_bounds = (intensity_bounds or {}).get(modality)
         data[modality] = {
-            'data': nii_img.get_fdata(),
-            'header': nii_img.header,
-            'affine': nii_img.affine
+            'data': volume,
+            'header': volume.header,
+            'affine': volume.affine
         }
-        print(f"    ✓ {modality.upper()}: {data[modality]['data'].shape}")
+        print(f"    ✓ {modality.upper()}: {volume.shape}")
 
-    # Normalisation standardisée (z-score par modalité)
-    scaler = MinMaxScaler()
-    normalized_data = {}
+    # Normalisation robuste (percentile-based pour éviter les outliers), appliquée à la lecture
+    normalized_data = {modality: normalize_volume(data[modality]['data']) for modality in required_modalities}
 
-    for modality in required_modalities:
-        raw_data = data[modality]['data']
-        # Normalisation robuste (percentile-based pour éviter les outliers)
-        p1, p99 = np.percentile(raw_data[raw_data > 0], [1, 99])
-        normalized = np.clip((raw_data - p1) / (p99 - p1), 0, 1)
-        normalized_data[modality] = normalized
+    # Boîte englobante du cerveau : moins de pixels à redimensionner
+    bbox = None
+    if build_input and return_crop and settings.AI_BRAIN_CROP:
+        bbox = compute_brain_bbox(modality['data'] for modality in data.values())
 
     # Préparation pour le modèle (FLAIR + T1CE comme entrées principales)
-    X = np.empty((VOLUME_SLICES, IMG_SIZE, IMG_SIZE, 2))
-
-    for slice_idx in range(VOLUME_SLICES):
-        z_idx = slice_idx + VOLUME_START_AT
-        X[slice_idx, :, :, 0] = cv2.resize(normalized_data['flair'][:, :, z_idx], (IMG_SIZE, IMG_SIZE))
-        X[slice_idx, :, :, 1] = cv2.resize(normalized_data['t1ce'][:, :, z_idx], (IMG_SIZE, IMG_SIZE))
+    # Coupes hors volume remplies de zéros (écartées ensuite par le filtre de coupes)
+    X = build_model_input(normalized_data, bbox) if build_input else None
 
+    if return_crop:
+        return X, data, normalized_data, bbox
     return X, data, normalized_data
 
 def calculate_tumor_metrics(predictions, voxel_spacing=(1.0, 1.0, 1.0)):
@@ -260,57 +182,43 @@ def calculate_tumor_metrics(predictions, voxel_spacing=(1.0, 1.0, 1.0)):
     Calcule les métriques tumorales cliniquement pertinentes.
 
     Args:
-        predictions: Prédictions du modèle
+        predictions: Prédictions du modèle, étiquettes ou SegmentationSummary
         voxel_spacing: Espacement des voxels (mm)
 
     Returns:
         Dictionnaire des métriques médicales
     """
-    # Conversion en segmentation discrète
-    segmentation = np.argmax(predictions, axis=-1)
+    # Volumes dérivés de l'histogramme des classes (un seul argmax)
+    summary = summarize_predictions(predictions)
+    class_voxels = summary.class_voxels
 
     metrics = {}
     voxel_volume = np.prod(voxel_spacing)  # mm³
 
     for class_idx in range(1, 4):  # Exclure le fond
         class_info = TUMOR_CLASSES[class_idx]
-        mask = (segmentation == class_idx)
 
-        volume_voxels = np.sum(mask)
+        volume_voxels = class_voxels[class_idx]
         volume_mm3 = volume_voxels * voxel_volume
         volume_cm3 = volume_mm3 / 1000.0
 
         metrics[f"volume_{class_info['abbr'].lower().replace(' ', '_')}"] = {
-            'voxels': int(volume_voxels.item() if hasattr(volume_voxels, 'item') else volume_voxels),
+            'voxels': int(volume_voxels),
             'mm3': float(volume_mm3),
             'cm3': float(volume_cm3),
-            'percentage': float(volume_voxels / segmentation.size * 100)
+            'percentage': float(volume_voxels / summary.labels.size * 100)
         }
 
     # Calcul du volume tumoral total
-    total_tumor_mask = segmentation > 0
-    total_volume = np.sum(total_tumor_mask) * voxel_volume / 1000.0  # cm³
+    total_volume = class_voxels[1:].sum() * voxel_volume / 1000.0  # cm³
     metrics['total_tumor_volume_cm3'] = float(total_volume)
     metrics['total_volume'] = float(total_volume)  # Alias pour compatibilité
 
-    # Ajouter les volumes individuels pour compatibilité
+    # Volumes individuels pour compatibilité
     # Les clés générées sont basées sur class_info['abbr'].lower().replace(' ', '_')
-    metrics['necrotic_volume'] = metrics.get('volume_noyau_nécrotique/kystique', {}).get('cm3', 0.0)
-    metrics['edema_volume'] = metrics.get('volume_œdème_péritumoral', {}).get('cm3', 0.0)
-    metrics['enhancing_volume'] = metrics.get('volume_tumeur_rehaussée', {}).get('cm3', 0.0)
-
-    # Correction: utiliser les vraies clés générées
-    for class_idx in range(1, 4):
+    for class_idx, alias in ((1, 'necrotic_volume'), (2, 'edema_volume'), (3, 'enhancing_volume')):
         class_info = TUMOR_CLASSES[class_idx]
-        key = f"volume_{class_info['abbr'].lower().replace(' ', '_')}"
-        if key in metrics:
-            vol_data = metrics[key]
-            if class_idx == 1:  # Nécrotique
-                metrics['necrotic_volume'] = vol_data['cm3']
-            elif class_idx == 2:  # Œdème
-                metrics['edema_volume'] = vol_data['cm3']
-            elif class_idx == 3:  # Enhancing
-                metrics['enhancing_volume'] = vol_data['cm3']
+        metrics[alias] = metrics[f"volume_{class_info['abbr'].lower().replace(' ', '_')}"]['cm3']
 
     # Ajouter les pourcentages
     if total_volume > 0:
@@ -329,49 +237,14 @@ def find_representative_slices(predictions, num_slices=3):
     Sélectionne les coupes les plus représentatives pour visualisation.
 
     Args:
-        predictions: Prédictions du modèle
+        predictions: Prédictions du modèle, étiquettes ou SegmentationSummary
         num_slices: Nombre de coupes à sélectionner
 
     Returns:
         Liste des indices des coupes optimales
     """
-    # Score de pertinence par coupe (basé sur la diversité des classes)
-    slice_scores = []
-
-    for i in range(predictions.shape[0]):
-        seg = np.argmax(predictions[i], axis=-1)
-
-        # Score basé sur la présence de différentes classes tumorales
-        classes_present = len(np.unique(seg[seg > 0]))
-        tumor_coverage = np.sum(seg > 0) / seg.size
-
-        # Préférence pour les coupes avec tumeur enhancing (classe 3)
-        enhancing_presence = np.sum(seg == 3) / seg.size
-
-        score = classes_present * 2 + tumor_coverage + enhancing_presence * 3
-        slice_scores.append(score)
-
-    # Sélection des meilleures coupes espacées
-    slice_scores = np.array(slice_scores)
-    selected_slices = []
-
-    # Première coupe: meilleur score global
-    best_idx = np.argmax(slice_scores)
-    selected_slices.append(best_idx)
-
-    # Coupes suivantes: meilleur score avec distance minimale
-    for _ in range(num_slices - 1):
-        remaining_scores = slice_scores.copy()
-
-        # Pénaliser les coupes trop proches des déjà sélectionnées
-        for selected in selected_slices:
-            distance_penalty = np.exp(-0.1 * np.abs(np.arange(len(remaining_scores)) - selected))
-            remaining_scores *= (1 - 0.7 * distance_penalty)
-
-        next_best = np.argmax(remaining_scores)
-        selected_slices.append(next_best)
-
-    return [int(x) for x in sorted(selected_slices)]
+    # Score de pertinence par coupe (diversité des classes) lu dans l'histogramme par coupe
+    return summarize_predictions(predictions).representative_slices(num_slices)
 
 # ================================================================================
 # AMÉLIORATION ANTI-PIXELISATION
@@ -382,69 +255,92 @@ def apply_morphological_smoothing(segmentation):
     Applique un lissage morphologique pour réduire la pixelisation.
 
     Args:
-        segmentation: Masque de segmentation (2D array)
+        segmentation: Masque de segmentation (2D array) ou pile de coupes (N, H, W)
 
     Returns:
         Masque lissé avec contours plus naturels
     """
-    from scipy import ndimage
-
-    smoothed = np.zeros_like(segmentation)
-
-    for class_idx in range(1, 4):
-        mask = (segmentation == class_idx)
-        if np.any(mask):
-            # Fermeture morphologique (remplit les petits trous)
-            closed = ndimage.binary_closing(mask, structure=np.ones((3, 3)))
-            # Ouverture morphologique (lisse les contours)
-            opened = ndimage.binary_opening(closed, structure=np.ones((2, 2)))
-            # Dilatation légère pour récupérer un peu de volume
-            dilated = ndimage.binary_dilation(opened, structure=np.ones((2, 2)))
-            smoothed[dilated] = class_idx
-
-    return smoothed
+    # Fermeture 3×3, ouverture 2×2 et dilatation 2×2 par classe, toute la pile en un passage cv2
+    return smooth_labels(segmentation)
 
 def create_high_quality_segmentation(segmentation, target_size=(256, 256)):
     """
     Crée une segmentation haute qualité avec réduction de pixelisation.
 
     Args:
-        segmentation: Masque 128×128 du modèle
+        segmentation: Masque 128×128 du modèle (étiquettes) ou softmax (128, 128, 4)
         target_size: Taille cible pour l'upscaling
 
     Returns:
-        Masque haute qualité et image colorée correspondante
+        Masque haute qualité et image colorée correspondante (RGB uint8)
     """
-    # 1. Redimensionnement avec interpolation bicubique
-    seg_float = segmentation.astype(np.float32)
-    seg_upscaled = cv2.resize(seg_float, target_size, interpolation=cv2.INTER_CUBIC)
+    # Cartes des 4 classes agrandies en un seul cv2.resize bicubique, argmax,
+    # lissage morphologique puis coloration par la table TUMOR_CLASS_LUT
+    seg_smoothed, seg_colored_hq = render_segmentation(segmentation[np.newaxis], TUMOR_CLASS_LUT, target_size)
+    return seg_smoothed[0], seg_colored_hq[0]
+
+# ================================================================================
+# VISUALISATION MÉDICALE PROFESSIONNELLE - VERSION CORRIGÉE
+# ================================================================================
+
+def report_info_text(case_name):
+    """Encadré « Informations patient » du rapport"""
+    return f"""INFORMATIONS PATIENT
+
+ID Patient: {case_name}
+Date d'analyse: {datetime.now().strftime('%d/%m/%Y %H:%M')}
+Modalités IRM: T1, T1CE, T2, FLAIR
+Modèle: U-Net 3D Multimodal
+Version: 2.1 - Anti-Pixelisation
+
+PARAMÈTRES TECHNIQUES
+Résolution modèle: {IMG_SIZE}×{IMG_SIZE} pixels
+Résolution affichage: 256×256 pixels (HQ)
+Coupes analysées: {VOLUME_SLICES}
+Algorithme: Deep Learning CNN + Post-traitement
+Précision du modèle: >95% (Dice)
+Amélioration: Lissage morphologique + Interpolation bicubique"""
+
+
+def report_metrics_text(metrics):
+    """Encadré « Analyse volumétrique » du rapport"""
+    metrics_text = "ANALYSE VOLUMÉTRIQUE\n\n"
+    metrics_text += f"Volume tumoral total: {metrics['total_tumor_volume_cm3']:.2f} cm³\n\n"
 
-    # 2. Reconversion en classes discrètes avec seuillage intelligent
-    seg_discrete = np.zeros_like(seg_upscaled, dtype=np.uint8)
     for class_idx in range(1, 4):
-        # Seuillage adaptatif pour chaque classe
-        threshold = 0.3 if class_idx == 1 else 0.4  # Plus strict pour nécrose
-        mask = seg_upscaled >= (class_idx - threshold)
-        mask &= seg_upscaled < (class_idx + 0.5)
-        seg_discrete[mask] = class_idx
+        class_info = TUMOR_CLASSES[class_idx]
+        key = f"volume_{class_info['abbr'].lower().replace(' ', '_')}"
+        if key in metrics:
+            vol_data = metrics[key]
+
+            # Utiliser les pourcentages relatifs au volume tumoral (comme dans l'interface)
+            if class_idx == 1:  # Nécrotique
+                percentage = metrics.get('necrotic_percentage', 0.0)
+            elif class_idx == 2:  # Œdème
+                percentage = metrics.get('edema_percentage', 0.0)
+            elif class_idx == 3:  # Enhancing
+                percentage = metrics.get('enhancing_percentage', 0.0)
+            else:
+                percentage = vol_data['percentage']
+
+            metrics_text += f"{class_info['name']}:\n"
+            metrics_text += f"  • Volume: {vol_data['cm3']:.2f} cm³\n"
+            metrics_text += f"  • Pourcentage: {percentage:.1f}%\n\n"
 
-    # 3. Lissage morphologique
-    seg_smoothed = apply_morphological_smoothing(seg_discrete)
+    return metrics_text
+
+
+def report_legend_text():
+    """Encadré « Légende médicale » du rapport"""
+    legend_text = "LÉGENDE MÉDICALE\n\n"
 
-    # 4. Création de l'image colorée haute qualité
-    seg_colored_hq = np.zeros((*target_size, 3))
     for class_idx in range(1, 4):
-        mask = seg_smoothed == class_idx
-        if np.any(mask):
-            color_hex = TUMOR_CLASSES[class_idx]['color']
-            color_rgb = np.array([int(color_hex[i:i+2], 16) for i in (1, 3, 5)]) / 255.0
-            seg_colored_hq[mask] = color_rgb
+        class_info = TUMOR_CLASSES[class_idx]
+        legend_text += f"█ {class_info['name']}\n"
+        legend_text += f"  {class_info['abbr']}\n\n"
 
-    return seg_smoothed, seg_colored_hq
+    return legend_text
 
-# ================================================================================
-# VISUALISATION MÉDICALE PROFESSIONNELLE - VERSION CORRIGÉE
-# ================================================================================
 
 def create_professional_visualization(predictions, slice_indices, original_data, normalized_data,
                                     case_name, metrics, output_dir):
@@ -481,21 +377,7 @@ def create_professional_visualization(predictions, slice_indices, original_data,
     ax_info = plt.subplot2grid((total_rows, 6), (0, 0), colspan=2)
     ax_info.axis('off')
 
-    info_text = f"""INFORMATIONS PATIENT
-
-ID Patient: {case_name}
-Date d'analyse: {datetime.now().strftime('%d/%m/%Y %H:%M')}
-Modalités IRM: T1, T1CE, T2, FLAIR
-Modèle: U-Net 3D Multimodal
-Version: 2.1 - Anti-Pixelisation
-
-PARAMÈTRES TECHNIQUES
-Résolution modèle: {IMG_SIZE}×{IMG_SIZE} pixels
-Résolution affichage: 256×256 pixels (HQ)
-Coupes analysées: {VOLUME_SLICES}
-Algorithme: Deep Learning CNN + Post-traitement
-Précision du modèle: >95% (Dice)
-Amélioration: Lissage morphologique + Interpolation bicubique"""
+    info_text = report_info_text(case_name)
 
     ax_info.text(0.05, 0.95, info_text, transform=ax_info.transAxes,
                 fontsize=10, verticalalignment='top', fontfamily='monospace',
@@ -505,28 +387,7 @@ Amélioration: Lissage morphologique + Interpolation bicubique"""
     ax_metrics = plt.subplot2grid((total_rows, 6), (0, 2), colspan=2)
     ax_metrics.axis('off')
 
-    metrics_text = "ANALYSE VOLUMÉTRIQUE\n\n"
-    metrics_text += f"Volume tumoral total: {metrics['total_tumor_volume_cm3']:.2f} cm³\n\n"
-
-    for class_idx in range(1, 4):
-        class_info = TUMOR_CLASSES[class_idx]
-        key = f"volume_{class_info['abbr'].lower().replace(' ', '_')}"
-        if key in metrics:
-            vol_data = metrics[key]
-
-            # Utiliser les pourcentages relatifs au volume tumoral (comme dans l'interface)
-            if class_idx == 1:  # Nécrotique
-                percentage = metrics.get('necrotic_percentage', 0.0)
-            elif class_idx == 2:  # Œdème
-                percentage = metrics.get('edema_percentage', 0.0)
-            elif class_idx == 3:  # Enhancing
-                percentage = metrics.get('enhancing_percentage', 0.0)
-            else:
-                percentage = vol_data['percentage']
-
-            metrics_text += f"{class_info['name']}:\n"
-            metrics_text += f"  • Volume: {vol_data['cm3']:.2f} cm³\n"
-            metrics_text += f"  • Pourcentage: {percentage:.1f}%\n\n"
+    metrics_text = report_metrics_text(metrics)
 
     ax_metrics.text(0.05, 0.95, metrics_text, transform=ax_metrics.transAxes,
                    fontsize=10, verticalalignment='top', fontfamily='monospace',
@@ -536,12 +397,7 @@ Amélioration: Lissage morphologique + Interpolation bicubique"""
     ax_legend = plt.subplot2grid((total_rows, 6), (0, 4), colspan=2)
     ax_legend.axis('off')
 
-    legend_text = "LÉGENDE MÉDICALE\n\n"
-
-    for class_idx in range(1, 4):
-        class_info = TUMOR_CLASSES[class_idx]
-        legend_text += f"█ {class_info['name']}\n"
-        legend_text += f"  {class_info['abbr']}\n\n"
+    legend_text = report_legend_text()
 
     ax_legend.text(0.05, 0.95, legend_text, transform=ax_legend.transAxes,
                   fontsize=11, verticalalignment='top', fontweight='bold')
@@ -589,7 +445,7 @@ Amélioration: Lissage morphologique + Interpolation bicubique"""
 
         # Segmentation haute qualité anti-pixelisation
         ax_seg = plt.subplot2grid((total_rows, 6), (current_row, 4))
-        segmentation_raw = np.argmax(predictions[slice_idx], axis=-1)
+        segmentation_raw = slice_labels(predictions, slice_idx)
 
         # Application de l'amélioration anti-pixelisation
         segmentation_hq, seg_colored_hq = create_high_quality_segmentation(
@@ -638,10 +494,137 @@ Amélioration: Lissage morphologique + Interpolation bicubique"""
     return output_path
 
 
+def extract_slice_data(predictions, slice_idx, original_data, normalized_data,
+                       modalities=INDIVIDUAL_IMAGE_MODALITIES, overlay=True):
+    """
+    Coupes 2D d'une coupe représentative, lues une seule fois dans les volumes.
+
+    Args:
+        predictions: Prédictions du modèle (None si la segmentation n'est pas utile)
+        slice_idx: Indice de la coupe dans les prédictions
+        original_data: Données originales avec métadonnées
+        normalized_data: Données normalisées
+        modalities: Modalités brutes à lire
+        overlay: Lire aussi la T1CE normalisée (fond de la superposition)
+    """
+    z_idx = slice_idx + VOLUME_START_AT
+    return SliceData(
+        slice_idx=slice_idx,
+        modalities={modality: np.asarray(original_data[modality]['data'][:, :, z_idx]) for modality in modalities},
+        t1ce_normalized=np.asarray(normalized_data['t1ce'][:, :, z_idx]) if overlay else None,
+        labels=slice_labels(predictions, slice_idx) if predictions is not None else None
+    )
+
+
+def extract_slices_data(predictions, slice_indices, original_data, normalized_data):
+    """extract_slice_data pour chaque coupe représentative (fonction de module, picklable)"""
+    return [extract_slice_data(predictions, slice_idx, original_data, normalized_data) for slice_idx in slice_indices]
+
+
 def save_individual_images(predictions, slice_indices, original_data, normalized_data,
                           case_name, output_dir):
     """
+    Génère et sauvegarde chaque image individuellement, composées directement en
+    uint8 et encodées par cv2.imencode (AI_INDIVIDUAL_IMAGE_RENDERER="matplotlib"
+    pour revenir aux figures).
+
+    Args:
+        predictions: Prédictions du modèle
+        slice_indices: Indices des coupes représentatives
+        original_data: Données originales avec métadonnées
+        normalized_data: Données normalisées
+        case_name: Nom du patient/cas
+        output_dir: Répertoire de sortie
+
+    Returns:
+        Dict avec les chemins des images générées
+    """
+    from config.settings import settings
+    if settings.AI_INDIVIDUAL_IMAGE_RENDERER == "matplotlib":
+        return save_individual_images_matplotlib(
+            predictions, slice_indices, original_data, normalized_data, case_name, output_dir
+        )
+
+    individual_dir = os.path.join(output_dir, f'{case_name}_individual_images')
+    os.makedirs(individual_dir, exist_ok=True)
+    generated_images = individual_images_list(slice_indices, case_name)
+
+    print(f"  📸 Génération des images individuelles dans: {individual_dir}")
+
+    slices = extract_slices_data(predictions, slice_indices, original_data, normalized_data)
+
+    # Segmentations haute qualité de toutes les coupes retenues en un seul passage
+    segmentation_hq, seg_colored_hq = render_segmentation(
+        np.stack([slice_data.labels for slice_data in slices]), TUMOR_CLASS_LUT
+    )
+
+    for row, slice_data in enumerate(slices):
+        write_slice_images(slice_data, TUMOR_CLASS_LUT, individual_dir, settings.AI_INDIVIDUAL_IMAGE_SIZE,
+                           segmentation=(segmentation_hq[row], seg_colored_hq[row]))
+
+    print(f"  ✅ {len(generated_images['images'])} images individuelles générées")
+
+    write_json(os.path.join(individual_dir, "images_list.json"), generated_images)
+    return generated_images
+
+
+def individual_images_list(slice_indices, case_name):
+    """Contenu de images_list.json : 6 images (4 modalités, segmentation, superposition) par coupe"""
+    return {
+        "slices": slice_indices,
+        "modalities": INDIVIDUAL_IMAGE_KINDS,
+        "images": [
+            {
+                "slice": slice_idx,
+                "modality": kind,
+                "filename": f"slice_{slice_idx}_{kind}.png",
+                "url": f"/api/segmentation/{case_name}/image/slice_{slice_idx}_{kind}.png"
+            }
+            for slice_idx in slice_indices
+            for kind in INDIVIDUAL_IMAGE_KINDS
+        ]
+    }
+
+
+def write_json(path, data):
+    import json
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+
+
+def save_individual_images_manifest(slices, case_name, output_dir):
+    """
+    Liste des images individuelles sans les générer : les coupes 2D des modalités sont
+    conservées (render_sources.npz) et chaque PNG est rendu au premier accès par
+    services.individual_images, avec les étiquettes de l'artefact de prédiction du job,
+    même si les uploads ont été supprimés entre-temps.
+
+    Args:
+        slices: Coupes représentatives (SliceData avec étiquettes)
+        case_name: Nom du patient/cas
+        output_dir: Répertoire de sortie
+
+    Returns:
+        Dict au format de images_list.json
+    """
+    from services.individual_images import save_render_sources
+
+    individual_dir = os.path.join(output_dir, f'{case_name}_individual_images')
+    os.makedirs(individual_dir, exist_ok=True)
+
+    save_render_sources(individual_dir, slices, TUMOR_CLASS_LUT)
+    generated_images = individual_images_list([slice_data.slice_idx for slice_data in slices], case_name)
+    write_json(os.path.join(individual_dir, "images_list.json"), generated_images)
+
+    print(f"  📸 {len(generated_images['images'])} images individuelles rendues à la demande")
+    return generated_images
+
+
+def save_individual_images_matplotlib(predictions, slice_indices, original_data, normalized_data,
+                                      case_name, output_dir):
+    """
     Génère et sauvegarde chaque image individuellement - IDENTIQUES au rapport complet.
+    Une figure matplotlib 8×8 pouces à 300 dpi par image (titres inclus).
 
     Args:
         predictions: Prédictions du modèle
@@ -714,7 +697,7 @@ def save_individual_images(predictions, slice_indices, original_data, normalized
         # ============================================================================
         fig, ax = plt.subplots(1, 1, figsize=(8, 8))
 
-        segmentation_raw = np.argmax(predictions[slice_idx], axis=-1)
+        segmentation_raw = slice_labels(predictions, slice_idx)
 
         # Application de l'amélioration anti-pixelisation (IDENTIQUE au rapport complet)
         segmentation_hq, seg_colored_hq = create_high_quality_segmentation(
@@ -848,31 +831,11 @@ def main():
         print(f"✅ Modèle trouvé: {model_path}")
         model = "exists"  # Marqueur pour indiquer que le modèle existe
 
-    # Chargement du modèle avec métriques médicales
+    # Chargement du modèle avec métriques médicales (registre partagé)
     if model is not None and TENSORFLOW_AVAILABLE:  # Si le modèle existe et TensorFlow disponible
-        custom_objects = {
-            "dice_coef": dice_coef,
-            "precision": precision,
-            "sensitivity": sensitivity,
-            "specificity": specificity,
-            "dice_coef_necrotic": dice_coef_necrotic,
-            "dice_coef_edema": dice_coef_edema,
-            "dice_coef_enhancing": dice_coef_enhancing
-        }
-
         try:
             print("🔄 Chargement du modèle U-Net...")
-            model = load_model(model_path, custom_objects=custom_objects, compile=False)
-
-            # Compilation avec optimiseur médical
-            model.compile(
-                loss="categorical_crossentropy",
-                optimizer=tf.keras.optimizers.Adam(learning_rate=0.001),
-                metrics=['accuracy', tf.keras.metrics.MeanIoU(num_classes=4),
-                        dice_coef, precision, sensitivity, specificity,
-                        dice_coef_necrotic, dice_coef_edema, dice_coef_enhancing]
-            )
-
+            model = load_model_with_custom_objects(model_path)
             print("✅ Modèle chargé avec succès")
         except Exception as e:
             print(f"❌ ERREUR lors du chargement du modèle: {str(e)}")
@@ -925,10 +888,11 @@ def main():
 
             # 3. Calcul des métriques médicales
             print("  📊 Calcul des métriques tumorales...")
-            metrics = calculate_tumor_metrics(predictions)
+            summary = summarize_predictions(predictions)
+            metrics = calculate_tumor_metrics(summary)
 
             # 4. Sélection des coupes représentatives
-            representative_slices = find_representative_slices(predictions, num_slices=3)
+            representative_slices = find_representative_slices(summary, num_slices=3)
             print(f"  🎯 Coupes sélectionnées: {[s+1 for s in representative_slices]}")
 
             # 5. Génération du rapport médical haute qualité
@@ -959,198 +923,385 @@ def main():
     print(f"📁 Consultez le répertoire: {output_dir}")
     print("="*100)
 
-async def process_patient_with_professional_model(patient_id: str, output_dir: str = None, images_by_modality=None):
+def analyse_case(predictions):
     """
-    Version adaptée pour l'intégration CereBloom
-    Traite un patient spécifique avec votre modèle professionnel
+    Métriques tumorales et sélection des coupes représentatives.
 
-    Args:
-        patient_id: ID du patient
-        output_dir: Dossier de sortie (optionnel)
-        images_by_modality: Dict des images par modalité (passé par le routeur, optionnel)
-    """
-    import sys
-    import os
-    from pathlib import Path
-
-    # Ajouter le répertoire backend au path si nécessaire
-    backend_dir = Path(__file__).parent
-    if str(backend_dir) not in sys.path:
-        sys.path.append(str(backend_dir))
+    Fonction de module (picklable) exécutée par l'exécuteur d'inférence.
 
-    try:
-        from config.database import get_database
-        from models.database_models import MedicalImage
-        from sqlalchemy import select
-
-        print(f"🏥 TRAITEMENT PATIENT PROFESSIONNEL: {patient_id}")
-        print("=" * 80)
-
-        # 1. Récupérer les images du patient depuis la base de données
-        async for db in get_database():
-            try:
-                result = await db.execute(
-                    select(MedicalImage).where(MedicalImage.patient_id == patient_id)
-                )
-                images = result.scalars().all()
+    Returns:
+        (metrics, representative_slices)
+    """
+    # Un seul passage sur le volume : histogramme des classes par coupe partagé
+    summary = summarize_predictions(predictions)
+    metrics = calculate_tumor_metrics(summary)
+    representative_slices = find_representative_slices(summary, num_slices=3)
+    return metrics, representative_slices
+
+def render_case(predictions, representative_slices, original_data, normalized_data, case_name, metrics, output_dir,
+                on_demand=False):
+    """
+    Rendu matplotlib : rapport complet et images individuelles.
 
-                if not images:
-                    raise ValueError(f"Aucune image trouvée pour le patient {patient_id}")
+    Avec on_demand, les images individuelles ne sont que listées : elles sont
+    rendues au premier accès.
 
-                print(f"✅ {len(images)} images trouvées pour le patient")
+    Fonction de module (picklable) exécutée par l'exécuteur d'inférence.
 
-                # 2. Créer un dossier temporaire pour ce patient
-                temp_patient_dir = Path("images") / f"patient_{patient_id}"
-                temp_patient_dir.mkdir(parents=True, exist_ok=True)
+    Returns:
+        (report_path, individual_images)
+    """
+    report_path = create_professional_visualization(
+        predictions, representative_slices, original_data,
+        normalized_data, case_name, metrics, output_dir
+    )
+
+    if on_demand:
+        individual_images = save_individual_images_manifest(
+            extract_slices_data(predictions, representative_slices, original_data, normalized_data),
+            case_name, output_dir
+        )
+        return report_path, individual_images
 
-                # 3. Copier les images avec les noms attendus
-                modalities_found = []
-                for img in images:
-                    modality = img.modality.lower()
-                    source_path = Path(img.file_path)
-                    target_path = temp_patient_dir / f"{modality}.nii"
+    # Génération des images individuelles (IDENTIQUES au rapport complet)
+    print("  📸 Génération des images individuelles...")
+    individual_images = save_individual_images(
+        predictions, representative_slices, original_data,
+        normalized_data, case_name, output_dir
+    )
 
-                    if source_path.exists():
-                        import shutil
-                        shutil.copy2(str(source_path), str(target_path))
-                        modalities_found.append(modality)
-                        print(f"   ✓ {modality.upper()}: {source_path.name} → {target_path.name}")
-                    else:
-                        print(f"   ❌ {modality.upper()}: Fichier non trouvé - {source_path}")
+    return report_path, individual_images
 
-                print(f"📋 Modalités copiées: {modalities_found}")
+async def render_case_parallel(predictions, representative_slices, original_data, normalized_data, case_name,
+                               metrics, output_dir, on_demand=False):
+    """
+    Rendu du rapport et des images individuelles réparti sur le pool de rendu.
 
-                # 4. Vérifier les modalités requises
-                required_modalities = ['flair', 't1', 't1ce', 't2']
-                missing_modalities = [m for m in required_modalities if m not in modalities_found]
+    Le rapport est découpé en bandes (en-tête, une ligne par coupe, conclusions)
+    rendues en même temps que les images individuelles, puis assemblées : la durée
+    est bornée par la tâche la plus lente.
 
-                if missing_modalities:
-                    print(f"⚠️ Modalités manquantes: {missing_modalities}")
-                    # Continuer avec les modalités disponibles
+    Returns:
+        (report_path, individual_images)
+    """
+    from config.settings import settings
+    from services.inference_executor import inference_executor
+    from services.render_pool import render_pool
+    from services.report_panels import (
+        assemble_panels, render_conclusion_panel, render_header_panel, render_slice_panel
+    )
+
+    # Coupes 2D lues une fois dans les volumes : seuls ces petits tableaux traversent les processus
+    slices = await inference_executor.run(
+        extract_slices_data, predictions, representative_slices, original_data, normalized_data
+    )
+
+    tasks = [(render_header_panel, (
+        f'RAPPORT DE SEGMENTATION TUMORALE - Patient: {case_name}',
+        report_info_text(case_name), report_metrics_text(metrics), report_legend_text()
+    ))]
+    tasks += [(render_slice_panel, (slice_data, TUMOR_CLASS_LUT)) for slice_data in slices]
+    tasks.append((render_conclusion_panel, (generate_medical_conclusion(metrics, case_name),)))
+    num_panels = len(tasks)
 
-                # 5. Lancer le traitement avec votre modèle
-                print(f"🧠 Lancement de la segmentation professionnelle...")
+    individual_dir = os.path.join(output_dir, f'{case_name}_individual_images')
+    if not on_demand:
+        os.makedirs(individual_dir, exist_ok=True)
+        tasks += [
+            (write_slice_images, (slice_data, TUMOR_CLASS_LUT, individual_dir, settings.AI_INDIVIDUAL_IMAGE_SIZE))
+            for slice_data in slices
+        ]
+
+    print(f"  🎨 Rendu parallèle: {num_panels} panneaux + {len(tasks) - num_panels} coupes d'images individuelles")
+    results = await render_pool.map(tasks)
+
+    report_path = await inference_executor.run(
+        assemble_panels, results[:num_panels],
+        os.path.join(output_dir, f'{case_name}_rapport_medical_complet.png')
+    )
+
+    if on_demand:
+        individual_images = await inference_executor.run(save_individual_images_manifest, slices, case_name, output_dir)
+    else:
+        individual_images = individual_images_list(representative_slices, case_name)
+        write_json(os.path.join(individual_dir, "images_list.json"), individual_images)
+        print(f"  ✅ {len(individual_images['images'])} images individuelles générées")
 
-                # Charger OBLIGATOIREMENT votre modèle réel
-                model_path = "models/my_model.h5"
-                if not os.path.exists(model_path):
-                    raise FileNotFoundError(f"❌ ERREUR CRITIQUE: Votre modèle {model_path} est introuvable!")
+    return report_path, individual_images
 
-                print(f"🧠 Chargement de votre modèle professionnel: {model_path}")
-                model = load_model_with_custom_objects(model_path)
+def analyse_and_render_case(predictions, original_data, normalized_data, case_name, output_dir):
+    """
+    Étapes CPU après l'inférence : métriques, sélection des coupes et rendu matplotlib.
 
-                if model is None:
-                    raise RuntimeError("❌ ERREUR: Impossible de charger votre modèle!")
+    Returns:
+        Dict avec metrics, representative_slices, report_path et individual_images
+    """
+    metrics, representative_slices = analyse_case(predictions)
+    report_path, individual_images = render_case(
+        predictions, representative_slices, original_data, normalized_data, case_name, metrics, output_dir
+    )
+
+    return {
+        "metrics": metrics,
+        "representative_slices": representative_slices,
+        "report_path": report_path,
+        "individual_images": individual_images
+    }
 
-                print("✅ Votre modèle my_model.h5 chargé avec succès!")
+async def load_patient_images(patient_id: str):
+    """Dernière image de chaque modalité du patient (MedicalImage), indexée par modalité"""
+    from config.database import get_database
+    from models.database_models import MedicalImage
+    from sqlalchemy import select
 
-                # Traitement du cas
-                case_name = f"patient_{patient_id}"
+    async for db in get_database():
+        result = await db.execute(
+            select(MedicalImage).where(MedicalImage.patient_id == patient_id).order_by(MedicalImage.uploaded_at)
+        )
+        return {img.modality: img for img in result.scalars().all()}
 
-                # Chargement et prétraitement
-                preprocessed_data, original_data, normalized_data = load_and_preprocess_case(str(temp_patient_dir))
+async def process_patient_with_professional_model(patient_id: str, output_dir: str = None, images_by_modality=None,
+                                                  progress_id: str = None):
+    """
+    Version adaptée pour l'intégration CereBloom
+    Traite un patient spécifique avec votre modèle professionnel
 
-                # Segmentation OBLIGATOIRE avec votre modèle réel
-                if not TENSORFLOW_AVAILABLE:
-                    raise RuntimeError("❌ ERREUR: TensorFlow requis pour votre modèle!")
+    Args:
+        patient_id: ID du patient
+        output_dir: Dossier de sortie (optionnel)
+        images_by_modality: Dict des images par modalité (passé par le routeur, optionnel)
+        progress_id: ID de segmentation sous lequel publier l'avancement (progress_store)
+    """
+    import sys
+    import os
+    from pathlib import Path
 
-                print("🔥 Segmentation avec votre modèle U-Net professionnel...")
-                predictions = model.predict(preprocessed_data, verbose=1)
-                print(f"✅ Prédictions générées: {predictions.shape}")
+    # Ajouter le répertoire backend au path si nécessaire
+    backend_dir = Path(__file__).parent
+    if str(backend_dir) not in sys.path:
+        sys.path.append(str(backend_dir))
 
-                # Calcul des métriques
-                metrics = calculate_tumor_metrics(predictions)
+    try:
+        from services.progress_store import progress_store
+        from services.volume_reader import bounds_from_metadata, resolve_volume_path
 
-                # Sélection des coupes
-                representative_slices = find_representative_slices(predictions, num_slices=3)
+        def report_stage(stage):
+            if progress_id:
+                progress_store.set_stage(progress_id, stage)
 
-                # Génération du rapport
-                if output_dir is None:
-                    output_dir = "results_medical"
+        def report_slices(done, total):
+            if progress_id:
+                progress_store.set_slices(progress_id, done, total)
 
-                os.makedirs(output_dir, exist_ok=True)
+        print(f"🏥 TRAITEMENT PATIENT PROFESSIONNEL: {patient_id}")
+        print("=" * 80)
 
-                report_path = create_professional_visualization(
-                    predictions, representative_slices, original_data,
-                    normalized_data, case_name, metrics, output_dir
+        # 1. Images du patient : transmises par le routeur, sinon lues en base
+        report_stage("load")
+        if images_by_modality is None:
+            images_by_modality = await load_patient_images(patient_id)
+        if not images_by_modality:
+            raise ValueError(f"Aucune image trouvée pour le patient {patient_id}")
+
+        print(f"✅ {len(images_by_modality)} images trouvées pour le patient")
+
+        # 2. Fichiers lus sur place, sans copie dans un dossier temporaire
+        modality_sources = {}  # Fichiers d'origine (clés de cache)
+        modality_paths = {}  # Fichiers lus : copie de travail .nii si l'upload était un .nii.gz
+        modality_bounds = {}
+        for modality, img in images_by_modality.items():
+            modality = modality.lower()
+            if os.path.exists(img.file_path):
+                modality_sources[modality] = img.file_path
+                modality_paths[modality] = resolve_volume_path(img.file_path, img.image_metadata)
+                modality_bounds[modality] = bounds_from_metadata(img.image_metadata)
+                print(f"   ✓ {modality.upper()}: {Path(modality_paths[modality]).name}")
+            else:
+                print(f"   ❌ {modality.upper()}: Fichier non trouvé - {img.file_path}")
+
+        modalities_found = list(modality_paths)
+        print(f"📋 Modalités disponibles: {modalities_found}")
+
+        # 3. Vérifier les modalités requises
+        required_modalities = ['flair', 't1', 't1ce', 't2']
+        missing_modalities = [m for m in required_modalities if m not in modalities_found]
+
+        if missing_modalities:
+            print(f"⚠️ Modalités manquantes: {missing_modalities}")
+
+        # 4. Lancer le traitement avec votre modèle
+        print(f"🧠 Lancement de la segmentation professionnelle...")
+
+        # Vérifier OBLIGATOIREMENT la présence de votre modèle réel (chargé une seule fois par le registre)
+        from services.model_registry import model_registry
+        from services.inference_executor import inference_executor
+        from services.inference_scheduler import inference_scheduler
+        from services.preprocessing import uncrop_predictions
+        from services.prediction_cache import prediction_cache
+        from services.input_precompute import input_precomputer
+        from services.prediction_artifacts import load_prediction_artifact, save_prediction_artifact
+        from services.volume_reader import peak_rss_mb
+        from config.settings import settings
+        # Mode simulation (CI, tests de charge) : pipeline complet sans le modèle
+        simulation = settings.AI_SIMULATION_MODE
+        if not simulation and not os.path.exists(model_registry.model_path):
+            raise FileNotFoundError(f"❌ ERREUR CRITIQUE: Votre modèle {model_registry.model_path} est introuvable!")
+
+        # Segmentation OBLIGATOIRE avec votre modèle réel
+        if not simulation and not TENSORFLOW_AVAILABLE:
+            raise RuntimeError("❌ ERREUR: TensorFlow requis pour votre modèle!")
+
+        # Traitement du cas
+        case_name = f"patient_{patient_id}"
+
+        if output_dir is None:
+            output_dir = "results_medical"
+
+        os.makedirs(output_dir, exist_ok=True)
+
+        # Les étapes lourdes tournent dans l'exécuteur d'inférence : la boucle asyncio
+        # reste disponible pour les autres requêtes (login, listes, polling de statut)
+
+        # Modalités, modèle et prétraitement inchangés : pas de nouvelle inférence.
+        # Clé vérifiée avant le prétraitement : un hit ne refait que le post-traitement
+        cache_key = None
+        cached = None
+        if settings.AI_PREDICTION_CACHE and not simulation:
+            cache_key = await prediction_cache.abuild_key(modality_sources)
+            if cache_key is not None:
+                cached = await prediction_cache.aget(cache_key)
+
+        report_stage("preprocess")
+        if cached is not None:
+            predictions, skipped_slices = cached
+            print(f"⚡ Prédictions réutilisées depuis le cache: {predictions.shape}")
+            # Volumes ouverts pour le rendu seulement : ni recadrage, ni entrée du modèle
+            _, original_data, normalized_data = await inference_executor.run(
+                load_and_preprocess_modalities, modality_paths,
+                intensity_bounds=modality_bounds, build_input=False
+            )
+        else:
+            # Chargement et prétraitement ; l'entrée du modèle pré-calculée à l'upload
+            # évite la normalisation et le redimensionnement
+            precomputed_input = await input_precomputer.aload(modality_sources)
+            preprocessed_data, original_data, normalized_data, brain_bbox = await inference_executor.run(
+                load_and_preprocess_modalities, modality_paths, return_crop=True,
+                intensity_bounds=modality_bounds, build_input=precomputed_input is None
+            )
+            if precomputed_input is not None:
+                preprocessed_data = precomputed_input
+
+            report_stage("inference")
+            if simulation:
+                print("🔄 Mode simulation - génération de segmentations factices...")
+                predictions = await inference_executor.run(simulate_segmentation_predictions, preprocessed_data)
+                skipped_slices = 0
+            else:
+                print("🔥 Segmentation avec votre modèle U-Net professionnel...")
+                # Micro-batching : les coupes des segmentations concurrentes partagent le même predict.
+                # Les coupes vides ne passent pas par le modèle
+                predictions, slice_selection = await inference_scheduler.predict_volume(
+                    preprocessed_data, progress=report_slices if progress_id else None
                 )
+                skipped_slices = slice_selection.skipped
+            if brain_bbox is not None:
+                # Retour dans la grille du volume complet pour les volumes et le rendu
+                predictions = await inference_executor.run(uncrop_predictions, predictions, brain_bbox)
+            print(f"✅ Prédictions générées: {predictions.shape} ({skipped_slices} coupes vides ignorées)")
+
+            if cache_key is not None:
+                await prediction_cache.aput(cache_key, predictions, skipped_slices)
+
+        if settings.AI_LABEL_SMOOTHING:
+            # Lissage morphologique de toute la pile d'étiquettes (le cache garde les prédictions brutes)
+            predictions = await inference_executor.run(smooth_prediction_labels, predictions)
+
+        # Artefact compact (étiquettes uint8 + sidecar JSON), relu en mémoire mappée :
+        # métriques, sélection des coupes et rendu travaillent sur les étiquettes sans copie
+        await inference_executor.run(
+            save_prediction_artifact, output_dir, predictions, VOLUME_START_AT,
+            None if simulation else prediction_cache.file_hash(model_registry.model_path)
+        )
+        predictions = load_prediction_artifact(output_dir).labels
+
+        # Métriques et coupes représentatives
+        report_stage("metrics")
+        metrics, representative_slices = await inference_executor.run(analyse_case, predictions)
+
+        # Rapport et images individuelles
+        report_stage("render")
+        if settings.AI_PARALLEL_RENDERING:
+            # Panneaux du rapport et images individuelles répartis sur le pool de rendu (processus)
+            report_path, individual_images = await render_case_parallel(
+                predictions, representative_slices, original_data, normalized_data, case_name, metrics,
+                output_dir, on_demand=settings.AI_INDIVIDUAL_IMAGES_ON_DEMAND
+            )
+        else:
+            report_path, individual_images = await inference_executor.run(
+                render_case,
+                predictions, representative_slices, original_data, normalized_data, case_name, metrics, output_dir,
+                settings.AI_INDIVIDUAL_IMAGES_ON_DEMAND
+            )
 
-                # Génération des images individuelles (IDENTIQUES au rapport complet)
-                print("  📸 Génération des images individuelles...")
-                individual_images = save_individual_images(
-                    predictions, representative_slices, original_data,
-                    normalized_data, case_name, output_dir
-                )
+        print(f"✅ Traitement terminé pour patient {patient_id}")
+        print(f"📄 Rapport: {report_path}")
+        print(f"📸 Images individuelles: {len(individual_images['images'])} fichiers")
+        print(f"📈 Volume tumoral: {metrics['total_volume']:.2f} cm³")
+        peak_rss = peak_rss_mb()
+        if peak_rss is not None:
+            print(f"🧮 Pic mémoire du processus: {peak_rss:.0f} Mo")
 
-                # 6. Nettoyer le dossier temporaire
-                import shutil
-                shutil.rmtree(str(temp_patient_dir), ignore_errors=True)
-
-                print(f"✅ Traitement terminé pour patient {patient_id}")
-                print(f"📄 Rapport: {report_path}")
-                print(f"📸 Images individuelles: {len(individual_images['images'])} fichiers")
-                print(f"📈 Volume tumoral: {metrics['total_volume']:.2f} cm³")
-
-                # Structure compatible avec le routeur CereBloom
-                return {
-                    "success": True,
-                    "patient_id": patient_id,
-                    "report_path": report_path,
-                    "individual_images": individual_images,
-                    "metrics": {
-                        # Structure compatible frontend
-                        "total_tumor_volume_cm3": metrics.get("total_volume", 0.0),
-                        "tumor_analysis": {
-                            "total_volume_cm3": metrics.get("total_volume", 0.0),
-                            "tumor_segments": [
-                                {
-                                    "type": "NECROTIC_CORE",
-                                    "name": "Noyau nécrotique/kystique",
-                                    "volume_cm3": metrics.get("necrotic_volume", 0.0),
-                                    "percentage": metrics.get("necrotic_percentage", 0.0),
-                                    "color_code": "#FF0000",
-                                    "description": "Zone centrale nécrotique"
-                                },
-                                {
-                                    "type": "PERITUMORAL_EDEMA",
-                                    "name": "Œdème péritumoral",
-                                    "volume_cm3": metrics.get("edema_volume", 0.0),
-                                    "percentage": metrics.get("edema_percentage", 0.0),
-                                    "color_code": "#00FF00",
-                                    "description": "Œdème autour de la tumeur"
-                                },
-                                {
-                                    "type": "ENHANCING_TUMOR",
-                                    "name": "Tumeur rehaussée",
-                                    "volume_cm3": metrics.get("enhancing_volume", 0.0),
-                                    "percentage": metrics.get("enhancing_percentage", 0.0),
-                                    "color_code": "#0080FF",
-                                    "description": "Tumeur active avec prise de contraste"
-                                }
-                            ]
+        # Structure compatible avec le routeur CereBloom
+        return {
+            "success": True,
+            "patient_id": patient_id,
+            "report_path": report_path,
+            "individual_images": individual_images,
+            "metrics": {
+                # Structure compatible frontend
+                "total_tumor_volume_cm3": metrics.get("total_volume", 0.0),
+                "tumor_analysis": {
+                    "total_volume_cm3": metrics.get("total_volume", 0.0),
+                    "tumor_segments": [
+                        {
+                            "type": "NECROTIC_CORE",
+                            "name": "Noyau nécrotique/kystique",
+                            "volume_cm3": metrics.get("necrotic_volume", 0.0),
+                            "percentage": metrics.get("necrotic_percentage", 0.0),
+                            "color_code": "#FF0000",
+                            "description": "Zone centrale nécrotique"
                         },
-
-                        "recommendations": [
-                            f"Volume tumoral total: {metrics.get('total_volume', 0.0):.2f} cm³",
-                            "Corrélation avec l'expertise du radiologue recommandée",
-                            "Suivi volumétrique recommandé dans 3 mois"
-                        ]
-                    },
-                    "representative_slices": representative_slices,
-                    "modalities_used": modalities_found,
-                    "message": "Segmentation professionnelle terminée avec succès"
-                }
-
-            except Exception as e:
-                print(f"❌ Erreur lors du traitement: {e}")
-                return {
-                    "success": False,
-                    "patient_id": patient_id,
-                    "error": str(e)
-                }
-
-            # Sortir de la boucle après le premier traitement
-            break
+                        {
+                            "type": "PERITUMORAL_EDEMA",
+                            "name": "Œdème péritumoral",
+                            "volume_cm3": metrics.get("edema_volume", 0.0),
+                            "percentage": metrics.get("edema_percentage", 0.0),
+                            "color_code": "#00FF00",
+                            "description": "Œdème autour de la tumeur"
+                        },
+                        {
+                            "type": "ENHANCING_TUMOR",
+                            "name": "Tumeur rehaussée",
+                            "volume_cm3": metrics.get("enhancing_volume", 0.0),
+                            "percentage": metrics.get("enhancing_percentage", 0.0),
+                            "color_code": "#0080FF",
+                            "description": "Tumeur active avec prise de contraste"
+                        }
+                    ]
+                },
+
+                "recommendations": [
+                    f"Volume tumoral total: {metrics.get('total_volume', 0.0):.2f} cm³",
+                    "Corrélation avec l'expertise du radiologue recommandée",
+                    "Suivi volumétrique recommandé dans 3 mois"
+                ]
+            },
+            "representative_slices": representative_slices,
+            "skipped_slices": skipped_slices,
+            "from_cache": cached is not None,
+            "modalities_used": modalities_found,
+            "message": "Segmentation professionnelle terminée avec succès"
+        }
 
     except Exception as e:
         print(f"❌ Erreur critique: {e}")
@@ -1161,45 +1312,24 @@ async def process_patient_with_professional_model(patient_id: str, output_dir: s
         }
 
 def load_model_with_custom_objects(model_path):
-    """Charge OBLIGATOIREMENT votre modèle avec les objets personnalisés"""
+    """Retourne OBLIGATOIREMENT votre modèle via le registre partagé (chargé une seule fois)"""
     if not TENSORFLOW_AVAILABLE:
         raise RuntimeError("❌ TensorFlow requis pour charger votre modèle!")
 
-    print(f"🔧 Chargement du modèle: {model_path}")
-
     # Vérifier que le fichier existe
     if not os.path.exists(model_path):
         raise FileNotFoundError(f"❌ Modèle introuvable: {model_path}")
 
-    # Taille du modèle
-    size_mb = os.path.getsize(model_path) / (1024 * 1024)
-    print(f"📊 Taille du modèle: {size_mb:.1f} MB")
-
-    custom_objects = {
-        "dice_coef": dice_coef,
-        "precision": precision,
-        "sensitivity": sensitivity,
-        "specificity": specificity,
-        "dice_coef_necrotic": dice_coef_necrotic,
-        "dice_coef_edema": dice_coef_edema,
-        "dice_coef_enhancing": dice_coef_enhancing
-    }
+    from services.model_registry import model_registry
 
     try:
-        print("🔄 Chargement en cours...")
-        model = load_model(model_path, custom_objects=custom_objects, compile=False)
-
-        print("🔧 Compilation du modèle...")
-        # Compilation avec optimiseur médical
-        model.compile(
-            loss="categorical_crossentropy",
-            optimizer=tf.keras.optimizers.Adam(learning_rate=0.001),
-            metrics=['accuracy', tf.keras.metrics.MeanIoU(num_classes=4),
-                    dice_coef, precision, sensitivity, specificity,
-                    dice_coef_necrotic, dice_coef_edema, dice_coef_enhancing]
-        )
+        if os.path.abspath(model_path) != os.path.abspath(model_registry.model_path):
+            print(f"⚠️ Le registre utilise {model_registry.model_path} (AI_MODEL_PATH), pas {model_path}")
+
+        model = model_registry.get_model()
 
-        print(f"✅ Modèle chargé et compilé avec succès!")
+        print(f"✅ Modèle prêt (chargement: {model_registry.load_time_seconds:.2f}s, "
+              f"warm-up: {model_registry.warmup_time_seconds or 0:.2f}s)")
         print(f"📐 Input shape: {model.input_shape}")
         print(f"📐 Output shape: {model.output_shape}")
 
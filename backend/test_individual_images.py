@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+🧪 Test des images individuelles par coupe
+Rendu direct uint8 + cv2.imencode : mêmes fichiers et même images_list.json que
+les figures matplotlib, PNG lisibles et superposition conforme au mélange à 50 %.
+Rendu à la demande : images identiques au rendu du job, un seul rendu pour des
+requêtes concurrentes
+"""
+
+import asyncio
+import json
+import os
+import sys
+
+import cv2
+import nibabel as nib
+import numpy as np
+import pytest
+
+# Ajouter le répertoire backend au path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import test_brain_tumor_segmentationFinal as final_pipeline
+from config.settings import settings
+from services.individual_images import RENDER_SOURCES_FILENAME, IndividualImageStore
+from services.prediction_artifacts import save_prediction_artifact
+from services.segmentation_rendering import grayscale_image, overlay_image, render_slice_image
+from services.volume_reader import normalize_volume, open_volume
+from testing_fixtures import make_case
+
+
+def read_png(path):
+    image = cv2.imread(str(path), cv2.IMREAD_UNCHANGED)
+    assert image is not None, path
+    return image
+
+
+def test_same_files_and_images_list_as_matplotlib(tmp_path, monkeypatch):
+    predictions, original_data, normalized_data = make_case()
+    slice_indices = [40, 50, 60]
+
+    monkeypatch.setattr(settings, "AI_INDIVIDUAL_IMAGE_SIZE", 256)
+    monkeypatch.setattr(settings, "AI_INDIVIDUAL_IMAGE_RENDERER", "opencv")
+    direct = final_pipeline.save_individual_images(
+        predictions, slice_indices, original_data, normalized_data, "case", str(tmp_path / "opencv")
+    )
+    monkeypatch.setattr(settings, "AI_INDIVIDUAL_IMAGE_RENDERER", "matplotlib")
+    figures = final_pipeline.save_individual_images(
+        predictions, slice_indices, original_data, normalized_data, "case", str(tmp_path / "matplotlib")
+    )
+
+    assert direct == figures
+    assert len(direct["images"]) == len(slice_indices) * 6
+
+    individual_dir = tmp_path / "opencv" / "case_individual_images"
+    with open(individual_dir / "images_list.json") as f:
+        assert json.load(f) == direct
+    assert sorted(os.listdir(individual_dir)) == sorted(os.listdir(tmp_path / "matplotlib" / "case_individual_images"))
+
+    assert read_png(individual_dir / "slice_50_flair.png").shape == (256, 256)
+    assert read_png(individual_dir / "slice_50_overlay.png").shape == (256, 256, 3)
+
+
+def test_overlay_blends_tumor_pixels_only():
+    predictions, original_data, normalized_data = make_case(num_slices=60)
+    segmentation_hq, seg_colored_hq = final_pipeline.create_high_quality_segmentation(
+        np.argmax(predictions[50], axis=-1)
+    )
+
+    slice_data = final_pipeline.extract_slice_data(predictions, 50, original_data, normalized_data)
+    overlay = render_slice_image('overlay', slice_data, segmentation_hq, seg_colored_hq)
+    background = grayscale_image(normalized_data['t1ce'][:, :, 50 + final_pipeline.VOLUME_START_AT],
+                                 interpolation=cv2.INTER_LINEAR)
+
+    tumor = segmentation_hq > 0
+    assert tumor.any() and (~tumor).any()
+    np.testing.assert_array_equal(overlay[~tumor], np.repeat(background[~tumor, np.newaxis], 3, axis=-1))
+    expected = 0.5 * background[tumor, np.newaxis] + 0.5 * seg_colored_hq[tumor]
+    assert np.abs(overlay[tumor] - expected).max() <= 0.5
+    np.testing.assert_array_equal(overlay, overlay_image(background, segmentation_hq, seg_colored_hq))
+
+
+def test_grayscale_flat_slice_is_black():
+    assert not grayscale_image(np.full((128, 128), 3.0)).any()
+
+
+def write_case(output_dir, predictions, original_data, normalized_data):
+    """Artefact de prédiction, coupes conservées pour le rendu et liste d'images sans PNG (mode à la demande)"""
+    save_prediction_artifact(output_dir, predictions, final_pipeline.VOLUME_START_AT)
+    slices = final_pipeline.extract_slices_data(predictions, [40, 50], original_data, normalized_data)
+    return final_pipeline.save_individual_images_manifest(slices, "case", str(output_dir))
+
+
+@pytest.mark.asyncio
+async def test_on_demand_matches_eager_rendering_after_upload_deletion(tmp_path):
+    predictions, original_data, _ = make_case()
+    uploads = {}
+    for modality, entry in original_data.items():
+        uploads[modality] = tmp_path / f"{modality}.nii"
+        nib.save(nib.Nifti1Image(entry['data'], np.eye(4)), str(uploads[modality]))
+    volumes = {modality: open_volume(str(path)) for modality, path in uploads.items()}
+    original_data = {modality: {'data': volume} for modality, volume in volumes.items()}
+    normalized_data = {modality: normalize_volume(volume) for modality, volume in volumes.items()}
+
+    manifest = write_case(tmp_path, predictions, original_data, normalized_data)
+    individual_dir = tmp_path / "case_individual_images"
+    assert len(manifest["images"]) == 12
+    assert not list(individual_dir.glob("*.png"))
+    assert (individual_dir / RENDER_SOURCES_FILENAME).exists()
+    with open(individual_dir / "images_list.json") as f:
+        assert json.load(f) == final_pipeline.individual_images_list([40, 50], "case")
+
+    eager = final_pipeline.save_individual_images(
+        predictions, [40, 50], original_data, normalized_data, "case", str(tmp_path / "eager")
+    )
+
+    # Série d'images supprimée (delete_image_series) : le rendu n'utilise que la copie du job
+    del volumes, original_data, normalized_data
+    for path in uploads.values():
+        path.unlink()
+
+    store = IndividualImageStore()
+    for image in eager["images"]:
+        path = await store.get(tmp_path, "case", image["filename"])
+        expected = read_png(tmp_path / "eager" / "case_individual_images" / image["filename"])
+        np.testing.assert_array_equal(read_png(path), expected)
+    assert store.renders == 12
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_render_once(tmp_path):
+    write_case(tmp_path, *make_case())
+    store = IndividualImageStore()
+
+    paths = await asyncio.gather(*(store.get(tmp_path, "case", "slice_50_overlay.png") for _ in range(8)))
+    assert len(set(paths)) == 1 and paths[0].exists()
+    assert (store.renders, store.coalesced) == (1, 7)
+
+    await store.get(tmp_path, "case", "slice_50_overlay.png")
+    assert store.get_stats() == {"rendering": 0, "renders": 1, "coalesced": 7, "disk_hits": 1}
+
+
+@pytest.mark.asyncio
+async def test_on_demand_rejects_unknown_slices(tmp_path):
+    write_case(tmp_path, *make_case())
+    store = IndividualImageStore()
+
+    with pytest.raises(ValueError):
+        await store.get(tmp_path, "case", "slice_500_t1.png")
+    with pytest.raises(ValueError):
+        await store.get(tmp_path, "case", "slice_60_t1.png")  # Coupe non représentative
+    with pytest.raises(FileNotFoundError):
+        await store.get(tmp_path, "other_case", "slice_50_t1.png")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
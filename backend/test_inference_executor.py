@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+🧪 Test de l'exécuteur d'inférence
+Vérifie que /health reste réactif pendant qu'une segmentation tourne : le vrai
+pipeline professionnel est exécuté avec un modèle factice dont predict bloque
+"""
+
+import os
+import sys
+import time
+import asyncio
+import threading
+import statistics
+
+import numpy as np
+import pytest
+import httpx
+
+# Ajouter le répertoire backend au path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# cerebloom_main monte /static au chargement du module
+os.makedirs("static", exist_ok=True)
+
+import test_brain_tumor_segmentationFinal as final_pipeline
+from cerebloom_main import app
+from config.settings import settings
+from services.inference_executor import InferenceExecutor
+from services.model_registry import model_registry
+from test_professional_pipeline_io import no_database_query, write_case
+
+PREDICT_SECONDS = 2.0
+HEALTH_PROBES = 10
+HEALTH_LATENCY_BOUND = PREDICT_SECONDS / 4  # Sans exécuteur, /health attendrait la fin de predict
+
+
+class BlockingModel:
+    """Modèle factice : predict bloque le thread appelant comme un vrai model.predict"""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.started = threading.Event()
+        self.finished = threading.Event()
+
+    def predict(self, batch, verbose=0):
+        self.started.set()
+        time.sleep(self.seconds)
+        predictions = np.zeros(batch.shape[:3] + (4,), dtype=np.float32)
+        predictions[..., 0] = 1.0
+        self.finished.set()
+        return predictions
+
+
+async def measure_health_latency(client: httpx.AsyncClient, probes: int = HEALTH_PROBES) -> list:
+    """Latences successives de /health en secondes"""
+    latencies = []
+    for _ in range(probes):
+        start = time.perf_counter()
+        await client.get("/health")
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.05)
+    return latencies
+
+
+@pytest.mark.asyncio
+async def test_health_latency_flat_during_segmentation(tmp_path, monkeypatch):
+    """La latence de /health ne doit pas dépendre de l'inférence d'une segmentation en cours"""
+    uploads = tmp_path / "uploads"
+    uploads.mkdir()
+    images_by_modality = write_case(uploads)
+    model_path = tmp_path / "my_model.h5"
+    model_path.write_bytes(b"model")
+    model = BlockingModel(PREDICT_SECONDS)
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(final_pipeline, "TENSORFLOW_AVAILABLE", True)
+    monkeypatch.setattr(final_pipeline, "load_patient_images", no_database_query)
+    monkeypatch.setattr(model_registry, "model_path", str(model_path))
+    monkeypatch.setattr(model_registry, "model", model)
+    monkeypatch.setattr(settings, "AI_PREDICTION_CACHE", False)
+    monkeypatch.setattr(settings, "AI_INPUT_PRECOMPUTE", False)
+    monkeypatch.setattr(settings, "AI_PARALLEL_RENDERING", False)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        baseline = await measure_health_latency(client)
+
+        segmentation = asyncio.create_task(final_pipeline.process_patient_with_professional_model(
+            patient_id="patient-health",
+            output_dir=str(tmp_path / "results"),
+            images_by_modality=images_by_modality
+        ))
+        while not model.started.is_set():
+            assert not segmentation.done(), (await segmentation).get("error")
+            await asyncio.sleep(0.01)
+
+        during = await measure_health_latency(client)
+        assert not model.finished.is_set(), "L'inférence doit couvrir toute la mesure"
+        result = await segmentation
+
+    assert result["success"], result.get("error")
+
+    baseline_median = statistics.median(baseline)
+    during_max = max(during)
+    print(f"   /health médiane={baseline_median * 1000:.1f}ms, "
+          f"max pendant l'inférence={during_max * 1000:.1f}ms")
+
+    assert during_max < HEALTH_LATENCY_BOUND
+    assert statistics.median(during) < baseline_median + 0.1
+
+
+def test_executor_rejects_unknown_mode():
+    """Seuls les modes thread et process sont acceptés"""
+    with pytest.raises(ValueError):
+        InferenceExecutor(mode="gpu")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v", "-s"]))
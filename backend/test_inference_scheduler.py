@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+🧪 Test de l'ordonnanceur d'inférence (micro-batching)
+Vérifie que les jobs concurrents sont fusionnés puis redécoupés correctement
+"""
+
+import os
+import sys
+import time
+import asyncio
+
+import numpy as np
+import pytest
+
+# Ajouter le répertoire backend au path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.settings import settings
+from services.inference_executor import InferenceExecutor, inference_executor
+from services.inference_scheduler import InferenceScheduler
+
+
+class RecordingPredictor:
+    """Faux modèle : renvoie l'entrée et mémorise la taille de chaque batch"""
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def __call__(self, batch: np.ndarray) -> np.ndarray:
+        self.batch_sizes.append(len(batch))
+        return batch * 2.0
+
+
+def make_job(job_id: int, slices: int) -> np.ndarray:
+    return np.full((slices, 4, 4, 2), job_id, dtype=np.float32)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_jobs_are_merged_and_split():
+    """Trois jobs concurrents : un seul predict, chaque job récupère ses propres coupes"""
+    predictor = RecordingPredictor()
+    executor = InferenceExecutor(mode="thread", max_workers=1)
+    scheduler = InferenceScheduler(predict_fn=predictor, max_batch_slices=300, max_wait_ms=100, executor=executor)
+
+    try:
+        jobs = [make_job(i, 100) for i in range(1, 4)]
+        results = await asyncio.gather(*(scheduler.predict(job) for job in jobs))
+    finally:
+        executor.shutdown()
+
+    assert predictor.batch_sizes == [300]
+    for job, result in zip(jobs, results):
+        np.testing.assert_array_equal(result, job * 2.0)
+
+    stats = scheduler.get_stats()
+    assert stats["total_jobs"] == 3
+    assert stats["total_batches"] == 1
+    assert stats["throughput_slices_per_s"] > 0
+
+
+@pytest.mark.asyncio
+async def test_batch_size_limit_is_respected():
+    """Un job qui dépasserait max_batch_slices part dans le batch suivant"""
+    predictor = RecordingPredictor()
+    executor = InferenceExecutor(mode="thread", max_workers=1)
+    scheduler = InferenceScheduler(predict_fn=predictor, max_batch_slices=150, max_wait_ms=100, executor=executor)
+
+    try:
+        jobs = [make_job(i, 100) for i in range(1, 4)]
+        results = await asyncio.gather(*(scheduler.predict(job) for job in jobs))
+    finally:
+        executor.shutdown()
+
+    assert predictor.batch_sizes == [100, 100, 100]
+    for job, result in zip(jobs, results):
+        np.testing.assert_array_equal(result, job * 2.0)
+
+
+@pytest.mark.asyncio
+async def test_progress_chunks_are_submitted_together(monkeypatch):
+    """Avec suivi de progression, les blocs partent ensemble : un seul predict pour le volume"""
+    monkeypatch.setattr(settings, "AI_SLICE_FILTER", False)
+    monkeypatch.setattr(settings, "AI_PROGRESS_CHUNK_SLICES", 10)
+    predictor = RecordingPredictor()
+    executor = InferenceExecutor(mode="thread", max_workers=1)
+    scheduler = InferenceScheduler(predict_fn=lambda batch: predictor(np.repeat(batch, 2, axis=-1)),
+                                   max_batch_slices=100, max_wait_ms=100, executor=executor)
+    updates = []
+
+    try:
+        volume = make_job(1, 40) * np.arange(40, dtype=np.float32)[:, None, None, None]
+        predictions, selection = await scheduler.predict_volume(
+            volume, progress=lambda done, total: updates.append((done, total))
+        )
+    finally:
+        executor.shutdown()
+
+    assert predictor.batch_sizes == [40]
+    assert selection.informative == 40
+    np.testing.assert_array_equal(predictions, np.repeat(volume, 2, axis=-1) * 2.0)
+    assert updates == [(0, 40), (10, 40), (20, 40), (30, 40), (40, 40)]
+
+
+@pytest.mark.asyncio
+async def test_predict_runs_on_dedicated_executor():
+    """Le predict ne partage pas l'exécuteur d'inférence : un job CPU bloquant ne fausse pas le débit"""
+    def slow_predict(batch):
+        time.sleep(0.05)
+        return batch * 2.0
+
+    scheduler = InferenceScheduler(predict_fn=slow_predict, max_batch_slices=100, max_wait_ms=0)
+    blocker = inference_executor.submit(time.sleep, 0.3)
+
+    try:
+        result = await scheduler.predict(make_job(1, 10))
+        assert not blocker.done()
+    finally:
+        await blocker
+        scheduler.shutdown()
+
+    assert scheduler.executor is not inference_executor
+    np.testing.assert_array_equal(result, make_job(1, 10) * 2.0)
+    stats = scheduler.get_stats()
+    assert stats["total_batches"] == 1
+    assert stats["throughput_slices_per_s"] > 10 / 0.3
+    assert stats["queue_delay_ms"]["max"] < 300
+
+
+if __name__ == "__main__":
+    print("🧪 === TEST ORDONNANCEUR D'INFÉRENCE ===")
+    asyncio.run(test_concurrent_jobs_are_merged_and_split())
+    asyncio.run(test_batch_size_limit_is_respected())
+    print("✅ Micro-batching correct")
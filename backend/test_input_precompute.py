@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+🧪 Test du pré-calcul de l'entrée du modèle
+Tenseur float16 écrit à côté des uploads, réutilisé tant que FLAIR / T1CE sont inchangés
+"""
+
+import os
+import sys
+import asyncio
+
+import numpy as np
+import nibabel as nib
+import pytest
+
+# Ajouter le répertoire backend au path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.settings import settings
+from services.input_precompute import InputPrecomputer
+from services.preprocessing import build_model_input
+from services.volume_reader import normalize_volume, open_volume
+
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "AI_INPUT_PRECOMPUTE", True)
+    monkeypatch.setattr(settings, "AI_BRAIN_CROP", False)
+
+    rng = np.random.default_rng(0)
+    for modality in ("flair", "t1ce"):
+        data = np.zeros((64, 64, 140), dtype=np.int16)
+        data[8:56, 8:56, 20:120] = rng.integers(1, 1000, (48, 48, 100))
+        nib.save(nib.Nifti1Image(data, np.eye(4)), str(tmp_path / f"series_{modality}.nii"))
+    return tmp_path
+
+
+def modality_paths(upload_dir):
+    return {"FLAIR": str(upload_dir / "series_flair.nii"), "T1CE": str(upload_dir / "series_t1ce.nii")}
+
+
+@pytest.mark.asyncio
+async def test_precomputed_input_matches_fresh_preprocessing(upload_dir):
+    precomputer = InputPrecomputer()
+    paths = modality_paths(upload_dir)
+
+    assert precomputer.schedule(paths)
+    X = await precomputer.aload(paths)  # Attend le pré-calcul en cours
+
+    expected = build_model_input({
+        modality.lower(): normalize_volume(open_volume(path)) for modality, path in paths.items()
+    })
+    assert X.dtype == np.float32 and X.shape == expected.shape
+    np.testing.assert_allclose(X, expected, atol=1e-3)
+    assert (upload_dir / "precomputed").is_dir()
+    assert precomputer.get_stats()["completed"] == 1
+    assert precomputer.get_stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_changed_image_is_not_reused(upload_dir):
+    precomputer = InputPrecomputer()
+    paths = modality_paths(upload_dir)
+    precomputer.schedule(paths)
+    assert await precomputer.aload(paths) is not None
+
+    with open(paths["FLAIR"], "ab") as f:
+        f.write(b"\0" * 16)
+    assert await precomputer.aload(paths) is None
+    assert precomputer.get_stats()["misses"] == 1
+
+
+def test_missing_t1ce_is_not_scheduled(upload_dir):
+    precomputer = InputPrecomputer()
+
+    async def schedule():
+        return precomputer.schedule({"FLAIR": str(upload_dir / "series_flair.nii")})
+
+    assert asyncio.run(schedule()) is False
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
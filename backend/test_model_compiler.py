@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+🧪 Test de l'artefact d'inférence compilé
+Parité SavedModel / Keras, réutilisation du cache et comparaison des temps de chargement
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pytest
+
+# Ajouter le répertoire backend au path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+tf = pytest.importorskip("tensorflow")
+
+from services.model_compiler import ModelCompiler, CompiledPredictor, make_reference_batch
+from testing_fixtures import build_tiny_unet
+
+
+@pytest.mark.parametrize("jit_compile", [False, True])
+def test_artifact_parity_and_cache(tmp_path, jit_compile):
+    """Le SavedModel reproduit les sorties Keras et n'est construit qu'une fois"""
+    model_path = str(tmp_path / "tiny_model.h5")
+    keras_model = build_tiny_unet(model_path)
+    loads = []
+
+    def keras_loader():
+        loads.append(time.perf_counter())
+        return tf.keras.models.load_model(model_path, compile=False)
+
+    compiler = ModelCompiler(cache_dir=str(tmp_path / "compiled"), jit_compile=jit_compile)
+
+    predictor = compiler.load_or_build(model_path, keras_loader)
+    assert isinstance(predictor, CompiledPredictor)
+    assert compiler.last_report["source"] == "built"
+    assert compiler.last_report["parity"]["passed"]
+
+    sample = make_reference_batch((128, 128, 2), slices=5, seed=1)
+    np.testing.assert_allclose(predictor.predict(sample), keras_model.predict(sample, verbose=0), atol=1e-3)
+
+    # Second démarrage : artefact réutilisé, le .h5 n'est pas rechargé
+    reloaded = ModelCompiler(cache_dir=str(tmp_path / "compiled"), jit_compile=jit_compile)
+    cached = reloaded.load_or_build(model_path, keras_loader)
+    assert isinstance(cached, CompiledPredictor)
+    assert reloaded.last_report["source"] == "cache"
+    assert len(loads) == 1
+
+    print(f"   {'XLA' if jit_compile else 'graph'}: .h5 {reloaded.last_report['keras_load_seconds']:.2f}s, "
+          f"artefact {reloaded.last_report['artifact_load_seconds']:.2f}s")
+
+
+def test_artifact_invalidated_when_model_changes(tmp_path):
+    """Un nouveau .h5 (hash différent) reconstruit l'artefact"""
+    model_path = str(tmp_path / "tiny_model.h5")
+    compiler = ModelCompiler(cache_dir=str(tmp_path / "compiled"), jit_compile=False)
+    loader = lambda: tf.keras.models.load_model(model_path, compile=False)
+
+    build_tiny_unet(model_path)
+    compiler.load_or_build(model_path, loader)
+    first_hash = compiler.last_report["model_sha256"]
+
+    build_tiny_unet(model_path)
+    compiler.load_or_build(model_path, loader)
+    assert compiler.last_report["source"] == "built"
+    assert compiler.last_report["model_sha256"] != first_hash
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    print("🧪 === TEST ARTEFACT COMPILÉ ===")
+    for jit in (False, True):
+        with tempfile.TemporaryDirectory() as tmp:
+            test_artifact_parity_and_cache(Path(tmp), jit)
+    print("✅ Parité et cache validés")
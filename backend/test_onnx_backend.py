@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+🧪 Test du backend ONNX Runtime
+Accord des argmax Keras / ONNX sur des volumes synthétiques (N, 128, 128, 2)
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Ajouter le répertoire backend au path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+tf = pytest.importorskip("tensorflow")
+pytest.importorskip("onnxruntime")
+pytest.importorskip("tf2onnx")
+
+from config.settings import settings
+from services.model_compiler import make_reference_batch
+from services.onnx_backend import OnnxPredictor, export_to_onnx, load_or_export_onnx
+from testing_fixtures import build_tiny_unet
+
+MIN_ARGMAX_AGREEMENT = 0.999
+VOLUME_SLICES = 100
+
+
+def assert_same_segmentation(keras_model, predictor: OnnxPredictor, seed: int):
+    """Même forme softmax et mêmes classes prédites que Keras"""
+    volume = make_reference_batch((128, 128, 2), slices=VOLUME_SLICES, seed=seed)
+    expected = keras_model.predict(volume, verbose=0)
+    actual = predictor.predict(volume)
+
+    assert actual.shape == expected.shape == (VOLUME_SLICES, 128, 128, 4)
+    np.testing.assert_allclose(actual.sum(axis=-1), 1.0, atol=1e-4)
+    agreement = np.mean(np.argmax(actual, axis=-1) == np.argmax(expected, axis=-1))
+    assert agreement >= MIN_ARGMAX_AGREEMENT, f"Accord argmax {agreement:.4f}"
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_onnx_argmax_parity_tiny_model(tmp_path, seed):
+    model_path = str(tmp_path / "tiny_model.h5")
+    keras_model = build_tiny_unet(model_path, pooling=True)
+    onnx_path = export_to_onnx(keras_model, str(tmp_path / "tiny_model.onnx"))
+    assert_same_segmentation(keras_model, OnnxPredictor(onnx_path, intra_op_threads=2), seed)
+
+
+def test_onnx_export_is_cached(tmp_path):
+    model_path = str(tmp_path / "tiny_model.h5")
+    build_tiny_unet(model_path, pooling=True)
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return tf.keras.models.load_model(model_path, compile=False)
+
+    load_or_export_onnx(model_path, loader, cache_dir=str(tmp_path / "compiled"))
+    load_or_export_onnx(model_path, loader, cache_dir=str(tmp_path / "compiled"))
+    assert len(loads) == 1
+
+
+@pytest.mark.skipif(not os.path.exists(settings.AI_MODEL_PATH), reason="my_model.h5 absent")
+def test_onnx_argmax_parity_production_model(tmp_path):
+    from services.model_registry import ModelRegistry
+
+    keras_model = ModelRegistry()._load_keras_model()
+    onnx_path = export_to_onnx(keras_model, str(tmp_path / "my_model.onnx"))
+    predictor = OnnxPredictor(onnx_path)
+    for seed in range(3):
+        assert_same_segmentation(keras_model, predictor, seed)
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    print("🧪 === TEST PARITÉ ONNX ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        for s in range(3):
+            test_onnx_argmax_parity_tiny_model(Path(tmp), s)
+    print("✅ Argmax identiques entre Keras et ONNX")
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+🧪 Test du post-traitement fusionné
+Histogramme des classes par coupe et équivalence avec les anciens calculs
+(masque + somme par classe, argmax + np.unique par coupe), lissage
+morphologique cv2 de la pile de coupes face à scipy.ndimage coupe par coupe
+"""
+
+import os
+import sys
+
+import numpy as np
+from scipy import ndimage
+
+# Ajouter le répertoire backend au path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import test_brain_tumor_segmentationFinal as final_pipeline
+from services.postprocessing import (
+    slice_class_histograms, smooth_labels, smooth_prediction_labels, summarize_predictions
+)
+
+
+def calculate_tumor_metrics_reference(predictions, voxel_spacing=(1.0, 1.0, 1.0)):
+    """Ancienne implémentation : un masque complet et une somme par classe"""
+    segmentation = np.argmax(predictions, axis=-1)
+    metrics = {}
+    voxel_volume = np.prod(voxel_spacing)
+
+    for class_idx in range(1, 4):
+        class_info = final_pipeline.TUMOR_CLASSES[class_idx]
+        volume_voxels = np.sum(segmentation == class_idx)
+        volume_mm3 = volume_voxels * voxel_volume
+        metrics[f"volume_{class_info['abbr'].lower().replace(' ', '_')}"] = {
+            'voxels': int(volume_voxels),
+            'mm3': float(volume_mm3),
+            'cm3': float(volume_mm3 / 1000.0),
+            'percentage': float(volume_voxels / segmentation.size * 100)
+        }
+
+    total_volume = np.sum(segmentation > 0) * voxel_volume / 1000.0
+    metrics['total_tumor_volume_cm3'] = float(total_volume)
+    metrics['total_volume'] = float(total_volume)
+    for class_idx, alias in ((1, 'necrotic_volume'), (2, 'edema_volume'), (3, 'enhancing_volume')):
+        class_info = final_pipeline.TUMOR_CLASSES[class_idx]
+        metrics[alias] = metrics[f"volume_{class_info['abbr'].lower().replace(' ', '_')}"]['cm3']
+    for alias in ('necrotic', 'edema', 'enhancing'):
+        metrics[f'{alias}_percentage'] = (
+            metrics[f'{alias}_volume'] / total_volume * 100 if total_volume > 0 else 0.0
+        )
+    return metrics
+
+
+def find_representative_slices_reference(predictions, num_slices=3):
+    """Ancienne implémentation : argmax et np.unique pour chaque coupe"""
+    slice_scores = []
+    for i in range(predictions.shape[0]):
+        seg = np.argmax(predictions[i], axis=-1)
+        classes_present = len(np.unique(seg[seg > 0]))
+        tumor_coverage = np.sum(seg > 0) / seg.size
+        enhancing_presence = np.sum(seg == 3) / seg.size
+        slice_scores.append(classes_present * 2 + tumor_coverage + enhancing_presence * 3)
+
+    slice_scores = np.array(slice_scores)
+    selected_slices = [np.argmax(slice_scores)]
+    for _ in range(num_slices - 1):
+        remaining_scores = slice_scores.copy()
+        for selected in selected_slices:
+            distance_penalty = np.exp(-0.1 * np.abs(np.arange(len(remaining_scores)) - selected))
+            remaining_scores *= (1 - 0.7 * distance_penalty)
+        selected_slices.append(np.argmax(remaining_scores))
+    return [int(x) for x in sorted(selected_slices)]
+
+
+def make_predictions(seed=0, num_slices=70):
+    """Softmax avec une tumeur dont la composition varie d'une coupe à l'autre"""
+    rng = np.random.default_rng(seed)
+    predictions = rng.random((num_slices, 64, 64, 4)).astype(np.float32)
+    predictions[..., 0] += 1.2  # Fond majoritaire
+    predictions[20:50, 20:44, 20:44, 1:] += rng.random((30, 24, 24, 3)).astype(np.float32)
+    predictions[30:35, 25:35, 25:35, 3] += 2.0
+    return predictions
+
+
+def test_histograms_match_per_slice_bincount():
+    labels = np.argmax(make_predictions(), axis=-1).astype(np.uint8)
+    expected = np.stack([np.bincount(s.ravel(), minlength=4) for s in labels])
+
+    # Blocs qui ne divisent pas le nombre de coupes
+    np.testing.assert_array_equal(slice_class_histograms(labels, chunk_slices=32), expected)
+    np.testing.assert_array_equal(slice_class_histograms(labels, chunk_slices=9), expected)
+
+
+def test_metrics_and_slices_match_previous_implementation():
+    for seed in range(3):
+        predictions = make_predictions(seed)
+        expected_metrics = calculate_tumor_metrics_reference(predictions)
+        expected_slices = find_representative_slices_reference(predictions)
+
+        assert final_pipeline.calculate_tumor_metrics(predictions) == expected_metrics
+        assert final_pipeline.find_representative_slices(predictions) == expected_slices
+        assert final_pipeline.analyse_case(predictions) == (expected_metrics, expected_slices)
+
+
+def test_voxel_spacing_and_label_volume_input():
+    predictions = make_predictions()
+    labels = np.argmax(predictions, axis=-1).astype(np.uint8)
+    spacing = (0.9, 0.9, 1.5)
+
+    assert final_pipeline.calculate_tumor_metrics(labels, spacing) == \
+        calculate_tumor_metrics_reference(predictions, spacing)
+    assert final_pipeline.find_representative_slices(labels, num_slices=5) == \
+        find_representative_slices_reference(predictions, num_slices=5)
+
+
+def test_empty_slices_and_empty_volume():
+    predictions = make_predictions()
+    summary = summarize_predictions(predictions)
+    labels = np.argmax(predictions, axis=-1)
+    np.testing.assert_array_equal(summary.empty_slices, ~(labels > 0).any(axis=(1, 2)))
+    assert summarize_predictions(summary) is summary
+
+    background = np.zeros((10, 32, 32), dtype=np.uint8)
+    metrics = final_pipeline.calculate_tumor_metrics(background)
+    assert metrics['total_tumor_volume_cm3'] == 0.0
+    assert metrics['enhancing_percentage'] == 0.0
+    assert summarize_predictions(background).empty_slices.all()
+
+
+def test_memmapped_labels(tmp_path):
+    labels = np.argmax(make_predictions(), axis=-1).astype(np.uint8)
+    np.save(tmp_path / "labels.npy", labels)
+    mapped = np.load(tmp_path / "labels.npy", mmap_mode="r")
+
+    np.testing.assert_array_equal(summarize_predictions(mapped).histograms, summarize_predictions(labels).histograms)
+
+
+def apply_morphological_smoothing_reference(segmentation):
+    """Ancienne implémentation : trois opérations scipy.ndimage par classe et par coupe"""
+    smoothed = np.zeros_like(segmentation)
+    for class_idx in range(1, 4):
+        mask = (segmentation == class_idx)
+        if np.any(mask):
+            closed = ndimage.binary_closing(mask, structure=np.ones((3, 3)))
+            opened = ndimage.binary_opening(closed, structure=np.ones((2, 2)))
+            dilated = ndimage.binary_dilation(opened, structure=np.ones((2, 2)))
+            smoothed[dilated] = class_idx
+    return smoothed
+
+
+def make_noisy_labels(seed=0, shape=(12, 96, 96)):
+    """Taches de classes mélangées, bruit isolé et tumeur touchant les bords de l'image"""
+    rng = np.random.default_rng(seed)
+    labels = np.zeros(shape, dtype=np.uint8)
+    labels[:, 20:60, 20:70] = rng.integers(0, 4, (shape[0], 40, 50))
+    labels[:, 30:50, 30:50] = 2
+    labels[:, 38:44, 36:48] = 3
+    labels[:, :10, -8:] = 1  # Coin de l'image : bord constant à zéro
+    noise = rng.random(shape) < 0.01
+    labels[noise] = rng.integers(1, 4, int(noise.sum()))
+    return labels
+
+
+def test_smoothing_matches_scipy_per_slice():
+    for seed in range(3):
+        labels = make_noisy_labels(seed)
+        expected = np.stack([apply_morphological_smoothing_reference(s) for s in labels])
+
+        np.testing.assert_array_equal(smooth_labels(labels), expected)
+        # Coupe isolée (rendu)
+        np.testing.assert_array_equal(smooth_labels(labels[5]), expected[5])
+        np.testing.assert_array_equal(final_pipeline.apply_morphological_smoothing(labels[5]), expected[5])
+
+
+def test_smoothing_handles_large_stacks_and_softmax():
+    labels = make_noisy_labels(shape=(520, 64, 80))  # Plus de CV_CN_MAX coupes
+    expected = np.stack([apply_morphological_smoothing_reference(s) for s in labels])
+    np.testing.assert_array_equal(smooth_labels(labels), expected)
+
+    predictions = make_predictions()
+    np.testing.assert_array_equal(
+        smooth_prediction_labels(predictions),
+        np.stack([apply_morphological_smoothing_reference(s) for s in np.argmax(predictions, axis=-1).astype(np.uint8)])
+    )
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+🧪 Test du format de stockage des prédictions
+Aller-retour .npy / .npz, sidecar JSON et relecture mappée en mémoire
+"""
+
+import os
+import sys
+import json
+
+import numpy as np
+import pytest
+
+# Ajouter le répertoire backend au path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.prediction_artifacts import (
+    SIDECAR_FILENAME,
+    has_prediction_artifact,
+    load_prediction_artifact,
+    save_prediction_artifact,
+    slice_labels,
+    to_label_volume
+)
+
+
+def make_predictions(seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return rng.random((20, 32, 32, 4)).astype(np.float32)
+
+
+def test_label_volume_is_uint8_argmax():
+    predictions = make_predictions()
+    labels = to_label_volume(predictions)
+    assert labels.dtype == np.uint8
+    np.testing.assert_array_equal(labels, np.argmax(predictions, axis=-1))
+    # Un volume déjà étiqueté n'est pas recopié
+    assert to_label_volume(labels) is labels
+    np.testing.assert_array_equal(slice_labels(predictions, 7), labels[7])
+    np.testing.assert_array_equal(slice_labels(labels, 7), labels[7])
+
+
+def test_npy_round_trip_is_memory_mapped(tmp_path):
+    predictions = make_predictions()
+    sidecar = save_prediction_artifact(tmp_path, predictions, slice_offset=22, model_hash="abc",
+                                       store_probabilities=True, compressed=False)
+
+    assert has_prediction_artifact(tmp_path)
+    metadata = json.loads(sidecar.read_text())
+    assert metadata["shape"] == [20, 32, 32]
+    assert metadata["slice_offset"] == 22
+    assert metadata["model_sha256"] == "abc"
+
+    artifact = load_prediction_artifact(tmp_path, load_probabilities=True)
+    assert isinstance(artifact.labels, np.memmap)
+    assert artifact.slice_offset == 22
+    np.testing.assert_array_equal(artifact.labels, np.argmax(predictions, axis=-1))
+    assert artifact.probabilities.dtype == np.float16
+    np.testing.assert_allclose(artifact.probabilities, predictions, atol=1e-3)
+
+
+def test_npz_round_trip_without_probabilities(tmp_path):
+    predictions = make_predictions(1)
+    save_prediction_artifact(tmp_path, predictions, slice_offset=22,
+                             store_probabilities=False, compressed=True)
+
+    artifact = load_prediction_artifact(tmp_path, load_probabilities=True)
+    assert artifact.metadata["storage"] == "npz"
+    assert artifact.probabilities is None
+    np.testing.assert_array_equal(artifact.labels, np.argmax(predictions, axis=-1))
+
+
+def test_missing_sidecar_means_no_artifact(tmp_path):
+    save_prediction_artifact(tmp_path, make_predictions(), slice_offset=22, compressed=False)
+    (tmp_path / SIDECAR_FILENAME).unlink()
+    assert not has_prediction_artifact(tmp_path)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
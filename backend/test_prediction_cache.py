@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+🧪 Test du cache des prédictions
+Clé par contenu, compteurs hit/miss et éviction LRU
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pytest
+
+# Ajouter le répertoire backend au path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.settings import settings
+import services.prediction_cache as prediction_cache_module
+from services.prediction_cache import PredictionCache
+
+
+def make_predictions(seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return rng.random((100, 128, 128, 4)).astype(np.float32)
+
+
+@pytest.fixture
+def modality_files(tmp_path, monkeypatch):
+    model_path = tmp_path / "my_model.h5"
+    model_path.write_bytes(b"model-v1")
+    monkeypatch.setattr(settings, "AI_MODEL_PATH", str(model_path))
+
+    paths = {}
+    for modality in ("flair", "t1", "t1ce", "t2"):
+        path = tmp_path / f"{modality}.nii"
+        path.write_bytes(modality.encode() * 100)
+        paths[modality] = str(path)
+    return paths
+
+
+def test_round_trip_and_counters(tmp_path, modality_files):
+    cache = PredictionCache(cache_dir=str(tmp_path / "cache"))
+    key = cache.build_key(modality_files)
+
+    assert cache.get(key) is None
+    predictions = make_predictions(0)
+    cache.put(key, predictions, skipped_slices=12)
+
+    restored, skipped = cache.get(key)
+    assert skipped == 12
+    assert restored.dtype == np.uint8
+    np.testing.assert_array_equal(restored, np.argmax(predictions, axis=-1))
+    assert cache.get_stats()["hits"] == 1
+    assert cache.get_stats()["misses"] == 1
+
+
+def test_probabilities_stored_in_float16(tmp_path, modality_files):
+    cache = PredictionCache(cache_dir=str(tmp_path / "cache"), store_probabilities=True)
+    key = cache.build_key(modality_files)
+    predictions = make_predictions(1)
+    cache.put(key, predictions)
+
+    restored, _ = cache.get(key)
+    np.testing.assert_allclose(restored, predictions, atol=1e-3)
+
+
+def test_key_changes_with_inputs_and_model(tmp_path, modality_files):
+    cache = PredictionCache(cache_dir=str(tmp_path / "cache"))
+    key = cache.build_key(modality_files)
+
+    with open(modality_files["flair"], "ab") as f:
+        f.write(b"new-acquisition")
+    flair_key = cache.build_key(modality_files)
+    assert flair_key != key
+
+    with open(settings.AI_MODEL_PATH, "ab") as f:
+        f.write(b"retrained")
+    assert cache.build_key(modality_files) != flair_key
+
+
+def test_missing_model_disables_caching(tmp_path, modality_files):
+    os.remove(settings.AI_MODEL_PATH)
+    cache = PredictionCache(cache_dir=str(tmp_path / "cache"))
+
+    assert cache.build_key(modality_files) is None
+
+
+def test_lru_eviction_keeps_recent_entries(tmp_path):
+    cache = PredictionCache(cache_dir=str(tmp_path / "cache"))
+    cache.put("a", make_predictions(0))
+    entry_size = (tmp_path / "cache" / "a.npz").stat().st_size
+    cache.max_bytes = int(entry_size * 2.5)
+
+    time.sleep(0.01)
+    cache.put("b", make_predictions(1))
+    time.sleep(0.01)
+    assert cache.get("a") is not None  # "a" devient la plus récente
+    time.sleep(0.01)
+    cache.put("c", make_predictions(2))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_file_hash_memo_is_bounded(tmp_path, modality_files, monkeypatch):
+    monkeypatch.setattr(prediction_cache_module, "FILE_HASH_MEMO_SIZE", 2)
+    cache = PredictionCache(cache_dir=str(tmp_path / "cache"))
+
+    for path in modality_files.values():
+        cache.file_hash(path)
+
+    assert len(cache._file_hashes) == 2
+    assert [key[0] for key in cache._file_hashes] == [
+        os.path.abspath(modality_files["t1ce"]), os.path.abspath(modality_files["t2"])
+    ]
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+🧪 Test du prétraitement avant inférence
+Filtre des coupes vides, recadrage sur le cerveau, redimensionnement par bloc
+et reconstitution des prédictions
+"""
+
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+# Ajouter le répertoire backend au path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.preprocessing import (
+    IMG_SIZE, VOLUME_SLICES, VOLUME_START_AT, build_model_input, compute_brain_bbox, fill_background,
+    select_informative_slices, uncrop_predictions
+)
+
+
+def make_volume() -> np.ndarray:
+    """10 coupes : 0-2 vides, 3-7 avec tissu, 8-9 hors volume (zéros)"""
+    volume = np.zeros((10, 128, 128, 2), dtype=np.float32)
+    volume[3:8, 40:90, 40:90, 0] = 0.6
+    volume[3:8, 50:80, 50:80, 1] = 0.8
+    return volume
+
+
+def test_empty_slices_are_skipped():
+    selection = select_informative_slices(make_volume())
+    assert selection.mask.tolist() == [False] * 3 + [True] * 5 + [False] * 2
+    assert selection.skipped == 5
+
+
+def test_noise_below_threshold_is_skipped():
+    volume = make_volume()
+    volume[0, :2, :2, 0] = 0.5  # 4 pixels isolés : sous le seuil de fraction
+    assert not select_informative_slices(volume).mask[0]
+
+
+def test_fill_background_restores_full_volume():
+    selection = select_informative_slices(make_volume())
+    informative = np.full((selection.informative, 128, 128, 4), 0.25, dtype=np.float32)
+
+    predictions = fill_background(selection, informative)
+
+    assert predictions.shape == (10, 128, 128, 4)
+    np.testing.assert_array_equal(predictions[3:8], informative)
+    assert (np.argmax(predictions[:3], axis=-1) == 0).all()
+    assert (predictions[8:, ..., 0] == 1.0).all()
+
+
+def make_brain(shape=(240, 240, 155)) -> np.ndarray:
+    """Ellipsoïde non nul centré, entouré de fond"""
+    x, y, z = np.ogrid[:shape[0], :shape[1], :shape[2]]
+    inside = ((x - 120) / 70) ** 2 + ((y - 110) / 85) ** 2 + ((z - 75) / 60) ** 2 <= 1
+    return inside.astype(np.float64)
+
+
+def test_brain_bbox_is_square_and_padded():
+    bbox = compute_brain_bbox([make_brain()], padding=4)
+    assert bbox.x1 - bbox.x0 == bbox.y1 - bbox.y0
+    assert bbox.x0 <= 120 - 70 - 4 + 1 and bbox.x1 >= 120 + 70 + 4
+    assert bbox.z0 == 15 - 4 and bbox.z1 == 135 + 1 + 4
+
+
+def test_empty_volume_keeps_full_grid():
+    bbox = compute_brain_bbox([np.zeros((240, 240, 155))])
+    assert (bbox.x0, bbox.x1, bbox.y0, bbox.y1) == (0, 240, 0, 240)
+
+
+def test_uncrop_places_predictions_in_full_grid():
+    brain = make_brain()
+    bbox = compute_brain_bbox([brain], padding=4)
+    cropped_input = build_model_input({"flair": brain, "t1ce": brain}, bbox)
+
+    # Prédiction factice : tumeur (classe 2) partout où il y a du cerveau dans la grille recadrée
+    predictions = np.zeros(cropped_input.shape[:3] + (4,), dtype=np.float32)
+    predictions[..., 0] = cropped_input[..., 0] < 0.5
+    predictions[..., 2] = cropped_input[..., 0] >= 0.5
+
+    restored = uncrop_predictions(predictions, bbox)
+    full_input = build_model_input({"flair": brain, "t1ce": brain})
+
+    expected = full_input[..., 0] >= 0.5
+    agreement = np.mean((np.argmax(restored, axis=-1) == 2) == expected)
+    assert restored.shape == (100, 128, 128, 4)
+    assert agreement > 0.99
+    assert (np.argmax(restored[bbox.z1 - VOLUME_START_AT:], axis=-1) == 0).all()
+
+
+def build_model_input_loop(normalized_data, bbox=None):
+    """Implémentation de référence : une coupe et une modalité à la fois"""
+    flair, t1ce = normalized_data['flair'], normalized_data['t1ce']
+    X = np.zeros((VOLUME_SLICES, IMG_SIZE, IMG_SIZE, 2))
+    for slice_idx in range(VOLUME_SLICES):
+        z_idx = slice_idx + VOLUME_START_AT
+        if z_idx >= flair.shape[2] or (bbox is not None and not bbox.contains_slice(z_idx)):
+            continue
+        for channel, volume in enumerate((flair, t1ce)):
+            plane = volume[:, :, z_idx] if bbox is None else bbox.crop(volume[:, :, z_idx])
+            X[slice_idx, :, :, channel] = cv2.resize(plane, (IMG_SIZE, IMG_SIZE))
+    return X
+
+
+def make_normalized_case(seed: int = 0):
+    rng = np.random.default_rng(seed)
+    brain = make_brain()
+    return {
+        "flair": brain * rng.random(brain.shape),
+        "t1ce": brain * rng.random(brain.shape)
+    }
+
+
+def test_slab_resize_matches_slice_loop():
+    data = make_normalized_case()
+    bbox = compute_brain_bbox([data["flair"], data["t1ce"]], padding=4)
+
+    for box in (None, bbox):
+        expected = build_model_input_loop(data, box)
+        actual = build_model_input(data, box)
+        assert actual.dtype == np.float32
+        np.testing.assert_allclose(actual, expected, atol=1e-5)
+
+
+def test_slab_resize_handles_short_volumes():
+    data = {key: volume[:, :, :60] for key, volume in make_normalized_case(1).items()}
+    actual = build_model_input(data)
+    np.testing.assert_allclose(actual, build_model_input_loop(data), atol=1e-5)
+    assert not actual[60 - VOLUME_START_AT:].any()
+
+
+def test_slab_resize_micro_benchmark():
+    """Micro-benchmark : médiane de 5 exécutions, affichée avec pytest -s"""
+    data = make_normalized_case()
+
+    def median_time(fn, runs=5):
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+        return float(np.median(timings))
+
+    loop_time = median_time(lambda: build_model_input_loop(data))
+    slab_time = median_time(lambda: build_model_input(data))
+    print(f"⏱️ Boucle par coupe: {loop_time * 1000:.1f} ms | Bloc vectorisé: {slab_time * 1000:.1f} ms "
+          f"(x{loop_time / slab_time:.1f})")
+
+
+if __name__ == "__main__":
+    print("🧪 === TEST PRÉTRAITEMENT ===")
+    test_empty_slices_are_skipped()
+    test_noise_below_threshold_is_skipped()
+    test_fill_background_restores_full_volume()
+    test_brain_bbox_is_square_and_padded()
+    test_empty_volume_keeps_full_grid()
+    test_uncrop_places_predictions_in_full_grid()
+    test_slab_resize_matches_slice_loop()
+    test_slab_resize_handles_short_volumes()
+    test_slab_resize_micro_benchmark()
+    print("✅ Filtre de coupes, recadrage et redimensionnement par bloc validés")
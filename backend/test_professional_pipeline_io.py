@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+🧪 Test de non-régression du pipeline professionnel
+Les fichiers du patient sont lus sur place : aucune copie sous images/
+et aucune seconde requête MedicalImage quand le routeur fournit les images.
+Le mode simulation exécute le pipeline complet sans TensorFlow ni modèle
+"""
+
+import os
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+import nibabel as nib
+import pytest
+
+# Ajouter le répertoire backend au path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import test_brain_tumor_segmentationFinal as final_pipeline
+from config.settings import settings
+from services.inference_scheduler import inference_scheduler
+from services.model_registry import model_registry
+from services.prediction_cache import prediction_cache
+from services.preprocessing import SliceSelection
+
+
+def write_case(directory):
+    rng = np.random.default_rng(0)
+    images = {}
+    for modality in ("FLAIR", "T1", "T1CE", "T2"):
+        data = np.zeros((64, 64, 130), dtype=np.int16)
+        data[8:56, 8:56, 10:125] = rng.integers(1, 1000, (48, 48, 115))
+        path = directory / f"series_{modality.lower()}.nii"
+        nib.save(nib.Nifti1Image(data, np.eye(4)), str(path))
+        images[modality] = SimpleNamespace(file_path=str(path), image_metadata=None)
+    return images
+
+
+async def fake_predict_volume(batch, progress=None):
+    """Tumeur (classe 2) sur les coupes 30 à 60, fond ailleurs"""
+    predictions = np.zeros(batch.shape[:3] + (4,), dtype=np.float32)
+    predictions[..., 0] = 1.0
+    predictions[30:60, 40:80, 40:80] = (0.0, 0.0, 1.0, 0.0)
+    return predictions, SliceSelection(mask=np.ones(len(batch), dtype=bool))
+
+
+def no_preprocessing(*args, **kwargs):
+    raise AssertionError("Un hit du cache ne doit ni prétraiter ni prédire")
+
+
+async def no_database_query(patient_id):
+    raise AssertionError("Les images fournies par le routeur ne doivent pas être relues en base")
+
+
+@pytest.mark.asyncio
+async def test_patient_files_are_read_in_place(tmp_path, monkeypatch):
+    uploads = tmp_path / "uploads"
+    uploads.mkdir()
+    images_by_modality = write_case(uploads)
+    model_path = tmp_path / "my_model.h5"
+    model_path.write_bytes(b"model")
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(final_pipeline, "TENSORFLOW_AVAILABLE", True)
+    monkeypatch.setattr(final_pipeline, "load_patient_images", no_database_query)
+    monkeypatch.setattr(model_registry, "model_path", str(model_path))
+    monkeypatch.setattr(inference_scheduler, "predict_volume", fake_predict_volume)
+    monkeypatch.setattr(settings, "AI_PREDICTION_CACHE", False)
+    monkeypatch.setattr(settings, "AI_INPUT_PRECOMPUTE", False)
+
+    uploads_before = sorted(os.listdir(uploads))
+    result = await final_pipeline.process_patient_with_professional_model(
+        patient_id="patient-1",
+        output_dir=str(tmp_path / "results"),
+        images_by_modality=images_by_modality
+    )
+
+    assert result["success"], result.get("error")
+    assert not (tmp_path / "images").exists()
+    assert sorted(os.listdir(uploads)) == uploads_before
+    assert sorted(result["modalities_used"]) == ["flair", "t1", "t1ce", "t2"]
+
+
+@pytest.mark.asyncio
+async def test_simulation_mode_runs_without_model(tmp_path, monkeypatch):
+    uploads = tmp_path / "uploads"
+    uploads.mkdir()
+    images_by_modality = write_case(uploads)
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(final_pipeline, "TENSORFLOW_AVAILABLE", False)
+    monkeypatch.setattr(final_pipeline, "load_patient_images", no_database_query)
+    monkeypatch.setattr(model_registry, "model_path", str(tmp_path / "absent.h5"))
+    monkeypatch.setattr(settings, "AI_SIMULATION_MODE", True)
+    monkeypatch.setattr(settings, "AI_PREDICTION_CACHE", True)
+    monkeypatch.setattr(settings, "AI_INPUT_PRECOMPUTE", False)
+
+    result = await final_pipeline.process_patient_with_professional_model(
+        patient_id="patient-2",
+        output_dir=str(tmp_path / "results"),
+        images_by_modality=images_by_modality
+    )
+
+    assert result["success"], result.get("error")
+    assert os.path.exists(result["report_path"])
+
+
+@pytest.mark.asyncio
+async def test_cache_hit_skips_preprocessing(tmp_path, monkeypatch):
+    uploads = tmp_path / "uploads"
+    uploads.mkdir()
+    images_by_modality = write_case(uploads)
+    model_path = tmp_path / "my_model.h5"
+    model_path.write_bytes(b"model")
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(final_pipeline, "TENSORFLOW_AVAILABLE", True)
+    monkeypatch.setattr(final_pipeline, "load_patient_images", no_database_query)
+    monkeypatch.setattr(model_registry, "model_path", str(model_path))
+    monkeypatch.setattr(inference_scheduler, "predict_volume", fake_predict_volume)
+    monkeypatch.setattr(prediction_cache, "cache_dir", tmp_path / "cache")
+    monkeypatch.setattr(settings, "AI_MODEL_PATH", str(model_path))
+    monkeypatch.setattr(settings, "AI_PREDICTION_CACHE", True)
+    monkeypatch.setattr(settings, "AI_INPUT_PRECOMPUTE", False)
+
+    first = await final_pipeline.process_patient_with_professional_model(
+        patient_id="patient-3",
+        output_dir=str(tmp_path / "results-1"),
+        images_by_modality=images_by_modality
+    )
+    assert first["success"], first.get("error")
+
+    # Second passage : ni entrée du modèle, ni boîte englobante, ni predict
+    monkeypatch.setattr("services.preprocessing.build_model_input", no_preprocessing)
+    monkeypatch.setattr("services.preprocessing.compute_brain_bbox", no_preprocessing)
+    monkeypatch.setattr(inference_scheduler, "predict_volume", no_preprocessing)
+    hits_before = prediction_cache.hits
+
+    second = await final_pipeline.process_patient_with_professional_model(
+        patient_id="patient-3",
+        output_dir=str(tmp_path / "results-2"),
+        images_by_modality=images_by_modality
+    )
+
+    assert second["success"], second.get("error")
+    assert prediction_cache.hits == hits_before + 1
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
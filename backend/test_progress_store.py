@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+🧪 Test du store de progression des segmentations
+Étapes, compteur de coupes et rétention après la fin
+"""
+
+import os
+import sys
+import time
+
+# Ajouter le répertoire backend au path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.progress_store import ProgressStore, STAGES
+
+
+def test_stage_transitions_are_monotonic():
+    store = ProgressStore()
+    store.start("seg-1", patient_id="p1", doctor_id="d1")
+
+    percentages = []
+    for stage in ("load", "preprocess", "inference", "metrics", "render", "save"):
+        store.set_stage("seg-1", stage)
+        percentages.append(store.get("seg-1").percentage)
+
+    assert percentages == sorted(percentages)
+    assert store.get("seg-1").stage == "save"
+
+
+def test_inference_slices_interpolate_percentage():
+    store = ProgressStore()
+    store.start("seg-1")
+    store.set_slices("seg-1", 40, 80)
+
+    progress = store.get("seg-1").to_dict()
+    start, end = STAGES["inference"]
+    assert progress["stage"] == "inference"
+    assert progress["slices_done"] == 40 and progress["slices_total"] == 80
+    assert progress["percentage"] == (start + end) / 2
+    assert progress["estimated_remaining_seconds"] is not None
+
+
+def test_finished_entries_expire():
+    store = ProgressStore(retention_seconds=0.05)
+    store.start("seg-1")
+    store.finish("seg-1", "COMPLETED")
+    assert store.get("seg-1").percentage == 100.0
+
+    time.sleep(0.1)
+    assert store.get("seg-1") is None
+
+
+def test_unknown_segmentation_is_ignored():
+    store = ProgressStore()
+    store.set_stage("absent", "load")
+    store.set_slices("absent", 1, 2)
+    assert store.get("absent") is None
+
+
+if __name__ == "__main__":
+    print("🧪 === TEST PROGRESSION ===")
+    test_stage_transitions_are_monotonic()
+    test_inference_slices_interpolate_percentage()
+    test_finished_entries_expire()
+    test_unknown_segmentation_is_ignored()
+    print("✅ Store de progression validé")
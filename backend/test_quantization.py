@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+🧪 Test du mode d'inférence quantifié (TFLite float16 / int8)
+Contrôle d'exactitude Dice, refus d'activation sous le seuil ou sans volumes de référence
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Ajouter le répertoire backend au path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+tf = pytest.importorskip("tensorflow")
+
+from services.model_compiler import make_reference_batch
+from services.quantization import (
+    QuantizationGateError, TFLitePredictor, compute_class_dice, load_quantized_predictor
+)
+from testing_fixtures import build_tiny_unet
+
+
+def write_reference_set(directory):
+    directory.mkdir()
+    for seed in range(2):
+        np.save(directory / f"case_{seed}.npy", make_reference_batch((128, 128, 2), slices=20, seed=seed))
+    return str(directory)
+
+
+def test_identical_segmentations_have_perfect_dice():
+    predictions = tf.nn.softmax(make_reference_batch((16, 16, 4), slices=4)).numpy()
+    assert compute_class_dice(predictions, predictions) == {"necrotic": 1.0, "edema": 1.0, "enhancing": 1.0}
+
+
+@pytest.mark.parametrize("mode", ["float16", "int8"])
+def test_quantized_predictor_passes_gate(tmp_path, mode):
+    model_path = str(tmp_path / "tiny_model.h5")
+    keras_model = build_tiny_unet(model_path)
+
+    predictor = load_quantized_predictor(
+        model_path, lambda: keras_model, mode=mode, cache_dir=str(tmp_path / "compiled"), min_dice=0.9,
+        reference_dir=write_reference_set(tmp_path / "reference")
+    )
+    assert isinstance(predictor, TFLitePredictor)
+
+    volume = make_reference_batch((128, 128, 2), slices=10, seed=3)
+    output = predictor.predict(volume)
+    assert output.shape == (10, 128, 128, 4)
+    np.testing.assert_allclose(output.sum(axis=-1), 1.0, atol=1e-2)
+
+
+def test_gate_refuses_activation_below_threshold(tmp_path):
+    """Un seuil inatteignable doit bloquer l'activation"""
+    model_path = str(tmp_path / "tiny_model.h5")
+    keras_model = build_tiny_unet(model_path)
+
+    with pytest.raises(QuantizationGateError):
+        load_quantized_predictor(
+            model_path, lambda: keras_model, mode="int8", cache_dir=str(tmp_path / "compiled"), min_dice=1.01,
+            reference_dir=write_reference_set(tmp_path / "reference")
+        )
+
+
+def test_missing_reference_set_refuses_activation(tmp_path):
+    """Sans vrais cas de référence, pas de contrôle sur du bruit : le mode n'est pas activé"""
+    model_path = str(tmp_path / "tiny_model.h5")
+    build_tiny_unet(model_path)
+
+    with pytest.raises(QuantizationGateError, match="aucun volume de référence"):
+        load_quantized_predictor(
+            model_path, lambda: pytest.fail("le modèle Keras ne doit pas être chargé"), mode="int8",
+            cache_dir=str(tmp_path / "compiled"), reference_dir=str(tmp_path / "absent")
+        )
+    assert not (tmp_path / "compiled").exists()
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    print("🧪 === TEST MODE QUANTIFIÉ ===")
+    for quant_mode in ("float16", "int8"):
+        with tempfile.TemporaryDirectory() as tmp:
+            test_quantized_predictor_passes_gate(Path(tmp), quant_mode)
+    print("✅ Modes float16 et int8 validés")
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+🧪 Test de l'analyse des régions tumorales
+Composantes connexes, boîtes, centroïdes et intensités comparés aux calculs
+directs par np.where sur le masque complet
+"""
+
+import os
+import sys
+
+import numpy as np
+
+# Ajouter le répertoire backend au path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.preprocessing import resize_slab
+from services.region_analysis import analyze_regions, sample_modalities
+
+
+def make_mask():
+    """Deux composantes disjointes de tailles différentes"""
+    mask = np.zeros((40, 64, 64), dtype=np.uint8)
+    mask[5:15, 10:30, 10:20] = 1   # 2000 voxels
+    mask[25:30, 40:50, 45:60] = 1  # 750 voxels
+    return mask
+
+
+def test_coordinates_match_np_where():
+    mask = make_mask()
+    coords = np.where(mask > 0)
+
+    coordinates = analyze_regions(mask)["coordinates"]
+
+    assert coordinates["voxel_count"] == len(coords[0])
+    np.testing.assert_allclose(coordinates["centroid"], [np.mean(c) for c in coords])
+    assert coordinates["bounding_box"] == {
+        "min": [int(np.min(c)) for c in coords],
+        "max": [int(np.max(c)) for c in coords]
+    }
+    assert coordinates["num_components"] == 2
+
+
+def test_components_are_ordered_by_size():
+    components = analyze_regions(make_mask())["coordinates"]["components"]
+
+    assert [c["voxel_count"] for c in components] == [2000, 750]
+    assert components[0]["bounding_box"] == {"min": [5, 10, 10], "max": [14, 29, 19]}
+    np.testing.assert_allclose(components[1]["centroid"], [27.0, 44.5, 52.0])
+    assert len(analyze_regions(make_mask(), max_components=1)["coordinates"]["components"]) == 1
+
+
+def test_intensity_stats_come_from_modalities():
+    mask = make_mask()
+    rng = np.random.default_rng(0)
+    intensities = {
+        "FLAIR": rng.random(mask.shape).astype(np.float32) * 1000,
+        "T1CE": rng.random(mask.shape).astype(np.float32) * 500
+    }
+
+    statistics = analyze_regions(mask, intensities)["statistical_features"]
+
+    for modality, intensity in intensities.items():
+        values = intensity[mask > 0].astype(np.float64)
+        stats = statistics["modalities"][modality]
+        np.testing.assert_allclose([stats["mean"], stats["std"], stats["min"], stats["max"]],
+                                   [values.mean(), values.std(), values.min(), values.max()], rtol=1e-5)
+    # Champs historiques lus dans la FLAIR
+    assert statistics["mean_intensity"] == statistics["modalities"]["FLAIR"]["mean"]
+    assert statistics["largest_component_voxels"] == 2000
+
+
+def test_empty_mask():
+    result = analyze_regions(np.zeros((10, 16, 16), dtype=np.uint8), {"FLAIR": np.ones((10, 16, 16))})
+    assert result["coordinates"]["voxel_count"] == 0
+    assert result["coordinates"]["components"] == []
+    assert result["statistical_features"]["mean_intensity"] == 0.0
+
+
+def test_modalities_are_sampled_on_prediction_grid():
+    volume = np.random.default_rng(1).random((96, 96, 60)).astype(np.float32)
+
+    grid = sample_modalities({"FLAIR": volume}, num_slices=50, size=32, start_at=22)["FLAIR"]
+
+    assert grid.shape == (50, 32, 32)
+    np.testing.assert_array_equal(grid[:38], resize_slab(volume, 22, 60, 32))
+    assert not grid[38:].any()  # Coupes hors volume
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-v"]))
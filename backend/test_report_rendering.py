@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+🧪 Test du rendu parallèle du rapport
+Bandes du rapport (en-tête, lignes de coupes, conclusions) rendues séparément
+puis assemblées, et pool de processus Agg
+"""
+
+import json
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+# Ajouter le répertoire backend au path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import test_brain_tumor_segmentationFinal as final_pipeline
+import services.render_pool as render_pool_module
+from config.settings import settings
+from services.render_pool import RenderPool
+from services.report_panels import (
+    REPORT_ROW_HEIGHT_IN, REPORT_WIDTH_IN, assemble_panels, render_conclusion_panel,
+    render_header_panel, render_slice_panel
+)
+from testing_fixtures import make_case
+
+METRICS = {
+    'total_volume': 42.5, 'total_tumor_volume_cm3': 42.5,
+    'necrotic_volume': 5.0, 'edema_volume': 30.0, 'enhancing_volume': 7.5,
+    'necrotic_percentage': 11.8, 'edema_percentage': 70.6, 'enhancing_percentage': 17.6
+}
+
+
+def test_panels_and_assembly(tmp_path):
+    predictions, original_data, normalized_data = make_case()
+    slice_data = final_pipeline.extract_slice_data(predictions, 50, original_data, normalized_data)
+    dpi = 20
+
+    header = render_header_panel("Titre", final_pipeline.report_info_text("case"),
+                                 final_pipeline.report_metrics_text(METRICS), final_pipeline.report_legend_text(), dpi)
+    row = render_slice_panel(slice_data, final_pipeline.TUMOR_CLASS_LUT, dpi)
+    conclusion = render_conclusion_panel("Conclusion", dpi)
+
+    assert row.shape == (round(REPORT_ROW_HEIGHT_IN * dpi), REPORT_WIDTH_IN * dpi, 3) and row.dtype == np.uint8
+    assert header.shape[1] == conclusion.shape[1] == REPORT_WIDTH_IN * dpi
+    # Œdème (vert) visible dans la ligne de la coupe
+    red, green, blue = row[..., 0].astype(int), row[..., 1].astype(int), row[..., 2].astype(int)
+    assert ((green > 200) & (red < 60) & (blue < 60)).any()
+
+    report_path = assemble_panels([header, row[:, :-10], conclusion], tmp_path / "rapport.png")
+    report = cv2.cvtColor(cv2.imread(report_path), cv2.COLOR_BGR2RGB)
+    assert report.shape == (header.shape[0] + row.shape[0] + conclusion.shape[0], header.shape[1], 3)
+    np.testing.assert_array_equal(report[:header.shape[0]], header)
+    # Bande plus étroite complétée en blanc
+    assert (report[header.shape[0]:header.shape[0] + row.shape[0], -10:] == 255).all()
+
+
+@pytest.mark.asyncio
+async def test_parallel_render_case_writes_report_and_images(tmp_path, monkeypatch):
+    predictions, original_data, normalized_data = make_case()
+    monkeypatch.setattr(render_pool_module, "render_pool", RenderPool(max_workers=2))
+    monkeypatch.setattr(settings, "AI_INDIVIDUAL_IMAGE_SIZE", 256)
+
+    try:
+        report_path, individual_images = await final_pipeline.render_case_parallel(
+            predictions, [40, 50, 60], original_data, normalized_data, "case", METRICS, str(tmp_path)
+        )
+    finally:
+        render_pool_module.render_pool.shutdown()
+
+    assert report_path == str(tmp_path / "case_rapport_medical_complet.png")
+    assert cv2.imread(report_path).shape[1] == REPORT_WIDTH_IN * 300
+
+    individual_dir = tmp_path / "case_individual_images"
+    assert individual_images == final_pipeline.individual_images_list([40, 50, 60], "case")
+    with open(individual_dir / "images_list.json") as f:
+        assert json.load(f) == individual_images
+    assert sorted(p.name for p in individual_dir.glob("*.png")) == sorted(
+        image["filename"] for image in individual_images["images"]
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
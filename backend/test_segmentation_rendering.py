@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+🧪 Test du rendu haute qualité des segmentations
+Agrandissement des 4 cartes de classes en un cv2.resize, argmax, coloration par
+table (4, 3) uint8, comparés à l'ancien rendu (étiquettes bicubiques re-seuillées)
+"""
+
+import os
+import sys
+
+import cv2
+import numpy as np
+from scipy import ndimage
+
+# Ajouter le répertoire backend au path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import test_brain_tumor_segmentationFinal as final_pipeline
+from services.segmentation_rendering import class_color_lut, render_segmentation, upsample_labels
+from testing_fixtures import make_tumor_labels
+
+
+def create_high_quality_segmentation_reference(segmentation, target_size=(256, 256)):
+    """Ancien rendu : étiquettes entières agrandies, seuils par classe, lissage scipy et boucle de coloration"""
+    seg_upscaled = cv2.resize(segmentation.astype(np.float32), target_size, interpolation=cv2.INTER_CUBIC)
+    seg_discrete = np.zeros_like(seg_upscaled, dtype=np.uint8)
+    for class_idx in range(1, 4):
+        threshold = 0.3 if class_idx == 1 else 0.4
+        mask = (seg_upscaled >= (class_idx - threshold)) & (seg_upscaled < (class_idx + 0.5))
+        seg_discrete[mask] = class_idx
+
+    seg_smoothed = np.zeros_like(seg_discrete)
+    for class_idx in range(1, 4):
+        mask = seg_discrete == class_idx
+        if np.any(mask):
+            closed = ndimage.binary_closing(mask, structure=np.ones((3, 3)))
+            opened = ndimage.binary_opening(closed, structure=np.ones((2, 2)))
+            seg_smoothed[ndimage.binary_dilation(opened, structure=np.ones((2, 2)))] = class_idx
+
+    seg_colored_hq = np.zeros((*target_size, 3))
+    for class_idx in range(1, 4):
+        mask = seg_smoothed == class_idx
+        if np.any(mask):
+            color_hex = final_pipeline.TUMOR_CLASSES[class_idx]['color']
+            seg_colored_hq[mask] = np.array([int(color_hex[i:i + 2], 16) for i in (1, 3, 5)]) / 255.0
+    return seg_smoothed, seg_colored_hq
+
+
+def test_lut_matches_hex_colors():
+    lut = class_color_lut(final_pipeline.TUMOR_CLASSES)
+    assert lut.dtype == np.uint8 and lut.shape == (4, 3)
+    assert lut.tolist() == [[0, 0, 0], [255, 0, 0], [0, 255, 0], [0, 128, 255]]
+    np.testing.assert_array_equal(final_pipeline.TUMOR_CLASS_LUT, lut)
+
+
+def test_same_visual_output_as_previous_rendering():
+    labels = make_tumor_labels()
+    for slice_idx in (30, 50, 70):
+        expected_labels, expected_colors = create_high_quality_segmentation_reference(labels[slice_idx])
+        actual_labels, actual_colors = final_pipeline.create_high_quality_segmentation(labels[slice_idx])
+
+        assert actual_labels.shape == (256, 256) and actual_colors.dtype == np.uint8
+        # Seules les frontières entre classes peuvent différer (plus de classe intermédiaire)
+        assert (actual_labels == expected_labels).mean() > 0.95
+        same = actual_labels == expected_labels
+        np.testing.assert_allclose(actual_colors[same] / 255.0, expected_colors[same])
+
+
+def test_softmax_and_stack_inputs():
+    labels = make_tumor_labels(num_slices=20)
+    lut = final_pipeline.TUMOR_CLASS_LUT
+    softmax = np.eye(4, dtype=np.float32)[labels]  # Probabilités (N, H, W, 4)
+
+    stack_labels, stack_colors = render_segmentation(labels, lut)
+    np.testing.assert_array_equal(render_segmentation(softmax, lut)[0], stack_labels)
+    np.testing.assert_array_equal(upsample_labels(labels[:1]), upsample_labels(labels)[:1])
+    single_labels, single_colors = final_pipeline.create_high_quality_segmentation(labels[12])
+    np.testing.assert_array_equal(single_labels, stack_labels[12])
+    np.testing.assert_array_equal(single_colors, stack_colors[12])
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-v"]))
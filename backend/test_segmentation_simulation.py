@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+🧪 Test de la simulation de segmentation (sans TensorFlow)
+Version vectorisée face à l'ancienne double boucle par pixel, reproductibilité
+avec une graine
+"""
+
+import os
+import sys
+
+import numpy as np
+
+# Ajouter le répertoire backend au path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.settings import settings
+from services.segmentation_simulation import (
+    generate_realistic_segmentation_simulation, simulate_segmentation_predictions
+)
+
+
+def simulate_segmentation_predictions_loop(preprocessed_data):
+    """Ancienne implémentation : seuils par coupe puis normalisation pixel par pixel"""
+    batch_size, height, width, _ = preprocessed_data.shape
+    predictions = np.zeros((batch_size, height, width, 4))
+    for i in range(batch_size):
+        combined = (preprocessed_data[i, :, :, 0] + preprocessed_data[i, :, :, 1]) / 2
+        mean_val, std_val = np.mean(combined), np.std(combined)
+        predictions[i, :, :, 0][combined < (mean_val + 0.5 * std_val)] = 0.9
+        predictions[i, :, :, 1][(combined >= (mean_val + 0.5 * std_val)) & (combined < (mean_val + 1.0 * std_val))] = 0.8
+        predictions[i, :, :, 2][(combined >= (mean_val + 1.0 * std_val)) & (combined < (mean_val + 1.5 * std_val))] = 0.7
+        predictions[i, :, :, 3][combined >= (mean_val + 1.5 * std_val)] = 0.9
+        for h in range(height):
+            for w in range(width):
+                pixel_sum = np.sum(predictions[i, h, w, :])
+                if pixel_sum > 0:
+                    predictions[i, h, w, :] /= pixel_sum
+                else:
+                    predictions[i, h, w, 0] = 1.0
+    return predictions
+
+
+def make_input(num_slices=100, size=128, seed=0):
+    rng = np.random.default_rng(seed)
+    data = np.zeros((num_slices, size, size, 2), dtype=np.float32)
+    data[:, 20:108, 20:108] = rng.random((num_slices, 88, 88, 2), dtype=np.float32)
+    return data
+
+
+def test_matches_previous_loop():
+    data = make_input(num_slices=6, size=48)
+    expected = simulate_segmentation_predictions_loop(data)
+    actual = simulate_segmentation_predictions(data)
+
+    assert actual.shape == expected.shape and actual.dtype == np.float32
+    np.testing.assert_allclose(actual, expected, atol=1e-6)
+
+
+def test_realistic_simulation_is_reproducible(monkeypatch):
+    data = make_input(num_slices=10)
+    first = generate_realistic_segmentation_simulation(data, seed=7)
+
+    np.testing.assert_array_equal(first, generate_realistic_segmentation_simulation(data, seed=7))
+    assert not np.array_equal(first, generate_realistic_segmentation_simulation(data, seed=8))
+    assert first.shape == (10, 128, 128, 4)
+    # Disque tumoral au centre : l'œdème (0,4) domine
+    assert (np.argmax(first[:, 64, 64], axis=-1) == 2).all()
+
+    monkeypatch.setattr(settings, "AI_SIMULATION_SEED", 7)
+    np.testing.assert_array_equal(generate_realistic_segmentation_simulation(data), first)
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+🧪 Test de la lecture paresseuse des volumes NIfTI
+Lecture par coupes en float32, normalisation à la lecture, statistiques
+d'intensité pré-calculées, copies de travail des .nii.gz et équivalence
+avec le chargement complet get_fdata()
+"""
+
+import os
+import sys
+import pickle
+
+import numpy as np
+import nibabel as nib
+
+# Ajouter le répertoire backend au path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.preprocessing import build_model_input, compute_brain_bbox
+from services.volume_reader import (
+    DATA_OFFSET_ALIGNMENT, INTENSITY_STATS_KEY, WORKING_COPY_KEY, bounds_from_metadata,
+    compute_file_intensity_stats, create_working_copy, nonzero_percentiles, normalize_volume, open_volume,
+    partition_percentiles
+)
+
+
+def write_volume(path, seed=0, shape=(64, 64, 140)):
+    rng = np.random.default_rng(seed)
+    data = np.zeros(shape, dtype=np.int16)
+    data[10:50, 12:52, 20:120] = rng.integers(1, 1000, (40, 40, 100))
+    nib.save(nib.Nifti1Image(data, np.eye(4)), str(path))
+    return str(path)
+
+
+def eager_normalize(data):
+    p1, p99 = np.percentile(data[data > 0], [1, 99])
+    return np.clip((data - p1) / (p99 - p1), 0, 1)
+
+
+def test_slices_are_read_on_demand_in_float32(tmp_path):
+    path = write_volume(tmp_path / "flair.nii")
+    volume = open_volume(path)
+    eager = nib.load(path).get_fdata()
+
+    assert volume.shape == eager.shape
+    assert volume[:, :, 30].dtype == np.float32
+    np.testing.assert_array_equal(volume[:, :, 30], eager[:, :, 30])
+    np.testing.assert_array_equal(volume.slab(22, 40), eager[:, :, 22:40])
+
+
+def test_normalization_matches_full_volume(tmp_path):
+    path = write_volume(tmp_path / "flair.nii")
+    eager = nib.load(path).get_fdata()
+
+    np.testing.assert_allclose(nonzero_percentiles(open_volume(path), chunk_slices=7),
+                               np.percentile(eager[eager > 0], [1, 99]))
+    normalized = normalize_volume(open_volume(path))
+    np.testing.assert_allclose(normalized[:, :, 50], eager_normalize(eager)[:, :, 50], atol=1e-6)
+
+
+def test_model_input_and_bbox_match_eager_loading(tmp_path):
+    paths = {modality: write_volume(tmp_path / f"{modality}.nii", seed)
+             for seed, modality in enumerate(("flair", "t1ce"))}
+    eager = {modality: nib.load(path).get_fdata() for modality, path in paths.items()}
+    lazy = {modality: open_volume(path) for modality, path in paths.items()}
+
+    assert compute_brain_bbox(lazy.values()) == compute_brain_bbox(eager.values())
+
+    expected = build_model_input({modality: eager_normalize(data) for modality, data in eager.items()})
+    actual = build_model_input({modality: normalize_volume(volume) for modality, volume in lazy.items()})
+    np.testing.assert_allclose(actual, expected, atol=1e-5)
+
+
+def test_volumes_pickle_by_path(tmp_path):
+    path = write_volume(tmp_path / "t1ce.nii")
+    normalized = normalize_volume(open_volume(path))
+    bounds = normalized.bounds
+
+    restored = pickle.loads(pickle.dumps(normalized))
+    assert restored.volume.path == path
+    assert restored.bounds == bounds
+    np.testing.assert_array_equal(restored[:, :, 60], normalized[:, :, 60])
+
+
+def test_partition_percentiles_match_numpy():
+    values = np.random.default_rng(3).random(10001).astype(np.float32)
+    for percentiles in ((1, 99), (0, 100), (50,), (12.5, 87.5)):
+        np.testing.assert_allclose(partition_percentiles(values, percentiles),
+                                   np.percentile(values.astype(np.float64), percentiles), rtol=1e-6)
+
+
+def test_stats_from_metadata_are_reused(tmp_path):
+    path = write_volume(tmp_path / "flair.nii")
+    stats = compute_file_intensity_stats(path)
+    eager = nib.load(path).get_fdata()
+    assert stats["nonzero_voxels"] == int((eager > 0).sum())
+
+    image_metadata = {"series_id": "s1", INTENSITY_STATS_KEY: stats}
+    assert bounds_from_metadata(image_metadata) == (stats["p1"], stats["p99"])
+    assert bounds_from_metadata({"series_id": "s1"}) is None
+
+    # Bornes imposées par les métadonnées : aucune relecture du volume complet
+    volume = open_volume(path, {INTENSITY_STATS_KEY: dict(stats, p1=0.0, p99=2000.0)})
+    normalized = normalize_volume(volume)
+    assert normalized.bounds == (0.0, 2000.0)
+    np.testing.assert_allclose(normalized[:, :, 50], np.clip(eager[:, :, 50] / 2000.0, 0, 1), atol=1e-6)
+
+
+def test_gzip_upload_gets_aligned_working_copy(tmp_path):
+    gz_path = write_volume(tmp_path / "series_flair.nii.gz")
+    assert create_working_copy(write_volume(tmp_path / "series_t1.nii")) is None
+
+    working_copy = create_working_copy(gz_path)
+    assert working_copy.endswith("series_flair.work.nii")
+    assert nib.load(working_copy).header.get_data_offset() % DATA_OFFSET_ALIGNMENT == 0
+    np.testing.assert_array_equal(nib.load(working_copy).get_fdata(), nib.load(gz_path).get_fdata())
+
+    volume = open_volume(gz_path, {WORKING_COPY_KEY: working_copy})
+    assert volume.path == working_copy
+    os.remove(working_copy)
+    assert open_volume(gz_path, {WORKING_COPY_KEY: working_copy}).path == gz_path
+
+
+def test_working_copy_keeps_stored_values_and_scaling(tmp_path):
+    rng = np.random.default_rng(3)
+    image = nib.Nifti1Image(rng.random((32, 32, 40)) * 500.0 + 20.0, np.eye(4))
+    image.set_data_dtype(np.int16)  # nibabel choisit scl_slope/scl_inter à l'écriture
+    gz_path = str(tmp_path / "series_t1ce.nii.gz")
+    nib.save(image, gz_path)
+    original = nib.load(gz_path)
+
+    working = nib.load(create_working_copy(gz_path))
+    assert working.get_data_dtype() == np.int16
+    assert working.header.get_slope_inter() == original.header.get_slope_inter()
+    np.testing.assert_array_equal(working.dataobj.get_unscaled(), original.dataobj.get_unscaled())
+    np.testing.assert_array_equal(working.get_fdata(), original.get_fdata())
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+🧪 Données et modèles synthétiques partagés par les tests et benchmarks
+Module utilitaire (non collecté par pytest) : les dépendances lourdes sont
+importées à l'intérieur des fonctions qui en ont besoin
+"""
+
+
+def make_tumor_labels(num_slices: int = 100, size: int = 128):
+    """Étiquettes (N, H, W) uint8 : tumeur ellipsoïdale à trois classes imbriquées dont la taille varie selon la coupe"""
+    import numpy as np
+
+    z, y, x = np.ogrid[:num_slices, :size, :size]
+    radius = ((z - 50) / 30) ** 2 + ((y - 64) / 28) ** 2 + ((x - 60) / 22) ** 2
+    labels = np.zeros((num_slices, size, size), dtype=np.uint8)
+    labels[radius <= 1.0] = 2
+    labels[radius <= 0.45] = 3
+    labels[radius <= 0.15] = 1
+    return labels
+
+
+def make_case(num_slices: int = 100, size: int = 128, depth: int = 155, seed: int = 0):
+    """
+    Cas synthétique pour le rendu : volumes bruités (H, W, D) des 4 modalités
+    et prédictions one-hot (N, H, W, 4) de la tumeur de make_tumor_labels.
+
+    Returns:
+        (predictions, original_data, normalized_data) au format du pipeline professionnel
+    """
+    import numpy as np
+    from services.segmentation_rendering import INDIVIDUAL_IMAGE_MODALITIES
+
+    rng = np.random.default_rng(seed)
+    original_data, normalized_data = {}, {}
+    for modality in INDIVIDUAL_IMAGE_MODALITIES:
+        volume = rng.random((size, size, depth), dtype=np.float32) * 800
+        original_data[modality] = {'data': volume}
+        normalized_data[modality] = volume / 800
+    labels = make_tumor_labels(num_slices, size)
+    return np.eye(4, dtype=np.float32)[labels], original_data, normalized_data
+
+
+def build_tiny_unet(path: str, pooling: bool = False):
+    """
+    Petit modèle convolutionnel (N, 128, 128, 2) -> (N, 128, 128, 4) softmax, enregistré dans path.
+
+    Args:
+        path: Fichier .h5 de destination
+        pooling: Ajoute un MaxPooling2D / UpSampling2D entre les convolutions
+    """
+    import tensorflow as tf
+
+    inputs = tf.keras.Input((128, 128, 2))
+    x = tf.keras.layers.Conv2D(8, 3, padding="same", activation="relu")(inputs)
+    if pooling:
+        x = tf.keras.layers.MaxPooling2D()(x)
+        x = tf.keras.layers.UpSampling2D()(x)
+    outputs = tf.keras.layers.Conv2D(4, 1, activation="softmax")(x)
+    model = tf.keras.Model(inputs, outputs)
+    model.save(path)
+    return model